@@ -0,0 +1,61 @@
+"""add_hot_query_indexes
+
+Revision ID: 9f77b34c3744
+Revises: 720f46ae18a7
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f77b34c3744'
+down_revision: Union[str, Sequence[str], None] = '720f46ae18a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns) - names match the model declarations
+INDEXES = [
+    ('ix_users_email', 'users', ['email']),
+    ('ix_cafe_owner_profile_user_id', 'cafe_owner_profile', ['user_id']),
+    ('ix_cafe_owner_id', 'cafe', ['owner_id']),
+    ('ix_cafe_worker_user_id_cafe_id', 'cafe_worker', ['user_id', 'cafe_id']),
+    ('ix_menu_item_cafe_id_available', 'menu_item', ['cafe_id', 'available']),
+    ('ix_menu_item_category_id_available', 'menu_item', ['category_id', 'available']),
+    ('ix_order_account_id_created_at', 'order', ['account_id', 'created_at', 'id']),
+    ('ix_order_cafe_id_created_at', 'order', ['cafe_id', 'created_at', 'id']),
+    ('ix_order_item_order_id', 'order_item', ['order_id']),
+    ('ix_feedback_cafe_id_created_at', 'feedback', ['cafe_id', 'created_at']),
+    ('ix_feedback_order_id', 'feedback', ['order_id']),
+    ('ix_worker_request_user_id_cafe_id', 'worker_request', ['user_id', 'cafe_id']),
+]
+
+
+def _existing_tables() -> set:
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # worker_request is created by migrations/add_worker_request_table.sql, so it may be absent
+    tables = _existing_tables()
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            if table in tables:
+                op.create_index(name, table, columns, if_not_exists=True,
+                                postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    tables = _existing_tables()
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            if table in tables:
+                op.drop_index(name, table_name=table, if_exists=True,
+                              postgresql_concurrently=True)
@@ -0,0 +1,34 @@
+"""add_active_order_index
+
+Revision ID: a8d3f5b7c9e1
+Revises: f1b6d4a8c2e7
+Create Date: 2026-10-18 22:12:53.180447
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d3f5b7c9e1'
+down_revision: Union[str, Sequence[str], None] = 'f1b6d4a8c2e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_order_cafe_id_active', 'order', ['cafe_id'], unique=False, if_not_exists=True,
+                        postgresql_where=sa.text("status IN ('pending', 'preparing')"),
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_order_cafe_id_active', table_name='order', if_exists=True,
+                      postgresql_concurrently=True)
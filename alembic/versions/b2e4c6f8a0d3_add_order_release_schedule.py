@@ -0,0 +1,65 @@
+"""add_order_release_schedule
+
+Revision ID: b2e4c6f8a0d3
+Revises: a8d3f5b7c9e1
+Create Date: 2026-10-18 23:08:41.265318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e4c6f8a0d3'
+down_revision: Union[str, Sequence[str], None] = 'a8d3f5b7c9e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Orders backfilled per transaction, so no long-held row locks on "order"
+BACKFILL_BATCH_SIZE = 5000
+
+# Every existing order was already broadcast when it was placed. Item times
+# have no zone and hold Uzbekistan wall-clock time, as the order router writes them
+BACKFILL = """
+    UPDATE "order" o
+    SET released_at = COALESCE(o.created_at, now()),
+        scheduled_time = (SELECT MIN(oi.scheduled_time) AT TIME ZONE 'Asia/Tashkent' FROM order_item oi
+                          WHERE oi.order_id = o.id AND oi.scheduled)
+    WHERE o.released_at IS NULL{range}
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('order', sa.Column('scheduled_time', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('order', sa.Column('released_at', sa.DateTime(timezone=True), nullable=True))
+
+    if op.get_context().as_sql:
+        # Offline SQL has no rows to batch over
+        op.execute(BACKFILL.format(range=""))
+    else:
+        with op.get_context().autocommit_block():
+            bind = op.get_bind()
+            max_id = bind.execute(sa.text('SELECT MAX(id) FROM "order"')).scalar() or 0
+            statement = sa.text(BACKFILL.format(range=" AND o.id > :after AND o.id <= :until"))
+            for after in range(0, max_id, BACKFILL_BATCH_SIZE):
+                bind.execute(statement, {"after": after, "until": after + BACKFILL_BATCH_SIZE})
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_order_scheduled_time', 'order', ['scheduled_time'], unique=False,
+                        if_not_exists=True,
+                        postgresql_where=sa.text('released_at IS NULL'),
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_order_scheduled_time', table_name='order', if_exists=True,
+                      postgresql_concurrently=True)
+    op.drop_column('order', 'released_at')
+    op.drop_column('order', 'scheduled_time')
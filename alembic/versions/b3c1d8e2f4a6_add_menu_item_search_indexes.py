@@ -0,0 +1,48 @@
+"""add_menu_item_search_indexes
+
+Revision ID: b3c1d8e2f4a6
+Revises: 9f77b34c3744
+Create Date: 2026-10-18 14:05:12.524871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3c1d8e2f4a6'
+down_revision: Union[str, Sequence[str], None] = '9f77b34c3744'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Trigram indexes over available items serve both ILIKE '%term%' and the
+# word-similarity operator used by /public/categories/{name}/cafes
+INDEXES = [
+    ('ix_menu_item_name_trgm', 'name'),
+    ('ix_menu_item_description_trgm', 'description'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, column in INDEXES:
+            op.create_index(name, 'menu_item', [column], if_not_exists=True,
+                            postgresql_using='gin',
+                            postgresql_ops={column: 'gin_trgm_ops'},
+                            postgresql_where=sa.text('available'),
+                            postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The pg_trgm extension is left installed; other objects may depend on it
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='menu_item', if_exists=True,
+                          postgresql_concurrently=True)
@@ -0,0 +1,46 @@
+"""add_public_category_cafe
+
+Revision ID: c7e2a9d4b1f3
+Revises: b3c1d8e2f4a6
+Create Date: 2026-10-18 15:32:47.160394
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e2a9d4b1f3'
+down_revision: Union[str, Sequence[str], None] = 'b3c1d8e2f4a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('public_category_cafe',
+    sa.Column('public_category_id', sa.String(length=36), nullable=False),
+    sa.Column('cafe_id', sa.String(length=36), nullable=False),
+    sa.ForeignKeyConstraint(['cafe_id'], ['cafe.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['public_category_id'], ['public_category.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('public_category_id', 'cafe_id')
+    )
+    op.create_index(op.f('ix_public_category_cafe_cafe_id'), 'public_category_cafe', ['cafe_id'], unique=False)
+
+    # Backfill; same rule as app.core.category_cafes.rebuild
+    op.execute(r"""
+        INSERT INTO public_category_cafe (public_category_id, cafe_id)
+        SELECT DISTINCT pc.id, m.cafe_id
+        FROM public_category pc
+        JOIN menu_item m ON m.available = TRUE
+            AND (m.name ILIKE '%' || replace(replace(replace(pc.name, '\', '\\'), '%', '\%'), '_', '\_') || '%' ESCAPE '\'
+                 OR m.description ILIKE '%' || replace(replace(replace(pc.name, '\', '\\'), '%', '\%'), '_', '\_') || '%' ESCAPE '\')
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_public_category_cafe_cafe_id'), table_name='public_category_cafe')
+    op.drop_table('public_category_cafe')
@@ -0,0 +1,41 @@
+"""add_cafe_customer
+
+Revision ID: c9f1e3a5b7d2
+Revises: b2e4c6f8a0d3
+Create Date: 2026-10-19 10:24:17.506932
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9f1e3a5b7d2'
+down_revision: Union[str, Sequence[str], None] = 'b2e4c6f8a0d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('cafe_customer',
+    sa.Column('cafe_id', sa.String(length=36), nullable=False),
+    sa.Column('account_id', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['cafe_id'], ['cafe.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('cafe_id', 'account_id')
+    )
+
+    # Backfill; same statement as app.core.rollups.rebuild
+    op.execute("""
+        INSERT INTO cafe_customer (cafe_id, account_id)
+        SELECT DISTINCT cafe_id, account_id
+        FROM "order"
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('cafe_customer')
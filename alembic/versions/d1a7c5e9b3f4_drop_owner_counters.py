@@ -0,0 +1,50 @@
+"""drop_owner_counters
+
+Revision ID: d1a7c5e9b3f4
+Revises: c9f1e3a5b7d2
+Create Date: 2026-10-19 14:02:38.914205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1a7c5e9b3f4'
+down_revision: Union[str, Sequence[str], None] = 'c9f1e3a5b7d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (column, type) - the owner summary now sums the daily rollups instead
+COUNTERS = [
+    ('total_orders', sa.Integer()),
+    ('total_customers', sa.Integer()),
+    ('total_revenue', sa.Float()),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column, _ in COUNTERS:
+        op.drop_column('cafe_owner_profile', column)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column, type_ in COUNTERS:
+        op.add_column('cafe_owner_profile',
+                      sa.Column(column, type_, server_default='0', nullable=False))
+    # Same totals as app.core.rollups.OWNER_SUMMARY
+    op.execute("""
+        UPDATE cafe_owner_profile cop
+        SET total_orders = (SELECT COUNT(*) FROM "order" o JOIN cafe c ON c.id = o.cafe_id
+                            WHERE c.owner_id = cop.id),
+            total_revenue = (SELECT COALESCE(SUM(o.total_price), 0) FROM "order" o
+                             JOIN cafe c ON c.id = o.cafe_id
+                             WHERE c.owner_id = cop.id AND o.status = 'completed'),
+            total_customers = (SELECT COUNT(*) FROM cafe_owner_customer coc
+                               WHERE coc.owner_profile_id = cop.id)
+    """)
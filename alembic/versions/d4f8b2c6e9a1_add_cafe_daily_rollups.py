@@ -0,0 +1,73 @@
+"""add_cafe_daily_rollups
+
+Revision ID: d4f8b2c6e9a1
+Revises: c7e2a9d4b1f3
+Create Date: 2026-10-18 17:21:09.843115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f8b2c6e9a1'
+down_revision: Union[str, Sequence[str], None] = 'c7e2a9d4b1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('cafe_daily_order_stats',
+    sa.Column('cafe_id', sa.String(length=36), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['cafe_id'], ['cafe.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('cafe_id', 'day', 'status')
+    )
+    op.create_index('ix_cafe_daily_order_stats_day', 'cafe_daily_order_stats', ['day'], unique=False)
+    op.create_table('cafe_daily_stats',
+    sa.Column('cafe_id', sa.String(length=36), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('new_customers', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Float(), nullable=False),
+    sa.Column('rating_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['cafe_id'], ['cafe.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('cafe_id', 'day')
+    )
+    op.create_index('ix_cafe_daily_stats_day', 'cafe_daily_stats', ['day'], unique=False)
+
+    # Backfill; same statements as app.core.rollups.rebuild
+    op.execute("""
+        INSERT INTO cafe_daily_order_stats (cafe_id, day, status, orders, revenue)
+        SELECT cafe_id, CAST(created_at AS DATE), status, COUNT(*), SUM(total_price)
+        FROM "order"
+        GROUP BY cafe_id, CAST(created_at AS DATE), status
+    """)
+    op.execute("""
+        INSERT INTO cafe_daily_stats (cafe_id, day, new_customers, rating_sum, rating_count)
+        SELECT cafe_id, day, SUM(new_customers), SUM(rating_sum), SUM(rating_count)
+        FROM (
+            SELECT cafe_id, CAST(MIN(created_at) AS DATE) AS day,
+                   1 AS new_customers, 0 AS rating_sum, 0 AS rating_count
+            FROM "order"
+            GROUP BY cafe_id, account_id
+            UNION ALL
+            SELECT cafe_id, CAST(created_at AS DATE), 0, rating, 1
+            FROM feedback
+            WHERE cafe_id IS NOT NULL
+        ) AS daily
+        GROUP BY cafe_id, day
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_cafe_daily_stats_day', table_name='cafe_daily_stats')
+    op.drop_table('cafe_daily_stats')
+    op.drop_index('ix_cafe_daily_order_stats_day', table_name='cafe_daily_order_stats')
+    op.drop_table('cafe_daily_order_stats')
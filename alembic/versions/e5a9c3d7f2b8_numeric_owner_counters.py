@@ -0,0 +1,77 @@
+"""numeric_owner_counters
+
+Revision ID: e5a9c3d7f2b8
+Revises: d4f8b2c6e9a1
+Create Date: 2026-10-18 18:40:36.271554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9c3d7f2b8'
+down_revision: Union[str, Sequence[str], None] = 'd4f8b2c6e9a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (column, new type, Postgres cast)
+COUNTERS = [
+    ('total_orders', sa.Integer(), 'integer'),
+    ('total_customers', sa.Integer(), 'integer'),
+    ('total_revenue', sa.Float(), 'double precision'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The string counters were never maintained; convert, then recompute from orders
+    for column, type_, cast in COUNTERS:
+        op.alter_column('cafe_owner_profile', column,
+                        existing_type=sa.String(),
+                        type_=type_,
+                        postgresql_using=f"COALESCE(NULLIF(TRIM({column}), ''), '0')::{cast}",
+                        server_default='0',
+                        nullable=False)
+
+    op.create_table('cafe_owner_customer',
+    sa.Column('owner_profile_id', sa.String(), nullable=False),
+    sa.Column('account_id', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['owner_profile_id'], ['cafe_owner_profile.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_profile_id', 'account_id')
+    )
+
+    # Backfill; same statements as app.core.rollups.rebuild
+    op.execute("""
+        INSERT INTO cafe_owner_customer (owner_profile_id, account_id)
+        SELECT DISTINCT c.owner_id, o.account_id
+        FROM "order" o
+        JOIN cafe c ON c.id = o.cafe_id
+        WHERE c.owner_id IS NOT NULL
+    """)
+    op.execute("""
+        UPDATE cafe_owner_profile cop
+        SET total_orders = (SELECT COUNT(*) FROM "order" o JOIN cafe c ON c.id = o.cafe_id
+                            WHERE c.owner_id = cop.id),
+            total_revenue = (SELECT COALESCE(SUM(o.total_price), 0) FROM "order" o
+                             JOIN cafe c ON c.id = o.cafe_id
+                             WHERE c.owner_id = cop.id AND o.status = 'completed'),
+            total_customers = (SELECT COUNT(*) FROM cafe_owner_customer coc
+                               WHERE coc.owner_profile_id = cop.id)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('cafe_owner_customer')
+    for column, type_, _ in reversed(COUNTERS):
+        op.alter_column('cafe_owner_profile', column,
+                        existing_type=type_,
+                        type_=sa.String(),
+                        postgresql_using=f"{column}::varchar",
+                        server_default=None,
+                        nullable=True)
@@ -0,0 +1,177 @@
+"""Per-cafe admission control for new orders.
+
+A cafe can only take so many orders at once: once it has too many
+``pending``/``preparing`` orders, or receives new orders faster than the
+configured rate, ``POST /orders/`` answers 429 with an estimated wait before
+inserting anything. Idempotent replays, unknown cafes and orders with bad
+items are answered before admission, so they use no capacity and create no
+counters.
+
+Only orders the kitchen has been sent count; scheduled pre-orders join the
+count when app.core.order_scheduler releases them. Counts are kept in memory:
+an admitted order reserves its slot until it commits (then it becomes active)
+or fails (then the slot and its rate token are given back), so concurrent
+requests cannot all pass the same limit in this process.
+Every process reloads a cafe's active count from the database at most every
+ORDER_ADMISSION_RESYNC_SECONDS, which absorbs orders taken or moved by other
+workers; the new-order rate is limited per process.
+"""
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.order import StatusTypes
+
+# Released orders the kitchen still has to work on
+ACTIVE_STATUSES = (StatusTypes.pending.value, StatusTypes.preparing.value)
+
+_ACTIVE_ORDERS = text("""
+    SELECT COUNT(*) FROM "order"
+    WHERE cafe_id = :cafe_id AND status IN ('pending', 'preparing') AND released_at IS NOT NULL
+""")
+
+# Weight of the newest sample in the moving average of time per finished order
+_THROUGHPUT_SMOOTHING = 0.2
+
+
+@dataclass
+class CafeLoad:
+    active: int
+    synced_at: float
+    # Admitted orders not yet committed; kept apart from active so a resync doesn't drop them
+    reserved: int
+    # Token bucket for the new-order rate
+    tokens: float
+    refilled_at: float
+    # Moving average of seconds between finished orders while the kitchen is busy
+    seconds_per_order: Optional[float] = None
+    finished_at: Optional[float] = None
+    busy_since_finished: bool = False
+
+
+class OrderAdmission:
+    def __init__(self):
+        self.cafes: Dict[str, CafeLoad] = {}
+        self.lock = threading.Lock()
+        self.rejected = {"active": 0, "rate": 0}
+
+    @staticmethod
+    def enabled() -> bool:
+        return settings.ORDER_ADMISSION_MAX_ACTIVE > 0 or settings.ORDER_ADMISSION_MAX_PER_MINUTE > 0
+
+    async def admit(self, db: AsyncSession, cafe_id: str, reserve: bool):
+        """Raise 429 if ``cafe_id`` cannot take another order right now.
+
+        Only call this for a cafe known to exist: each cafe admitted gets a counter.
+        With ``reserve`` (the order goes to the kitchen at once) an active slot is
+        held; either way, follow up with order_created(reserved=...) after the
+        commit or cancel() if the order is not placed.
+        """
+        if not self.enabled():
+            return
+
+        now = time.monotonic()
+        with self.lock:
+            load = self.cafes.get(cafe_id)
+            stale = load is None or now - load.synced_at >= settings.ORDER_ADMISSION_RESYNC_SECONDS
+        if stale:
+            active = (await db.execute(_ACTIVE_ORDERS, {"cafe_id": cafe_id})).scalar()
+            with self.lock:
+                load = self.cafes.get(cafe_id)
+                if load is None:
+                    load = self.cafes[cafe_id] = CafeLoad(active=active, synced_at=now, reserved=0,
+                                                          tokens=settings.ORDER_ADMISSION_MAX_PER_MINUTE,
+                                                          refilled_at=now)
+                else:
+                    load.active, load.synced_at = active, now
+
+        with self.lock:
+            self._check_active(load)
+            self._take_token(load, now)
+            if reserve:
+                load.reserved += 1
+
+    def _check_active(self, load: CafeLoad):
+        limit = settings.ORDER_ADMISSION_MAX_ACTIVE
+        queued = load.active + load.reserved
+        if limit <= 0 or queued < limit:
+            return
+        self.rejected["active"] += 1
+        seconds_per_order = load.seconds_per_order or settings.ORDER_ADMISSION_PREP_SECONDS
+        self._reject((queued - limit + 1) * seconds_per_order)
+
+    def _take_token(self, load: CafeLoad, now: float):
+        rate = settings.ORDER_ADMISSION_MAX_PER_MINUTE
+        if rate <= 0:
+            return
+        load.tokens = min(rate, load.tokens + (now - load.refilled_at) * rate / 60)
+        load.refilled_at = now
+        if load.tokens < 1:
+            self.rejected["rate"] += 1
+            self._reject((1 - load.tokens) * 60 / rate)
+        load.tokens -= 1
+
+    @staticmethod
+    def _reject(wait: float):
+        wait = max(1, math.ceil(wait))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"This cafe is busy, please try again in about {wait} seconds",
+            headers={"Retry-After": str(wait)},
+        )
+
+    def order_created(self, cafe_id: str, reserved: bool = False):
+        """Count a committed order the kitchen has been sent."""
+        with self.lock:
+            load = self.cafes.get(cafe_id)
+            if load is not None:
+                load.active += 1
+                if reserved:
+                    load.reserved = max(0, load.reserved - 1)
+
+    def cancel(self, cafe_id: str, reserved: bool):
+        """Give back what admit() took for an order that was not placed."""
+        with self.lock:
+            load = self.cafes.get(cafe_id)
+            if load is None:
+                return
+            if reserved:
+                load.reserved = max(0, load.reserved - 1)
+            if settings.ORDER_ADMISSION_MAX_PER_MINUTE > 0:
+                load.tokens = min(settings.ORDER_ADMISSION_MAX_PER_MINUTE, load.tokens + 1)
+
+    def order_moved(self, cafe_id: str, old_status: str, new_status: str):
+        """Account for a committed status change."""
+        was_active, is_active = old_status in ACTIVE_STATUSES, new_status in ACTIVE_STATUSES
+        if was_active == is_active:
+            return
+        now = time.monotonic()
+        with self.lock:
+            load = self.cafes.get(cafe_id)
+            if load is None:
+                return
+            if is_active:
+                load.active += 1
+                return
+            load.active = max(0, load.active - 1)
+            # Gaps while the kitchen had nothing queued say nothing about its pace
+            if load.busy_since_finished:
+                sample = now - load.finished_at
+                load.seconds_per_order = sample if load.seconds_per_order is None else (
+                    _THROUGHPUT_SMOOTHING * sample + (1 - _THROUGHPUT_SMOOTHING) * load.seconds_per_order)
+            load.finished_at = now
+            load.busy_since_finished = load.active > 0
+
+    def active_orders(self) -> Dict[str, int]:
+        with self.lock:
+            return {cafe_id: load.active for cafe_id, load in self.cafes.items()}
+
+
+order_admission = OrderAdmission()
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Optional, Set
+
+from app.config import settings
+from app.core.pubsub import PubSubBackend, create_pubsub_backend
+
+logger = logging.getLogger(__name__)
+
+# Scopes that are not tied to one cafe
+ALL_CAFES = "__cafes__"
+PUBLIC_CATEGORIES = "__public_categories__"
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    body: bytes
+    # Strong validator derived from the body, so every worker agrees on it
+    etag: str
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "CatalogSnapshot":
+        return cls(body=body, etag='"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+class CatalogCache:
+    """Serialized snapshots of the public catalog, grouped by invalidation scope.
+
+    A scope is a cafe id (its menu and categories) or one of the global scopes
+    above. Every invalidation bumps the scope's version; a snapshot loaded
+    while an invalidation happened is not stored, so a slow reader can never
+    put pre-write data back into the cache.
+
+    Cafe ids come straight from the URL, so at most ``maxsize`` snapshots are
+    kept and the least recently used one is evicted first.
+    """
+
+    def __init__(self, maxsize: int, pubsub: Optional[PubSubBackend] = None):
+        self.maxsize = maxsize
+        self.snapshots: "OrderedDict[Hashable, CatalogSnapshot]" = OrderedDict()
+        self.scope_keys: Dict[str, Set[Hashable]] = {}
+        self.versions: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.pubsub = pubsub or create_pubsub_backend(settings.CATALOG_PUBSUB_CHANNEL)
+        self.pubsub.bind(self._on_invalidation)
+
+    async def start(self):
+        await self.pubsub.start()
+
+    async def stop(self):
+        await self.pubsub.stop()
+
+    def version(self, scope: str) -> int:
+        with self.lock:
+            return self.versions.get(scope, 0)
+
+    def get_or_load(self, scope: str, key: Hashable, loader: Callable[[], bytes]) -> CatalogSnapshot:
+        with self.lock:
+            snapshot = self.snapshots.get((scope, key))
+            version = self.versions.get(scope, 0)
+            if snapshot is not None:
+                self.snapshots.move_to_end((scope, key))
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+
+        snapshot = CatalogSnapshot.from_body(loader())
+
+        with self.lock:
+            if self.versions.get(scope, 0) == version:
+                self.snapshots[(scope, key)] = snapshot
+                self.scope_keys.setdefault(scope, set()).add((scope, key))
+                while len(self.snapshots) > self.maxsize:
+                    evicted, _ = self.snapshots.popitem(last=False)
+                    self._forget(evicted)
+        return snapshot
+
+    def _forget(self, key: Hashable):
+        keys = self.scope_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.scope_keys[key[0]]
+
+    def _drop(self, scope: str):
+        with self.lock:
+            self.versions[scope] = self.versions.get(scope, 0) + 1
+            for key in self.scope_keys.pop(scope, ()):
+                self.snapshots.pop(key, None)
+
+    def invalidate(self, *scopes: str):
+        """Drop scopes here and in every other worker. Call after the write commits."""
+        for scope in scopes:
+            self._drop(scope)
+        try:
+            self.pubsub.publish_sync(json.dumps(scopes))
+        except Exception:
+            # Other workers fall back to stale data until their next invalidation
+            logger.exception("Failed to publish catalog invalidation for %s", scopes)
+
+    def _on_invalidation(self, envelope: str):
+        for scope in json.loads(envelope):
+            self._drop(scope)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "snapshots": len(self.snapshots),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+catalog_cache = CatalogCache(settings.CATALOG_CACHE_SIZE)
@@ -0,0 +1,53 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# A cafe belongs to a public category when one of its available menu items
+# mentions the category name in its name or description. Wildcards in the
+# name are escaped, like public.search_params does for the search fallback.
+CATEGORY_PATTERN = r"""'%' || replace(replace(replace(pc.name, '\', '\\'), '%', '\%'), '_', '\_') || '%'"""
+
+MATCHES = rf"""
+    m.available = TRUE
+    AND (m.name ILIKE {CATEGORY_PATTERN} ESCAPE '\'
+         OR m.description ILIKE {CATEGORY_PATTERN} ESCAPE '\')
+"""
+
+
+def refresh_cafe(db: Session, cafe_id: str):
+    """Recompute which public categories a cafe belongs to after its menu changed.
+
+    Runs inside the caller's transaction, so the mapping commits with the menu write.
+    """
+    db.execute(text("DELETE FROM public_category_cafe WHERE cafe_id = :cafe_id"),
+               {"cafe_id": cafe_id})
+    db.execute(text(f"""
+        INSERT INTO public_category_cafe (public_category_id, cafe_id)
+        SELECT DISTINCT pc.id, m.cafe_id
+        FROM public_category pc
+        JOIN menu_item m ON m.cafe_id = :cafe_id AND {MATCHES}
+    """), {"cafe_id": cafe_id})
+
+
+def refresh_public_category(db: Session, public_category_id: str):
+    """Recompute the cafes of one public category after it was created or renamed."""
+    db.execute(text("DELETE FROM public_category_cafe WHERE public_category_id = :id"),
+               {"id": public_category_id})
+    db.execute(text(f"""
+        INSERT INTO public_category_cafe (public_category_id, cafe_id)
+        SELECT DISTINCT pc.id, m.cafe_id
+        FROM public_category pc
+        JOIN menu_item m ON {MATCHES}
+        WHERE pc.id = :id
+    """), {"id": public_category_id})
+
+
+def rebuild(db: Session) -> int:
+    """Recompute the whole mapping, e.g. for backfills. Returns the number of rows."""
+    db.execute(text("DELETE FROM public_category_cafe"))
+    result = db.execute(text(f"""
+        INSERT INTO public_category_cafe (public_category_id, cafe_id)
+        SELECT DISTINCT pc.id, m.cafe_id
+        FROM public_category pc
+        JOIN menu_item m ON {MATCHES}
+    """))
+    return result.rowcount
@@ -0,0 +1,150 @@
+"""Idempotency-Key support for endpoints that create resources.
+
+A client that sends ``Idempotency-Key: <unique value>`` may retry the same
+request safely. The key is claimed with an INSERT inside the transaction
+that does the work, and the response is stored in that transaction too:
+
+* a retry after the first request committed gets the stored response back,
+  with no validation, inserts or broadcasts re-run;
+* a retry racing the first request blocks on the unique key until the first
+  one commits (then replays) or rolls back (then runs normally);
+* a request that fails leaves no key behind, so it can be retried.
+
+Keys are scoped per account and live for settings.IDEMPOTENCY_KEY_TTL
+seconds; a background task deletes expired rows.
+"""
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENT_REPLAY_HEADER = "Idempotent-Replayed"
+
+# An expired row that the collector has not reached yet is taken over
+_CLAIM_KEY = text("""
+    INSERT INTO idempotency_key (account_id, key, request_hash, created_at, expires_at)
+    VALUES (:account_id, :key, :request_hash, now(), now() + make_interval(secs => :ttl))
+    ON CONFLICT (account_id, key) DO UPDATE
+    SET request_hash = EXCLUDED.request_hash,
+        status_code = NULL,
+        response_body = NULL,
+        created_at = EXCLUDED.created_at,
+        expires_at = EXCLUDED.expires_at
+    WHERE idempotency_key.expires_at <= now()
+    RETURNING key
+""")
+
+_STORED_RESPONSE = text("""
+    SELECT request_hash, status_code, response_body
+    FROM idempotency_key
+    WHERE account_id = :account_id AND key = :key
+""")
+
+_SAVE_RESPONSE = text("""
+    UPDATE idempotency_key
+    SET status_code = :status_code, response_body = :response_body
+    WHERE account_id = :account_id AND key = :key
+""")
+
+# SKIP LOCKED lets several workers collect at once without waiting on each other
+_DELETE_EXPIRED = text("""
+    DELETE FROM idempotency_key
+    WHERE (account_id, key) IN (
+        SELECT account_id, key FROM idempotency_key
+        WHERE expires_at <= now()
+        LIMIT :batch
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+
+def request_fingerprint(payload: BaseModel) -> str:
+    return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+
+async def claim(db: AsyncSession, account_id: str, key: str, request_hash: str) -> Optional[Response]:
+    """Claim ``key`` for this request, or return the stored response of an earlier one.
+
+    Must run before the transaction that does the work writes anything.
+    """
+    params = {"account_id": account_id, "key": key}
+    claimed = (await db.execute(_CLAIM_KEY, {**params, "request_hash": request_hash,
+                                             "ttl": settings.IDEMPOTENCY_KEY_TTL})).fetchone()
+    if claimed:
+        return None
+
+    stored = (await db.execute(_STORED_RESPONSE, params)).mappings().fetchone()
+    await db.rollback()
+
+    if stored["request_hash"] != request_hash:
+        raise HTTPException(status_code=422,
+                            detail=f"{IDEMPOTENCY_KEY_HEADER} was already used with a different request")
+    if stored["response_body"] is None:
+        raise HTTPException(status_code=409,
+                            detail=f"A request with this {IDEMPOTENCY_KEY_HEADER} is still being processed")
+
+    return Response(content=stored["response_body"], status_code=stored["status_code"],
+                    media_type="application/json", headers={IDEMPOTENT_REPLAY_HEADER: "true"})
+
+
+async def save(db: AsyncSession, account_id: str, key: str, response: BaseModel, status_code: int = 200):
+    """Store the response for replays; call before the transaction commits."""
+    await db.execute(_SAVE_RESPONSE, {
+        "account_id": account_id,
+        "key": key,
+        "status_code": status_code,
+        "response_body": response.model_dump_json(),
+    })
+
+
+class ExpiredKeyCollector:
+    """Deletes expired idempotency keys in small batches every IDEMPOTENCY_GC_INTERVAL seconds."""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def collect(self) -> int:
+        deleted = 0
+        async with AsyncSessionLocal() as db:
+            while True:
+                result = await db.execute(_DELETE_EXPIRED, {"batch": settings.IDEMPOTENCY_GC_BATCH_SIZE})
+                await db.commit()
+                deleted += result.rowcount
+                if result.rowcount < settings.IDEMPOTENCY_GC_BATCH_SIZE:
+                    return deleted
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.IDEMPOTENCY_GC_INTERVAL)
+            try:
+                deleted = await self.collect()
+                if deleted:
+                    logger.info("Deleted %d expired idempotency keys", deleted)
+            except Exception:
+                logger.exception("Idempotency key collection failed")
+
+
+expired_key_collector = ExpiredKeyCollector()
@@ -0,0 +1,168 @@
+"""Releases scheduled pre-orders to the kitchen shortly before pickup.
+
+An order whose items carry a ``scheduled_time`` is stored with the earliest
+of them in ``order.scheduled_time`` and ``released_at`` left NULL. Instead of
+broadcasting ``new_order`` when it is placed, it waits in a heap keyed on its
+release time (scheduled_time minus SCHEDULED_ORDER_LEAD_MINUTES) and is
+broadcast to the cafe's channel when that time comes.
+
+The database is the source of truth: every process reloads unreleased orders
+due within SCHEDULED_ORDER_HORIZON_MINUTES on startup and every
+SCHEDULED_ORDER_RELOAD_SECONDS, so restarts lose nothing and orders placed on
+other workers are picked up too. Setting ``released_at`` with
+``WHERE released_at IS NULL`` decides which process broadcasts an order.
+"""
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.core.admission import ACTIVE_STATUSES, order_admission
+from app.database import AsyncSessionLocal
+from app.websockets.connection_manager import manager
+
+logger = logging.getLogger(__name__)
+
+_DUE_ORDERS = text("""
+    SELECT id, scheduled_time FROM "order"
+    WHERE released_at IS NULL
+      AND scheduled_time <= now() + make_interval(mins => :minutes)
+      AND status <> 'cancelled'
+""")
+
+_RELEASE_ORDERS = text("""
+    WITH released AS (
+        UPDATE "order"
+        SET released_at = now()
+        WHERE id = ANY(:order_ids) AND released_at IS NULL AND status <> 'cancelled'
+        RETURNING id, account_id, cafe_id, note, status, total_price, created_at, scheduled_time
+    )
+    SELECT r.id, r.cafe_id, r.note, r.status, r.total_price, r.created_at, r.scheduled_time,
+           u.name AS customer_name,
+           (SELECT COUNT(*) FROM order_item oi WHERE oi.order_id = r.id) AS items_count
+    FROM released r
+    JOIN users u ON u.id = r.account_id
+""")
+
+
+def release_lead() -> timedelta:
+    return timedelta(minutes=settings.SCHEDULED_ORDER_LEAD_MINUTES)
+
+
+def new_order_message(order_id: int, customer_name: str, total_price: float, status: str,
+                      items_count: int, note: Optional[str], created_at, scheduled_time) -> dict:
+    """The ``new_order`` event the kitchen receives when an order is released."""
+    return {
+        "type": "new_order",
+        "order_id": order_id,
+        "customer_name": customer_name,
+        "total_price": total_price,
+        "status": status,
+        "items_count": items_count,
+        "note": note,
+        "created_at": str(created_at),
+        "scheduled_time": scheduled_time.isoformat() if scheduled_time is not None else None,
+    }
+
+
+class OrderScheduler:
+    def __init__(self):
+        # (release timestamp, order id); an order is queued at most once
+        self.heap: List[Tuple[float, int]] = []
+        self.queued: Dict[int, float] = {}
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.released = 0
+
+    async def start(self):
+        try:
+            await self.reload()
+        except Exception:
+            logger.exception("Could not load scheduled orders; retrying on the next reload")
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def schedule(self, order_id: int, scheduled_time: datetime):
+        if order_id in self.queued:
+            return
+        release_at = (scheduled_time - release_lead()).timestamp()
+        self.queued[order_id] = release_at
+        heapq.heappush(self.heap, (release_at, order_id))
+        if self.heap[0][1] == order_id:
+            self.wakeup.set()
+
+    async def reload(self):
+        async with AsyncSessionLocal() as db:
+            minutes = settings.SCHEDULED_ORDER_LEAD_MINUTES + settings.SCHEDULED_ORDER_HORIZON_MINUTES
+            rows = (await db.execute(_DUE_ORDERS, {"minutes": minutes})).fetchall()
+        for order_id, scheduled_time in rows:
+            self.schedule(order_id, scheduled_time)
+
+    async def release(self, order_ids: List[int]):
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(_RELEASE_ORDERS, {"order_ids": order_ids})).mappings().fetchall()
+            await db.commit()
+
+        for row in rows:
+            self.released += 1
+            # Staff may have moved the order on (e.g. straight to ready) before release
+            if row["status"] in ACTIVE_STATUSES:
+                order_admission.order_created(row["cafe_id"])
+            await manager.broadcast_to_cafe(row["cafe_id"], new_order_message(
+                row["id"], row["customer_name"], row["total_price"], row["status"],
+                row["items_count"], row["note"], row["created_at"], row["scheduled_time"]))
+
+    def _pop_due(self, now: float) -> List[int]:
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            _, order_id = heapq.heappop(self.heap)
+            self.queued.pop(order_id, None)
+            due.append(order_id)
+        return due
+
+    async def _run(self):
+        next_reload = time.monotonic() + settings.SCHEDULED_ORDER_RELOAD_SECONDS
+        while True:
+            due = self._pop_due(time.time())
+            if due:
+                try:
+                    await self.release(due)
+                except Exception:
+                    # Still unreleased in the database, so the next reload queues them again
+                    logger.exception("Failed to release %d scheduled orders", len(due))
+
+            if time.monotonic() >= next_reload:
+                next_reload = time.monotonic() + settings.SCHEDULED_ORDER_RELOAD_SECONDS
+                try:
+                    await self.reload()
+                except Exception:
+                    logger.exception("Failed to reload scheduled orders")
+                continue
+
+            timeout = next_reload - time.monotonic()
+            if self.heap:
+                timeout = min(timeout, self.heap[0][0] - time.time())
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=max(0.0, timeout))
+            except asyncio.TimeoutError:
+                pass
+
+    def pending(self) -> int:
+        return len(self.queued)
+
+
+order_scheduler = OrderScheduler()
@@ -0,0 +1,52 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at: datetime, row_id) -> str:
+    """Pack a (created_at, id) keyset position into an opaque URL-safe token."""
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(rows, limit: int, response: Response, created_at_key: str = "created_at") -> list:
+    """Trim a LIMIT n+1 result to n rows and expose the next cursor as a header."""
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last[created_at_key], last["id"])
+    return rows
+
+
+def keyset_conditions(params: dict, alias: str, cursor: Optional[str],
+                      since: Optional[datetime], until: Optional[datetime]) -> list[str]:
+    """Build the WHERE fragments for a created_at DESC, id DESC keyset page."""
+    conditions = []
+    if since is not None:
+        conditions.append(f"{alias}.created_at >= :since")
+        params["since"] = since
+    if until is not None:
+        conditions.append(f"{alias}.created_at < :until")
+        params["until"] = until
+    if cursor:
+        params["cursor_created_at"], params["cursor_id"] = decode_cursor(cursor)
+        conditions.append(f"({alias}.created_at, {alias}.id) < (:cursor_created_at, :cursor_id)")
+    return conditions
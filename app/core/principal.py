@@ -0,0 +1,141 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.core.pubsub import PubSubBackend, create_pubsub_backend
+
+logger = logging.getLogger(__name__)
+
+# One round trip resolves the user plus everything the routers check permissions against
+PRINCIPAL_QUERY = text("""
+    SELECT u.id, u.name, u.email, u.role,
+           (SELECT cop.id FROM cafe_owner_profile cop
+            WHERE cop.user_id = u.id LIMIT 1) AS owner_profile_id,
+           ARRAY(SELECT cw.cafe_id FROM cafe_worker cw
+                 WHERE cw.user_id = u.id) AS worker_cafe_ids
+    FROM users u
+    WHERE u.id = :id
+""")
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as seen by the routers.
+
+    Supports both ``principal["id"]`` and ``principal.id`` so existing handlers keep working.
+    """
+    id: str
+    name: str
+    email: str
+    role: str
+    owner_profile_id: Optional[str]
+    worker_cafe_ids: FrozenSet[str]
+
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+
+    @classmethod
+    def from_row(cls, row) -> "Principal":
+        return cls(
+            id=row["id"],
+            name=row["name"],
+            email=row["email"],
+            role=row["role"],
+            owner_profile_id=row["owner_profile_id"],
+            worker_cafe_ids=frozenset(row["worker_cafe_ids"] or ()),
+        )
+
+
+class PrincipalCache:
+    """Bounded LRU cache of principals keyed on user id, with a per-entry TTL.
+
+    get_current_user runs in the threadpool, so access is guarded by a lock.
+    Invalidations are published so every worker drops the user, not just
+    the one that handled the change. Like CatalogCache, each invalidation
+    bumps the user's version; a principal loaded while one happened is not
+    stored, so a slow request can never put revoked access back.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, pubsub: Optional[PubSubBackend] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, tuple[float, Principal]]" = OrderedDict()
+        self.versions: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.pubsub = pubsub or create_pubsub_backend(settings.PRINCIPAL_PUBSUB_CHANNEL)
+        self.pubsub.bind(self._on_invalidation)
+
+    async def start(self):
+        await self.pubsub.start()
+
+    async def stop(self):
+        await self.pubsub.stop()
+
+    def version(self, user_id: str) -> int:
+        """Read before loading the principal and pass to set()."""
+        with self.lock:
+            return self.versions.get(user_id, 0)
+
+    def get(self, user_id: str) -> Optional[Principal]:
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.entries[user_id]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, principal: Principal, version: int):
+        with self.lock:
+            if self.versions.get(principal.id, 0) != version:
+                return
+            self.entries[principal.id] = (time.monotonic() + self.ttl, principal)
+            self.entries.move_to_end(principal.id)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def _drop(self, user_id: str):
+        with self.lock:
+            self.versions[user_id] = self.versions.get(user_id, 0) + 1
+            self.entries.pop(user_id, None)
+
+    def invalidate(self, user_id: str):
+        """Drop a user here and in every other worker after a change to their role,
+        owner profile or cafe assignments. Call after the write commits."""
+        self._drop(user_id)
+        try:
+            self.pubsub.publish_sync(json.dumps(user_id))
+        except Exception:
+            # Other workers fall back to the TTL for this user
+            logger.exception("Failed to publish principal invalidation for %s", user_id)
+
+    def _on_invalidation(self, envelope: str):
+        self._drop(json.loads(envelope))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+principal_cache = PrincipalCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[str], None]
+
+
+class PubSubBackend:
+    """Carries serialized messages between worker processes.
+
+    Every process publishes to and receives from the same channel; the bound
+    handler acts on the message locally (e.g. delivers to connected sockets).
+    """
+
+    def __init__(self):
+        self.handler: Optional[MessageHandler] = None
+
+    def bind(self, handler: MessageHandler):
+        self.handler = handler
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, envelope: str):
+        raise NotImplementedError
+
+    def publish_sync(self, envelope: str):
+        """Publish from synchronous code running in the threadpool."""
+        raise NotImplementedError
+
+
+class InMemoryPubSub(PubSubBackend):
+    """Single-process backend: publishing delivers straight to this process."""
+
+    async def publish(self, envelope: str):
+        self.publish_sync(envelope)
+
+    def publish_sync(self, envelope: str):
+        if self.handler is not None:
+            self.handler(envelope)
+
+
+class PostgresPubSub(PubSubBackend):
+    """LISTEN/NOTIFY on a dedicated asyncpg connection outside the SQLAlchemy pool."""
+
+    RECONNECT_DELAY = 1.0
+
+    def __init__(self, dsn: str, channel: str):
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self.connection = None
+        self.lock = asyncio.Lock()
+        self.closing = False
+
+    async def start(self):
+        self.closing = False
+        await self._connect()
+
+    async def _connect(self):
+        import asyncpg
+
+        self.connection = await asyncpg.connect(self.dsn)
+        self.connection.add_termination_listener(self._on_terminated)
+        await self.connection.add_listener(self.channel, self._on_notify)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        if self.handler is not None:
+            self.handler(payload)
+
+    def _on_terminated(self, connection):
+        if not self.closing:
+            logger.warning("Lost LISTEN connection on %s, reconnecting", self.channel)
+            asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        while not self.closing:
+            try:
+                async with self.lock:
+                    await self._connect()
+                return
+            except Exception:
+                logger.exception("Reconnecting LISTEN connection failed")
+                await asyncio.sleep(self.RECONNECT_DELAY)
+
+    async def stop(self):
+        self.closing = True
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
+
+    async def publish(self, envelope: str):
+        if self.connection is None:
+            # Not started (e.g. a script without the app lifespan): stay in-process
+            if self.handler is not None:
+                self.handler(envelope)
+            return
+
+        # A single asyncpg connection runs one statement at a time
+        async with self.lock:
+            await self.connection.execute("SELECT pg_notify($1, $2)", self.channel, envelope)
+
+    def publish_sync(self, envelope: str):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT pg_notify(:channel, :payload)"),
+                               {"channel": self.channel, "payload": envelope})
+            connection.commit()
+
+
+def create_pubsub_backend(channel: str, name: str = settings.PUBSUB_BACKEND) -> PubSubBackend:
+    if name == "memory":
+        return InMemoryPubSub()
+    if name == "postgres":
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql")
+        return PostgresPubSub(dsn.render_as_string(hide_password=False), channel)
+    raise ValueError(f"Unknown WebSocket pub/sub backend: {name}")
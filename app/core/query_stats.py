@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from app.config import settings
+from app.core.slow_query_log import slow_query_log
+
+logger = logging.getLogger(__name__)
+
+DB_STATEMENTS_HEADER = "X-DB-Statements"
+DB_TIME_HEADER = "X-DB-Time-ms"
+RESPONSE_TIME_HEADER = "X-Response-Time-ms"
+DB_REPEATED_HEADER = "X-DB-Repeated-Statements"
+DEBUG_HEADERS = [DB_STATEMENTS_HEADER, DB_TIME_HEADER, RESPONSE_TIME_HEADER, DB_REPEATED_HEADER]
+
+
+@dataclass
+class RequestStats:
+    """SQL work done while serving one request."""
+    statements: int = 0
+    db_time: float = 0.0
+    # Statement text is already parameterized, so identical text means identical shape
+    shapes: Counter = field(default_factory=Counter)
+    scope: Optional[dict] = None
+
+    @property
+    def route(self) -> str:
+        # Route templates keep keys bounded; unknown paths share one key
+        route = self.scope.get("route") if self.scope is not None else None
+        return f"{self.scope['method']} {route.path}" if route is not None else "unmatched"
+
+    def record(self, statement: str, duration: float):
+        self.statements += 1
+        self.db_time += duration
+        self.shapes[statement] += 1
+
+    def repeated(self) -> Dict[str, int]:
+        """Statement shapes run often enough in one request to look like an N+1 loop."""
+        return {shape: count for shape, count in self.shapes.items()
+                if count >= settings.N_PLUS_ONE_THRESHOLD}
+
+
+# Set by the middleware; sync routes see it too because the threadpool copies the context
+current_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is None:
+        return
+    duration = time.perf_counter() - context._query_started
+    stats = current_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    if slow_query_log.should_record(duration):
+        slow_query_log.record(conn, statement, parameters, duration,
+                              stats.route if stats is not None else None)
+
+
+def instrument(engine):
+    """Attach the statement counters to a sync Engine (use ``async_engine.sync_engine`` for async)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryMetrics:
+    """Per-route totals across requests, keyed on the route template."""
+
+    def __init__(self):
+        self.routes: Dict[str, Dict[str, float]] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, route: str, stats: RequestStats, total_time: float, n_plus_one: bool):
+        with self.lock:
+            entry = self.routes.setdefault(route, {
+                "requests": 0,
+                "statements": 0,
+                "db_time": 0.0,
+                "total_time": 0.0,
+                "max_statements": 0,
+                "n_plus_one": 0,
+            })
+            entry["requests"] += 1
+            entry["statements"] += stats.statements
+            entry["db_time"] += stats.db_time
+            entry["total_time"] += total_time
+            entry["max_statements"] = max(entry["max_statements"], stats.statements)
+            entry["n_plus_one"] += int(n_plus_one)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self.lock:
+            return {route: dict(entry) for route, entry in self.routes.items()}
+
+
+query_metrics = QueryMetrics()
+
+
+class QueryStatsMiddleware:
+    """Counts SQL statements, DB time and total time per HTTP request.
+
+    Always feeds ``query_metrics`` and logs suspected N+1 loops; with
+    settings.DEBUG the figures are also returned as response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope=scope)
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = MutableHeaders(scope=message)
+                headers[DB_STATEMENTS_HEADER] = str(stats.statements)
+                headers[DB_TIME_HEADER] = f"{stats.db_time * 1000:.1f}"
+                headers[RESPONSE_TIME_HEADER] = f"{(time.perf_counter() - started) * 1000:.1f}"
+                repeated = stats.repeated()
+                if repeated:
+                    headers[DB_REPEATED_HEADER] = str(max(repeated.values()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_stats.reset(token)
+            route_key = stats.route
+
+            repeated = stats.repeated()
+            if repeated:
+                shape, count = max(repeated.items(), key=lambda item: item[1])
+                logger.warning("Possible N+1 on %s: %d statements, one shape ran %d times: %s",
+                               route_key, stats.statements, count, " ".join(shape.split())[:200])
+
+            query_metrics.observe(route_key, stats, time.perf_counter() - started, bool(repeated))
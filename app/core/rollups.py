@@ -0,0 +1,157 @@
+"""Statistics kept in step with the order and feedback tables.
+
+Daily per-cafe rollups feed the dashboards and, summed over an owner's
+cafes, the owner summary.
+
+Every statement here runs inside the transaction of the write it accounts
+for, so the rollups commit or roll back together with it. Orders are
+bucketed by the day they were placed and by their current status; a status
+change moves the order from one bucket to the other. Dashboards sum these
+rows instead of scanning orders and feedback.
+
+The statements are plain ``text()`` so they work with both sync and async
+sessions.
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Statuses that count towards revenue
+REVENUE_STATUSES = ("completed", "ready", "preparing")
+
+_UPSERT_ORDER_STATS = """
+    ON CONFLICT (cafe_id, day, status) DO UPDATE
+    SET orders = cafe_daily_order_stats.orders + EXCLUDED.orders,
+        revenue = cafe_daily_order_stats.revenue + EXCLUDED.revenue
+"""
+
+_UPSERT_CAFE_STATS = """
+    ON CONFLICT (cafe_id, day) DO UPDATE
+    SET new_customers = cafe_daily_stats.new_customers + EXCLUDED.new_customers,
+        rating_sum = cafe_daily_stats.rating_sum + EXCLUDED.rating_sum,
+        rating_count = cafe_daily_stats.rating_count + EXCLUDED.rating_count
+"""
+
+# Params: order_id. Run after the order row is inserted.
+RECORD_ORDER = text(f"""
+    INSERT INTO cafe_daily_order_stats (cafe_id, day, status, orders, revenue)
+    SELECT cafe_id, CAST(created_at AS DATE), status, 1, total_price
+    FROM "order"
+    WHERE id = :order_id
+    {_UPSERT_ORDER_STATS}
+""")
+
+# Params: order_id. Counts the customer if this is their first order at the cafe;
+# the cafe_customer key decides, so two concurrent first orders count once.
+RECORD_NEW_CUSTOMER = text(f"""
+    WITH new_customer AS (
+        INSERT INTO cafe_customer (cafe_id, account_id)
+        SELECT cafe_id, account_id
+        FROM "order"
+        WHERE id = :order_id
+        ON CONFLICT DO NOTHING
+        RETURNING cafe_id
+    )
+    INSERT INTO cafe_daily_stats (cafe_id, day, new_customers, rating_sum, rating_count)
+    SELECT o.cafe_id, CAST(o.created_at AS DATE), 1, 0, 0
+    FROM "order" o
+    JOIN new_customer nc ON nc.cafe_id = o.cafe_id
+    WHERE o.id = :order_id
+    {_UPSERT_CAFE_STATS}
+""")
+
+# Params: order_id, old_status. Run after the status update, only if it changed;
+# the caller must have read old_status with SELECT ... FOR UPDATE.
+# Rows are upserted in status order, so two opposite moves on the same cafe and
+# day lock the pair in the same order and cannot deadlock.
+MOVE_ORDER_STATUS = text(f"""
+    INSERT INTO cafe_daily_order_stats (cafe_id, day, status, orders, revenue)
+    SELECT o.cafe_id, CAST(o.created_at AS DATE), moves.status, moves.delta, moves.delta * o.total_price
+    FROM "order" o
+    CROSS JOIN LATERAL (VALUES (CAST(:old_status AS VARCHAR), -1), (o.status, 1)) AS moves(status, delta)
+    WHERE o.id = :order_id
+    ORDER BY moves.status
+    {_UPSERT_ORDER_STATS}
+""")
+
+# Params: feedback_id, delta (1 when the feedback is created, -1 before it is deleted).
+RECORD_FEEDBACK = text(f"""
+    INSERT INTO cafe_daily_stats (cafe_id, day, new_customers, rating_sum, rating_count)
+    SELECT cafe_id, CAST(created_at AS DATE), 0, :delta * rating, :delta
+    FROM feedback
+    WHERE id = :feedback_id
+    {_UPSERT_CAFE_STATS}
+""")
+
+
+# Params: order_id. Adds the customer to the owner's cafe_owner_customer set.
+# Only the (owner, customer) key is touched, so orders for one owner's cafes
+# don't queue on a shared counter row.
+RECORD_OWNER_CUSTOMER = text("""
+    INSERT INTO cafe_owner_customer (owner_profile_id, account_id)
+    SELECT c.owner_id, o.account_id
+    FROM "order" o
+    JOIN cafe c ON c.id = o.cafe_id
+    WHERE o.id = :order_id AND c.owner_id IS NOT NULL
+    ON CONFLICT DO NOTHING
+""")
+
+# Params: owner_id. Owner totals summed from the per-cafe rollups when read;
+# revenue counts completed orders.
+OWNER_SUMMARY = text("""
+    SELECT cop.id,
+           COALESCE((SELECT SUM(s.orders) FROM cafe_daily_order_stats s
+                     JOIN cafe c ON c.id = s.cafe_id
+                     WHERE c.owner_id = cop.id), 0) AS total_orders,
+           (SELECT COUNT(*) FROM cafe_owner_customer coc
+            WHERE coc.owner_profile_id = cop.id) AS total_customers,
+           COALESCE((SELECT SUM(s.revenue) FROM cafe_daily_order_stats s
+                     JOIN cafe c ON c.id = s.cafe_id
+                     WHERE c.owner_id = cop.id AND s.status = 'completed'), 0) AS total_revenue
+    FROM cafe_owner_profile cop
+    WHERE cop.id = :owner_id
+""")
+
+
+CAFE_CUSTOMERS_BACKFILL = """
+    INSERT INTO cafe_customer (cafe_id, account_id)
+    SELECT DISTINCT cafe_id, account_id
+    FROM "order"
+"""
+
+OWNER_CUSTOMERS_BACKFILL = """
+    INSERT INTO cafe_owner_customer (owner_profile_id, account_id)
+    SELECT DISTINCT c.owner_id, o.account_id
+    FROM "order" o
+    JOIN cafe c ON c.id = o.cafe_id
+    WHERE c.owner_id IS NOT NULL
+"""
+
+def rebuild(db: Session):
+    """Recompute every rollup row and customer set from the order and feedback tables."""
+    db.execute(text("DELETE FROM cafe_daily_order_stats"))
+    db.execute(text("DELETE FROM cafe_daily_stats"))
+    db.execute(text("""
+        INSERT INTO cafe_daily_order_stats (cafe_id, day, status, orders, revenue)
+        SELECT cafe_id, CAST(created_at AS DATE), status, COUNT(*), SUM(total_price)
+        FROM "order"
+        GROUP BY cafe_id, CAST(created_at AS DATE), status
+    """))
+    db.execute(text("""
+        INSERT INTO cafe_daily_stats (cafe_id, day, new_customers, rating_sum, rating_count)
+        SELECT cafe_id, day, SUM(new_customers), SUM(rating_sum), SUM(rating_count)
+        FROM (
+            SELECT cafe_id, CAST(MIN(created_at) AS DATE) AS day,
+                   1 AS new_customers, 0 AS rating_sum, 0 AS rating_count
+            FROM "order"
+            GROUP BY cafe_id, account_id
+            UNION ALL
+            SELECT cafe_id, CAST(created_at AS DATE), 0, rating, 1
+            FROM feedback
+            WHERE cafe_id IS NOT NULL
+        ) AS daily
+        GROUP BY cafe_id, day
+    """))
+    db.execute(text("DELETE FROM cafe_customer"))
+    db.execute(text(CAFE_CUSTOMERS_BACKFILL))
+    db.execute(text("DELETE FROM cafe_owner_customer"))
+    db.execute(text(OWNER_CUSTOMERS_BACKFILL))
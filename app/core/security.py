@@ -1,6 +1,11 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 from typing import Optional
 
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 from ..config import settings
@@ -16,6 +21,76 @@ def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
 
+class PasswordPool:
+    """Runs bcrypt in worker processes so it neither blocks the event loop nor the threadpool.
+
+    At most ``queue_limit`` operations may be in flight; beyond that callers get a 503
+    with Retry-After rather than queueing behind a login storm.
+    """
+
+    def __init__(self, workers: int, queue_limit: int, retry_after: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.retry_after = retry_after
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            # spawn: forking a process that already runs an event loop and threads is unsafe
+            self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        return self.executor
+
+    async def run(self, func, *args):
+        if self.pending >= self.queue_limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+
+        self.pending += 1
+        try:
+            try:
+                return await self._submit(func, *args)
+            except BrokenProcessPool:
+                # One retry on a fresh pool; bcrypt calls are safe to repeat
+                return await self._submit(func, *args)
+        finally:
+            self.pending -= 1
+
+    async def _submit(self, func, *args):
+        executor = self._get_executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed) and the executor refuses all further work
+            if self.executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+            raise
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+password_pool = PasswordPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_LIMIT,
+                             settings.PASSWORD_HASH_RETRY_AFTER)
+
+
+async def hash_password_async(password: str) -> str:
+    return await password_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await password_pool.run(verify_password, plain, hashed)
+
+
 def create_access_token(data: dict, expires_in: int = 60 * 24) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=expires_in)
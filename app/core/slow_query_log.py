@@ -0,0 +1,133 @@
+"""JSON-lines log of statements slower than settings.SLOW_QUERY_MS.
+
+Each entry holds the normalized statement, the route being served, the
+duration and the shape (types, list lengths) of the parameters - never their
+values. A sampled fraction of slow SELECTs is re-run under
+``EXPLAIN (ANALYZE, BUFFERS)`` and the plan is stored with the entry.
+Summarize the file with ``python slow_query_report.py``.
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+_WRITE_KEYWORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|INTO)\b", re.IGNORECASE)
+# Functions whose effects survive the savepoint rollback or reach other sessions
+# (sequences, NOTIFY, advisory locks, settings, large objects, backend control)
+_VOLATILE_FUNCTIONS = re.compile(
+    r"\b(nextval|setval|pg_notify|pg_advisory\w*|pg_try_advisory\w*|set_config|lo_\w+|"
+    r"dblink\w*|pg_sleep\w*|pg_cancel_backend|pg_terminate_backend|pg_reload_conf|"
+    r"pg_rotate_logfile|txid_current|pg_current_xact_id)\s*\(",
+    re.IGNORECASE)
+# Row locks would be held while the plan is collected
+_LOCKING_CLAUSE = re.compile(r"\bFOR\s+(UPDATE|NO\s+KEY\s+UPDATE|SHARE|KEY\s+SHARE)\b", re.IGNORECASE)
+
+EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+
+def normalize(statement: str) -> str:
+    """Collapse whitespace and replace inline literals so equal shapes group together."""
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def parameter_shape(parameters):
+    def shape(value):
+        if isinstance(value, (list, tuple)):
+            return f"{type(value).__name__}[{len(value)}]"
+        return type(value).__name__
+
+    if isinstance(parameters, dict):
+        return {key: shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [shape(value) for value in parameters]
+    return shape(parameters)
+
+
+def is_explainable(statement: str) -> bool:
+    # EXPLAIN ANALYZE executes the statement, so never re-run anything that writes,
+    # locks or has side effects outside the transaction
+    head = statement.lstrip().upper()
+    return (head.startswith(("SELECT", "WITH"))
+            and not _WRITE_KEYWORDS.search(statement)
+            and not _VOLATILE_FUNCTIONS.search(statement)
+            and not _LOCKING_CLAUSE.search(statement))
+
+
+class SlowQueryLog:
+    def __init__(self):
+        self._logger: Optional[logging.Logger] = None
+        self.lock = threading.Lock()
+
+    def _get_logger(self) -> logging.Logger:
+        # Opened on the first slow statement, so processes that never see one create no file
+        if self._logger is None:
+            with self.lock:
+                if self._logger is None:
+                    path = Path(settings.SLOW_QUERY_LOG_PATH)
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    handler = RotatingFileHandler(path, maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+                                                  backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+                                                  encoding="utf-8")
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    file_logger = logging.getLogger("canteen.slow_queries")
+                    file_logger.setLevel(logging.INFO)
+                    file_logger.propagate = False
+                    file_logger.addHandler(handler)
+                    self._logger = file_logger
+        return self._logger
+
+    def should_record(self, duration: float) -> bool:
+        return settings.SLOW_QUERY_MS > 0 and duration * 1000 >= settings.SLOW_QUERY_MS
+
+    def record(self, conn, statement: str, parameters, duration: float, route: Optional[str]):
+        entry = {
+            "ts": time.time(),
+            "route": route,
+            "duration_ms": round(duration * 1000, 2),
+            "statement": normalize(statement),
+            "params": parameter_shape(parameters),
+        }
+        if random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE and is_explainable(statement):
+            entry["plan"] = self._explain(conn, statement, parameters)
+        try:
+            self._get_logger().info(json.dumps(entry, default=str))
+        except Exception:
+            logger.exception("Failed to write slow query log entry")
+
+    @staticmethod
+    def _explain(conn, statement: str, parameters):
+        """Run EXPLAIN ANALYZE on the same connection, inside a savepoint so a failure
+        cannot abort the request's transaction."""
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            try:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters)
+                plan = cursor.fetchone()[0]
+                cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+                return json.loads(plan) if isinstance(plan, str) else plan
+            except Exception as e:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+                return {"error": str(e)}
+        except Exception as e:
+            logger.warning("Could not EXPLAIN slow query: %s", e)
+            return {"error": str(e)}
+        finally:
+            cursor.close()
+
+
+slow_query_log = SlowQueryLog()
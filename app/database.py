@@ -1,10 +1,15 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from .config import settings
+from .core.query_stats import instrument
+from .core.metrics import TimedAsyncQueuePool, TimedQueuePool
 
 # PostgreSQL engine with connection pooling
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=TimedQueuePool,  # Records checkout wait time for /metrics
     pool_pre_ping=True,      # Verify connections before using
     pool_size=10,            # Connection pool size
     max_overflow=20,         # Max overflow connections
@@ -14,6 +19,24 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async engine (asyncpg) for async def routes and WebSocket handlers,
+# so their queries don't block the event loop
+async_engine = create_async_engine(
+    make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg"),
+    poolclass=TimedAsyncQueuePool,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20,
+    echo=False
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession,
+                                       autoflush=False, expire_on_commit=False)
+
+# Per-request statement counts and DB time (see app.core.query_stats)
+instrument(engine)
+instrument(async_engine.sync_engine)
+
 
 def get_db():
     db = SessionLocal()
@@ -21,3 +44,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
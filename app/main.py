@@ -1,11 +1,21 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.encoders import jsonable_encoder
 from pathlib import Path
-from app.routers import auth, cafe, order, public, worker, worker_request, upload, feedback, admin
+from app.routers import auth, cafe, order, public, worker, worker_request, upload, feedback, admin, metrics
 from app.websockets import routes as ws_routes
+from app.websockets.connection_manager import manager
+from app.core.security import password_pool
+from app.core.catalog_cache import catalog_cache
+from app.core.principal import principal_cache
+from app.core.idempotency import IDEMPOTENT_REPLAY_HEADER, expired_key_collector
+from app.core.order_scheduler import order_scheduler
 from app.database import Base, engine
+from app.core.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from app.core.query_stats import DEBUG_HEADERS, QueryStatsMiddleware
+from app.core.metrics import MetricsMiddleware
 from app import models
 from datetime import datetime
 from pydantic import BaseModel
@@ -17,7 +27,24 @@ class CustomJSONResponse:
             return obj.isoformat()
         raise TypeError
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await manager.start()
+    await catalog_cache.start()
+    await principal_cache.start()
+    await expired_key_collector.start()
+    await order_scheduler.start()
+    yield
+    await order_scheduler.stop()
+    await expired_key_collector.stop()
+    await principal_cache.stop()
+    await catalog_cache.stop()
+    await manager.stop()
+    password_pool.shutdown()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Canteen Management API",
     description="API for managing canteen orders, cafes, and users",
     version="1.0.0",
@@ -26,12 +53,16 @@ app = FastAPI(
     }
 )
 
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://localhost:3001", "http://16.16.65.190:3000", "*"], 
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, IDEMPOTENT_REPLAY_HEADER, *DEBUG_HEADERS],
 )
 
 # Create uploads directory if it doesn't exist
@@ -52,3 +83,4 @@ app.include_router(upload.router)
 app.include_router(feedback.router)
 app.include_router(admin.router)
 app.include_router(ws_routes.router)
+app.include_router(metrics.router)
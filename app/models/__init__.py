@@ -1,16 +1,21 @@
 from app.models.user import User, UserRole
-from app.models.cafe_owner import CafeOwnerProfile
-from app.models.cafe import Cafe, Category, MenuItem, Inventory
+from app.models.cafe_owner import CafeOwnerProfile, CafeOwnerCustomer
+from app.models.cafe import Cafe, Category, PublicCategory, PublicCategoryCafe, MenuItem, Inventory
 from app.models.cafe_worker import CafeWorker
 from app.models.order import Order, OrderItem, StatusTypes
 from app.models.feedback import Feedback
+from app.models.stats import CafeDailyOrderStats, CafeDailyStats, CafeCustomer
+from app.models.idempotency import IdempotencyKey
 
 __all__ = [
     'User',
     'UserRole',
     'CafeOwnerProfile',
+    'CafeOwnerCustomer',
     'Cafe',
     'Category',
+    'PublicCategory',
+    'PublicCategoryCafe',
     'MenuItem',
     'Inventory',
     'CafeWorker',
@@ -18,5 +23,9 @@ __all__ = [
     'OrderItem',
     'StatusTypes',
     'Feedback',
+    'CafeDailyOrderStats',
+    'CafeDailyStats',
+    'CafeCustomer',
+    'IdempotencyKey',
 ]
 
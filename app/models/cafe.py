@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from sqlalchemy import (
     Column, String, DateTime, ForeignKey,
-    Integer, Float, Boolean
+    Integer, Float, Boolean, Index
 )
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -15,7 +15,7 @@ class Cafe(Base):
     name = Column(String, nullable=False)
     location = Column(String, nullable=False)
     image = Column(String, nullable=True)
-    owner_id = Column(String, ForeignKey("cafe_owner_profile.id", ondelete="CASCADE"))
+    owner_id = Column(String, ForeignKey("cafe_owner_profile.id", ondelete="CASCADE"), index=True)
 
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
@@ -41,8 +41,25 @@ class PublicCategory(Base):
     name = Column(String, nullable=False)
     image = Column(String, nullable=True)
 
+
+class PublicCategoryCafe(Base):
+    """Which cafes list items in a public category, maintained by app.core.category_cafes."""
+    __tablename__ = "public_category_cafe"
+
+    public_category_id = Column(String(36), ForeignKey("public_category.id", ondelete="CASCADE"),
+                                primary_key=True)
+    cafe_id = Column(String(36), ForeignKey("cafe.id", ondelete="CASCADE"), primary_key=True,
+                     index=True)
+
+
 class MenuItem(Base):
     __tablename__ = "menu_item"
+    __table_args__ = (
+        Index("ix_menu_item_cafe_id_available", "cafe_id", "available"),
+        Index("ix_menu_item_category_id_available", "category_id", "available"),
+        # GIN trigram indexes on name and description need the pg_trgm
+        # extension, so they are created only by the search indexes migration
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     cafe_id = Column(String(36), ForeignKey("cafe.id", ondelete="CASCADE"))
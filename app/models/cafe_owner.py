@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, String, DateTime, ForeignKey
 from app.database import Base
 from app.models.user import User
 
@@ -9,10 +9,15 @@ from app.models.user import User
 class CafeOwnerProfile(Base):
     __tablename__ = 'cafe_owner_profile'
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, ForeignKey('users.id'))
-    total_orders = Column(String, default='0')
-    total_customers = Column(String, default='0')
-    total_revenue = Column(String, default='0')
+    user_id = Column(String, ForeignKey('users.id'), index=True)
 
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class CafeOwnerCustomer(Base):
+    """Distinct customers per owner; counted for the owner summary (app.core.rollups.OWNER_SUMMARY)."""
+    __tablename__ = 'cafe_owner_customer'
+    owner_profile_id = Column(String, ForeignKey('cafe_owner_profile.id', ondelete='CASCADE'),
+                              primary_key=True)
+    account_id = Column(String, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
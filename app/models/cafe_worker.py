@@ -1,12 +1,15 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 
 class CafeWorker(Base):
     __tablename__ = 'cafe_worker'
+    __table_args__ = (
+        Index('ix_cafe_worker_user_id_cafe_id', 'user_id', 'cafe_id'),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
@@ -1,14 +1,17 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey, Float, Integer, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Float, Integer, Text, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class Feedback(Base):
     __tablename__ = "feedback"
+    __table_args__ = (
+        Index("ix_feedback_cafe_id_created_at", "cafe_id", "created_at"),
+    )
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     student_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"))
-    order_id = Column(Integer, ForeignKey("order.id", ondelete="CASCADE"))
+    order_id = Column(Integer, ForeignKey("order.id", ondelete="CASCADE"), index=True)
     comment = Column(Text, nullable=False)
     rating = Column(Float, default=1)
     cafe_id = Column(String(36), ForeignKey("cafe.id", ondelete="CASCADE"))
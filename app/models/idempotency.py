@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text, Index
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """Stored response of a request sent with an Idempotency-Key; see app.core.idempotency."""
+    __tablename__ = 'idempotency_key'
+    __table_args__ = (
+        Index('ix_idempotency_key_expires_at', 'expires_at'),
+    )
+
+    account_id = Column(String, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
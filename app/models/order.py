@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Float, Boolean
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Float, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -16,6 +16,16 @@ class StatusTypes(str, Enum):
 
 class Order(Base):
     __tablename__ = 'order'
+    __table_args__ = (
+        Index('ix_order_account_id_created_at', 'account_id', 'created_at', 'id'),
+        Index('ix_order_cafe_id_created_at', 'cafe_id', 'created_at', 'id'),
+        # Active orders per cafe, counted by order admission control
+        Index('ix_order_cafe_id_active', 'cafe_id',
+              postgresql_where=text("status IN ('pending', 'preparing')")),
+        # Scheduled orders still waiting to be sent to the kitchen
+        Index('ix_order_scheduled_time', 'scheduled_time',
+              postgresql_where=text("released_at IS NULL")),
+    )
     id = Column(Integer, primary_key=True)
     account_id = Column(String, ForeignKey('users.id'), nullable=False)
     cafe_id = Column(String(36), ForeignKey('cafe.id'), nullable=False)
@@ -24,6 +34,10 @@ class Order(Base):
     total_price = Column(Float, nullable=False)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    # Earliest scheduled_time of the order's items; the kitchen is notified
+    # (released_at is set) shortly before it, see app.core.order_scheduler
+    scheduled_time = Column(DateTime(timezone=True), nullable=True)
+    released_at = Column(DateTime(timezone=True), nullable=True)
 
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     feedback = relationship("Feedback", back_populates="order", uselist=False, cascade="all, delete-orphan")
@@ -32,7 +46,7 @@ class Order(Base):
 class OrderItem(Base):
     __tablename__ = 'order_item'
     id = Column(Integer, primary_key=True)
-    order_id = Column(Integer, ForeignKey('order.id', ondelete='CASCADE'), nullable=False)
+    order_id = Column(Integer, ForeignKey('order.id', ondelete='CASCADE'), nullable=False, index=True)
     menu_item_id = Column(String(36), ForeignKey('menu_item.id'), nullable=False)
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)
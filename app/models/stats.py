@@ -0,0 +1,38 @@
+from sqlalchemy import Column, String, Date, ForeignKey, Float, Integer, Index
+from app.database import Base
+
+
+class CafeDailyOrderStats(Base):
+    """Orders and revenue per cafe, order day and current status; see app.core.rollups."""
+    __tablename__ = 'cafe_daily_order_stats'
+    __table_args__ = (
+        Index('ix_cafe_daily_order_stats_day', 'day'),
+    )
+
+    cafe_id = Column(String(36), ForeignKey('cafe.id', ondelete='CASCADE'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    status = Column(String, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+
+class CafeDailyStats(Base):
+    """First-time customers and feedback ratings per cafe and day; see app.core.rollups."""
+    __tablename__ = 'cafe_daily_stats'
+    __table_args__ = (
+        Index('ix_cafe_daily_stats_day', 'day'),
+    )
+
+    cafe_id = Column(String(36), ForeignKey('cafe.id', ondelete='CASCADE'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    new_customers = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+
+
+class CafeCustomer(Base):
+    """Distinct customers per cafe; a new row here is what bumps new_customers."""
+    __tablename__ = 'cafe_customer'
+
+    cafe_id = Column(String(36), ForeignKey('cafe.id', ondelete='CASCADE'), primary_key=True)
+    account_id = Column(String, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
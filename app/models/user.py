@@ -18,7 +18,7 @@ class User(Base):
     __tablename__ = 'users'
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, nullable=False)
-    email = Column(String, nullable=False)
+    email = Column(String, nullable=False, index=True)
     password_hash = Column(String, nullable=False)
     role = Column(String, default=UserRole.student.value)
 
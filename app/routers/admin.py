@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, and_, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func, and_, asc, desc, select
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal, Optional
 from app.database import get_db
 from app.routers.auth import get_current_user
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, TOTAL_COUNT_HEADER
 from app.models.user import User
 from app.models.cafe import Cafe
+from app.models.cafe_owner import CafeOwnerProfile
 from app.models.order import Order, OrderItem
 from app.models.feedback import Feedback
+from app.models.stats import CafeDailyOrderStats, CafeDailyStats
+from app.core import rollups
 from app.models.cafe import MenuItem
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -21,45 +25,41 @@ def verify_admin(current_user: User = Depends(get_current_user)):
 
 
 @router.get("/stats")
-async def get_admin_stats(
+def get_admin_stats(
     db: Session = Depends(get_db),
     current_user: User = Depends(verify_admin)
 ):
     
     total_cafes = db.query(func.count(Cafe.id)).scalar()
     total_users = db.query(func.count(User.id)).scalar()
-    total_orders = db.query(func.count(Order.id)).scalar()
-    total_feedbacks = db.query(func.count(Feedback.id)).scalar()
-    
-    total_revenue = db.query(func.sum(Order.total_price)).filter(
-        Order.status.in_(["completed", "ready", "preparing"])
-    ).scalar() or 0
     
     now = datetime.utcnow()
     thirty_days_ago = now - timedelta(days=30)
     sixty_days_ago = now - timedelta(days=60)
     
-    recent_orders = db.query(func.count(Order.id)).filter(
-        Order.created_at >= thirty_days_ago
-    ).scalar()
-    previous_orders = db.query(func.count(Order.id)).filter(
-        and_(Order.created_at >= sixty_days_ago, Order.created_at < thirty_days_ago)
-    ).scalar()
+    # Order, revenue and rating figures come from the daily rollups (app.core.rollups)
+    is_revenue = CafeDailyOrderStats.status.in_(rollups.REVENUE_STATUSES)
+    is_recent = CafeDailyOrderStats.day >= thirty_days_ago.date()
+    is_previous = and_(CafeDailyOrderStats.day >= sixty_days_ago.date(),
+                       CafeDailyOrderStats.day < thirty_days_ago.date())
+    
+    orders = db.query(
+        func.coalesce(func.sum(CafeDailyOrderStats.orders), 0).label("total_orders"),
+        func.coalesce(func.sum(CafeDailyOrderStats.revenue).filter(is_revenue), 0).label("total_revenue"),
+        func.coalesce(func.sum(CafeDailyOrderStats.orders).filter(is_recent), 0).label("recent_orders"),
+        func.coalesce(func.sum(CafeDailyOrderStats.orders).filter(is_previous), 0).label("previous_orders"),
+        func.coalesce(func.sum(CafeDailyOrderStats.revenue).filter(and_(is_recent, is_revenue)), 0).label("recent_revenue"),
+        func.coalesce(func.sum(CafeDailyOrderStats.revenue).filter(and_(is_previous, is_revenue)), 0).label("previous_revenue"),
+    ).one()
+    
+    total_orders = orders.total_orders
+    total_revenue = orders.total_revenue
+    recent_orders = orders.recent_orders
+    previous_orders = orders.previous_orders
     orders_growth = ((recent_orders - previous_orders) / previous_orders * 100) if previous_orders > 0 else 0
     
-    recent_revenue = db.query(func.sum(Order.total_price)).filter(
-        and_(
-            Order.created_at >= thirty_days_ago,
-            Order.status.in_(["completed", "ready", "preparing"])
-        )
-    ).scalar() or 0
-    previous_revenue = db.query(func.sum(Order.total_price)).filter(
-        and_(
-            Order.created_at >= sixty_days_ago,
-            Order.created_at < thirty_days_ago,
-            Order.status.in_(["completed", "ready", "preparing"])
-        )
-    ).scalar() or 0
+    recent_revenue = orders.recent_revenue
+    previous_revenue = orders.previous_revenue
     revenue_growth = ((recent_revenue - previous_revenue) / previous_revenue * 100) if previous_revenue > 0 else 0
     
     recent_users = db.query(func.count(User.id)).filter(
@@ -70,7 +70,12 @@ async def get_admin_stats(
     ).scalar()
     users_growth = ((recent_users - previous_users) / previous_users * 100) if previous_users > 0 else 0
     
-    avg_rating = db.query(func.avg(Feedback.rating)).scalar() or 0
+    ratings = db.query(
+        func.coalesce(func.sum(CafeDailyStats.rating_sum), 0).label("rating_sum"),
+        func.coalesce(func.sum(CafeDailyStats.rating_count), 0).label("rating_count"),
+    ).one()
+    total_feedbacks = ratings.rating_count
+    avg_rating = (ratings.rating_sum / ratings.rating_count) if ratings.rating_count > 0 else 0
     
     return {
         "total_cafes": total_cafes,
@@ -93,51 +98,44 @@ async def get_admin_stats(
 
 
 @router.get("/cafes")
-async def get_admin_cafes(
+def get_admin_cafes(
     db: Session = Depends(get_db),
     current_user: User = Depends(verify_admin)
 ):
+    # Three queries regardless of the number of cafes: cafes with owners, then
+    # per-cafe order and feedback totals from the daily rollups, joined in memory
+    cafes = db.query(Cafe, User).outerjoin(
+        CafeOwnerProfile, Cafe.owner_id == CafeOwnerProfile.id
+    ).outerjoin(
+        User, CafeOwnerProfile.user_id == User.id
+    ).all()
+    
+    today = datetime.utcnow().date()
+    is_revenue = CafeDailyOrderStats.status.in_(rollups.REVENUE_STATUSES)
+    is_today = CafeDailyOrderStats.day == today
+    
+    order_stats = {
+        row.cafe_id: row for row in db.query(
+            CafeDailyOrderStats.cafe_id,
+            func.sum(CafeDailyOrderStats.orders).label("total_orders"),
+            func.sum(CafeDailyOrderStats.revenue).filter(is_revenue).label("total_revenue"),
+            func.coalesce(func.sum(CafeDailyOrderStats.orders).filter(is_today), 0).label("today_orders"),
+            func.sum(CafeDailyOrderStats.revenue).filter(and_(is_today, is_revenue)).label("today_revenue"),
+        ).group_by(CafeDailyOrderStats.cafe_id).all()
+    }
     
-    cafes = db.query(Cafe).all()
+    feedback_stats = {
+        row.cafe_id: row for row in db.query(
+            CafeDailyStats.cafe_id,
+            (func.sum(CafeDailyStats.rating_sum) / func.nullif(func.sum(CafeDailyStats.rating_count), 0)).label("average_rating"),
+            func.sum(CafeDailyStats.rating_count).label("total_feedbacks"),
+        ).group_by(CafeDailyStats.cafe_id).all()
+    }
     
     result = []
-    for cafe in cafes:
-        owner = db.query(User).filter(User.id == cafe.owner_id).first()
-        
-        total_orders = db.query(func.count(Order.id)).filter(
-            Order.cafe_id == cafe.id
-        ).scalar()
-        
-        total_revenue = db.query(func.sum(Order.total_price)).filter(
-            and_(
-                Order.cafe_id == cafe.id,
-                Order.status.in_(["completed", "ready", "preparing"])
-            )
-        ).scalar() or 0
-        
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_orders = db.query(func.count(Order.id)).filter(
-            and_(
-                Order.cafe_id == cafe.id,
-                Order.created_at >= today_start
-            )
-        ).scalar()
-        
-        today_revenue = db.query(func.sum(Order.total_price)).filter(
-            and_(
-                Order.cafe_id == cafe.id,
-                Order.created_at >= today_start,
-                Order.status.in_(["completed", "ready", "preparing"])
-            )
-        ).scalar() or 0
-        
-        avg_rating = db.query(func.avg(Feedback.rating)).filter(
-            Feedback.cafe_id == cafe.id
-        ).scalar() or 0
-        
-        total_feedbacks = db.query(func.count(Feedback.id)).filter(
-            Feedback.cafe_id == cafe.id
-        ).scalar()
+    for cafe, owner in cafes:
+        orders = order_stats.get(cafe.id)
+        feedbacks = feedback_stats.get(cafe.id)
         
         result.append({
             "id": cafe.id,
@@ -151,12 +149,12 @@ async def get_admin_cafes(
                 "email": owner.email if owner else None
             },
             "statistics": {
-                "total_orders": total_orders,
-                "total_revenue": float(total_revenue),
-                "today_orders": today_orders,
-                "today_revenue": float(today_revenue),
-                "average_rating": float(avg_rating),
-                "total_feedbacks": total_feedbacks
+                "total_orders": orders.total_orders if orders else 0,
+                "total_revenue": float(orders.total_revenue or 0) if orders else 0.0,
+                "today_orders": orders.today_orders if orders else 0,
+                "today_revenue": float(orders.today_revenue or 0) if orders else 0.0,
+                "average_rating": float(feedbacks.average_rating or 0) if feedbacks else 0.0,
+                "total_feedbacks": feedbacks.total_feedbacks if feedbacks else 0
             },
             "created_at": cafe.created_at.isoformat() if cafe.created_at else None
         })
@@ -165,46 +163,96 @@ async def get_admin_cafes(
 
 
 @router.get("/users")
-async def get_admin_users(
+def get_admin_users(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    sort: Literal["created_at", "name", "total_orders", "total_spent", "total_feedbacks", "cafes_owned"] = "created_at",
+    order: Literal["asc", "desc"] = "desc",
+    role: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(verify_admin)
 ):
+    # Per-user statistics come from grouped subqueries outer-joined onto the
+    # page, so the endpoint runs two statements (page + total) for any size
+    direction = desc if order == "desc" else asc
+    
+    users = db.query(User)
+    if role is not None:
+        users = users.filter(User.role == role)
+    response.headers[TOTAL_COUNT_HEADER] = str(users.count())
+    
+    # Sorting by a user column fixes the page up front, so the statistics
+    # only need grouping for the users on it
+    page_ids = None
+    if sort in ("created_at", "name"):
+        page_ids = users.with_entities(User.id).order_by(
+            direction(getattr(User, sort)).nulls_last(), User.id
+        ).limit(limit).offset(offset).statement
+    
+    order_stats = db.query(
+        Order.account_id.label("user_id"),
+        func.count(Order.id).label("total_orders"),
+        func.sum(Order.total_price).filter(
+            Order.status.in_(rollups.REVENUE_STATUSES)
+        ).label("total_spent"),
+    )
+    feedback_stats = db.query(
+        Feedback.student_id.label("user_id"),
+        func.count(Feedback.id).label("total_feedbacks"),
+    )
+    cafe_stats = db.query(
+        CafeOwnerProfile.user_id.label("user_id"),
+        func.count(Cafe.id).label("cafes_owned"),
+    ).join(Cafe, Cafe.owner_id == CafeOwnerProfile.id)
+    if page_ids is not None:
+        order_stats = order_stats.filter(Order.account_id.in_(page_ids))
+        feedback_stats = feedback_stats.filter(Feedback.student_id.in_(page_ids))
+        cafe_stats = cafe_stats.filter(CafeOwnerProfile.user_id.in_(page_ids))
+    order_stats = order_stats.group_by(Order.account_id).subquery()
+    feedback_stats = feedback_stats.group_by(Feedback.student_id).subquery()
+    cafe_stats = cafe_stats.group_by(CafeOwnerProfile.user_id).subquery()
     
-    users = db.query(User).all()
+    total_orders = func.coalesce(order_stats.c.total_orders, 0).label("total_orders")
+    total_spent = func.coalesce(order_stats.c.total_spent, 0).label("total_spent")
+    total_feedbacks = func.coalesce(feedback_stats.c.total_feedbacks, 0).label("total_feedbacks")
+    cafes_owned = func.coalesce(cafe_stats.c.cafes_owned, 0).label("cafes_owned")
+    
+    sort_columns = {
+        "created_at": User.created_at,
+        "name": User.name,
+        "total_orders": total_orders,
+        "total_spent": total_spent,
+        "total_feedbacks": total_feedbacks,
+        "cafes_owned": cafes_owned,
+    }
+    
+    rows = users.add_columns(
+        total_orders, total_spent, total_feedbacks, cafes_owned
+    ).outerjoin(
+        order_stats, order_stats.c.user_id == User.id
+    ).outerjoin(
+        feedback_stats, feedback_stats.c.user_id == User.id
+    ).outerjoin(
+        cafe_stats, cafe_stats.c.user_id == User.id
+    ).order_by(
+        direction(sort_columns[sort]).nulls_last(), User.id
+    ).limit(limit).offset(offset).all()
     
     result = []
-    for user in users:
+    for user, user_orders, user_spent, user_feedbacks, user_cafes in rows:
         stats = {}
         
         if user.role == "student":
-            total_orders = db.query(func.count(Order.id)).filter(
-                Order.account_id == user.id
-            ).scalar()
-            
-            total_spent = db.query(func.sum(Order.total_price)).filter(
-                and_(
-                    Order.account_id == user.id,
-                    Order.status.in_(["completed", "ready", "preparing"])
-                )
-            ).scalar() or 0
-            
-            total_feedbacks = db.query(func.count(Feedback.id)).filter(
-                Feedback.student_id == user.id
-            ).scalar()
-            
             stats = {
-                "total_orders": total_orders,
-                "total_spent": float(total_spent),
-                "total_feedbacks": total_feedbacks
+                "total_orders": user_orders,
+                "total_spent": float(user_spent),
+                "total_feedbacks": user_feedbacks
             }
             
         elif user.role == "cafe_owner":
-            cafes_count = db.query(func.count(Cafe.id)).filter(
-                Cafe.owner_id == user.id
-            ).scalar()
-            
             stats = {
-                "cafes_owned": cafes_count
+                "cafes_owned": user_cafes
             }
         
         result.append({
@@ -220,7 +268,7 @@ async def get_admin_users(
 
 
 @router.get("/recent-activity")
-async def get_recent_activity(
+def get_recent_activity(
     db: Session = Depends(get_db),
     current_user: User = Depends(verify_admin)
 ):
@@ -1,29 +1,39 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.user import User, UserRole
 from app.models.cafe_owner import CafeOwnerProfile
 from app.schemas.user_schema import UserCreate, UserLogin, UserResponse, TokenResponse
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import hash_password_async, verify_password_async, create_access_token
+from app.core.principal import PRINCIPAL_QUERY, Principal, principal_cache
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def user_by_email(email: str):
+    return select(User).where(User.email == email)
+
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    return (await db.execute(user_by_email(email))).scalars().first()
+
+
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == user.email).first()
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = await get_user_by_email(db, user.email)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
 
-    hashed_password = hash_password(user.password)
+    hashed_password = await hash_password_async(user.password)
     new_user = User(
         name=user.name,
         email=user.email,
@@ -32,32 +42,27 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     if user.role.value == "cafe_owner":
-        owner_profile = CafeOwnerProfile(
-            user_id=new_user.id,
-            total_orders='0',
-            total_customers='0',
-            total_revenue='0'
-        )
+        owner_profile = CafeOwnerProfile(user_id=new_user.id)
         db.add(owner_profile)
-        db.commit()
+        await db.commit()
     
     return new_user
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(login: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == login.email).first()
+async def login(login: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await get_user_by_email(db, login.email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
         )
 
-    if not verify_password(login.password, user.password_hash):
+    if not await verify_password_async(login.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -72,12 +77,12 @@ def login(login: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.post("/token", response_model=TokenResponse)
-def login_for_swagger(
+async def login_for_swagger(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """OAuth2 compatible token login for Swagger UI authorization"""
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await get_user_by_email(db, form_data.username)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -85,7 +90,7 @@ def login_for_swagger(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not verify_password(form_data.password, user.password_hash):
+    if not await verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -115,20 +120,24 @@ def get_current_user(
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
 
-        result = db.execute(
-            text('SELECT id, name, email, role FROM users WHERE id = :id'),
-            {"id": user_id}
-        ).mappings().fetchone()
+        principal = principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+
+        version = principal_cache.version(user_id)
+        result = db.execute(PRINCIPAL_QUERY, {"id": user_id}).mappings().fetchone()
 
         if result is None:
             raise HTTPException(status_code=404, detail="User not found")
 
-        return result  # <-- dict-like, Pydantic-friendly
+        principal = Principal.from_row(result)
+        principal_cache.set(principal, version)
+        return principal
 
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
 @router.get("/me", response_model=UserResponse)
-def read_current_user(current_user: User = Depends(get_current_user)):
+def read_current_user(current_user: Principal = Depends(get_current_user)):
     return current_user
@@ -1,16 +1,21 @@
+from datetime import date, timedelta
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from app.schemas.cafe_schema import (
     CafeResponseSchema, CafeCreateSchema, CafeUpdateSchema,
     CafeCategoryCreateSchema, CafeCategoryResponseSchema,
     CafeMenuItemCreateSchema, CafeMenuItemUpdateSchema, CafeMenuItemResponseSchema,
     CafeInventoryCreateSchema, CafeInventoryUpdateSchema, CafeInventoryResponseSchema,
-    PublicCategoryResponseSchema, PublicCategoryCreateSchema, PublicCategoryUpdateSchema
+    PublicCategoryResponseSchema, PublicCategoryCreateSchema, PublicCategoryUpdateSchema,
+    CafeDailyStatsResponseSchema
 )
+from app.schemas.cafe_owner_schema import CafeOwnerSummaryResponse
 from app.routers.auth import get_current_user
 from uuid import uuid4
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.core.catalog_cache import ALL_CAFES, catalog_cache
+from app.core import category_cafes, rollups
 from sqlalchemy import text
 
 router = APIRouter(
@@ -19,19 +24,16 @@ router = APIRouter(
 )
 
 
-def get_owner_profile_id(current_user: dict, db: Session) -> str:
-    owner_profile = db.execute(
-        text("SELECT id FROM cafe_owner_profile WHERE user_id = :user_id"),
-        {"user_id": current_user["id"]}
-    ).fetchone()
+def get_owner_profile_id(current_user: dict) -> str:
+    owner_profile_id = current_user["owner_profile_id"]
     
-    if not owner_profile:
+    if not owner_profile_id:
         raise HTTPException(
             status_code=403,
             detail="Only cafe owners can perform this action"
         )
     
-    return owner_profile[0]
+    return owner_profile_id
 
 
 def format_image_url(image_path: str | None) -> str | None:
@@ -56,18 +58,16 @@ def format_menu_item_response(row):
 
 @router.post("/", response_model=CafeResponseSchema)
 def create_cafe(cafe: CafeCreateSchema, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    owner_profile = db.execute(text("""
-        SELECT id FROM cafe_owner_profile WHERE user_id = :user_id
-    """), {"user_id": current_user["id"]}).fetchone()
+    owner_profile_id = current_user["owner_profile_id"]
     
-    if not owner_profile:
+    if not owner_profile_id:
         raise HTTPException(
             status_code=403,
             detail="Only cafe owners can create cafes. Please register as a cafe owner."
         )
     
     cafe_id = str(uuid4())
-    owner_id = owner_profile[0]  
+    owner_id = owner_profile_id  
     
     db.execute(text("""
                     INSERT INTO cafe (id, name, location, image, owner_id, rating, created_at, updated_at)
@@ -87,17 +87,16 @@ def create_cafe(cafe: CafeCreateSchema, db: Session = Depends(get_db), current_u
                              """), {"id": cafe_id}).mappings().fetchone()
 
     db.commit()
+    catalog_cache.invalidate(ALL_CAFES)
 
     return format_cafe_response(result)
 
 
 @router.get("/", response_model=list[CafeResponseSchema])
 def get_cafes(db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    owner_profile = db.execute(text("""
-        SELECT id FROM cafe_owner_profile WHERE user_id = :user_id
-    """), {"user_id": current_user["id"]}).fetchone()
+    owner_profile_id = current_user["owner_profile_id"]
     
-    if not owner_profile:
+    if not owner_profile_id:
         return [] 
     
     query = text("""
@@ -113,20 +112,30 @@ def get_cafes(db: Session = Depends(get_db), current_user: dict = Depends(get_cu
                  WHERE owner_id = :owner_id;
                  """)
 
-    result = db.execute(query, {"owner_id": owner_profile[0]})
+    result = db.execute(query, {"owner_id": owner_profile_id})
 
     rows = result.mappings().fetchall()
 
     return [format_cafe_response(row) for row in rows]
 
 
+@router.get("/owner/summary", response_model=CafeOwnerSummaryResponse)
+def get_owner_summary(db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    # Summed from the daily rollups and the customer set, so this never scans orders
+    result = db.execute(rollups.OWNER_SUMMARY,
+                        {"owner_id": get_owner_profile_id(current_user)}).mappings().fetchone()
+
+    if not result:
+        raise HTTPException(status_code=404, detail="Owner profile not found")
+
+    return result
+
+
 @router.get("/{cafe_id}", response_model=CafeResponseSchema)
 def get_cafe(cafe_id: str, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    owner_profile = db.execute(text("""
-        SELECT id FROM cafe_owner_profile WHERE user_id = :user_id
-    """), {"user_id": current_user["id"]}).fetchone()
+    owner_profile_id = current_user["owner_profile_id"]
     
-    if not owner_profile:
+    if not owner_profile_id:
         raise HTTPException(status_code=404, detail="Cafe not found")
     
     query = text("""
@@ -143,7 +152,7 @@ def get_cafe(cafe_id: str, db: Session = Depends(get_db), current_user: dict = D
                    AND owner_id = :owner_id;
                  """)
 
-    result = db.execute(query, {"cafe_id": cafe_id, "owner_id": owner_profile[0]})
+    result = db.execute(query, {"cafe_id": cafe_id, "owner_id": owner_profile_id})
     row = result.mappings().fetchone()
 
     if not row:
@@ -155,15 +164,13 @@ def get_cafe(cafe_id: str, db: Session = Depends(get_db), current_user: dict = D
 @router.put("/{cafe_id}", response_model=CafeResponseSchema)
 def update_cafe(cafe_id: str, cafe: CafeUpdateSchema, db: Session = Depends(get_db),
                 current_user: dict = Depends(get_current_user)):
-    owner_profile = db.execute(text("""
-        SELECT id FROM cafe_owner_profile WHERE user_id = :user_id
-    """), {"user_id": current_user["id"]}).fetchone()
+    owner_profile_id = current_user["owner_profile_id"]
     
-    if not owner_profile:
+    if not owner_profile_id:
         raise HTTPException(status_code=403, detail="Only cafe owners can update cafes")
     
     update_fields = []
-    params = {"cafe_id": cafe_id, "owner_id": owner_profile[0]}
+    params = {"cafe_id": cafe_id, "owner_id": owner_profile_id}
     
     if cafe.name is not None:
         update_fields.append("name = :name")
@@ -190,9 +197,10 @@ def update_cafe(cafe_id: str, cafe: CafeUpdateSchema, db: Session = Depends(get_
                              FROM cafe
                              WHERE id = :cafe_id
                                AND owner_id = :owner_id;
-                             """), {"cafe_id": cafe_id, "owner_id": get_owner_profile_id(current_user, db)}).mappings().fetchone()
+                             """), {"cafe_id": cafe_id, "owner_id": get_owner_profile_id(current_user)}).mappings().fetchone()
 
     db.commit()
+    catalog_cache.invalidate(ALL_CAFES)
 
     return format_cafe_response(result)
 
@@ -210,7 +218,7 @@ def get_cafe_categories(cafe_id: str, db: Session = Depends(get_db),
                    AND c.owner_id = :owner_id;
                  """)
 
-    result = db.execute(query, {"cafe_id": cafe_id, "owner_id": get_owner_profile_id(current_user, db)})
+    result = db.execute(query, {"cafe_id": cafe_id, "owner_id": get_owner_profile_id(current_user)})
     row = result.mappings().fetchall()
     return row if row else []
 
@@ -242,16 +250,14 @@ def get_public_categories(db: Session = Depends(get_db)):
 @router.post("/categories", response_model=CafeCategoryResponseSchema)
 def create_cafe_category(category: CafeCategoryCreateSchema, db: Session = Depends(get_db),
                          current_user: dict = Depends(get_current_user)):
-    owner_profile = db.execute(text("""
-        SELECT id FROM cafe_owner_profile WHERE user_id = :user_id
-    """), {"user_id": current_user["id"]}).fetchone()
+    owner_profile_id = current_user["owner_profile_id"]
     
-    if not owner_profile:
+    if not owner_profile_id:
         raise HTTPException(status_code=403, detail="Only cafe owners can create categories")
     
     cafe_check = db.execute(text("""
         SELECT id FROM cafe WHERE id = :cafe_id AND owner_id = :owner_id
-    """), {"cafe_id": category.cafe_id, "owner_id": owner_profile[0]}).fetchone()
+    """), {"cafe_id": category.cafe_id, "owner_id": owner_profile_id}).fetchone()
     
     if not cafe_check:
         raise HTTPException(status_code=404, detail="Cafe not found or you don't own it")
@@ -274,6 +280,7 @@ def create_cafe_category(category: CafeCategoryCreateSchema, db: Session = Depen
                              """), {"id": category_id}).mappings().fetchone()
 
     db.commit()
+    catalog_cache.invalidate(category.cafe_id)
 
     return result
 
@@ -281,17 +288,15 @@ def create_cafe_category(category: CafeCategoryCreateSchema, db: Session = Depen
 @router.post("/menu", response_model=CafeMenuItemResponseSchema)
 def create_cafe_menu_item(menu_item: CafeMenuItemCreateSchema, db: Session = Depends(get_db),
                           current_user: dict = Depends(get_current_user)):
-    owner_profile = db.execute(text("""
-        SELECT id FROM cafe_owner_profile WHERE user_id = :user_id
-    """), {"user_id": current_user["id"]}).fetchone()
+    owner_profile_id = current_user["owner_profile_id"]
     
-    if not owner_profile:
+    if not owner_profile_id:
         raise HTTPException(status_code=403, detail="Only cafe owners can create menu items")
     
     cafe_check = db.execute(text("""
                                  SELECT id FROM cafe 
                                  WHERE id = :cafe_id AND owner_id = :owner_id
-                                 """), {"cafe_id": menu_item.cafe_id, "owner_id": owner_profile[0]}).fetchone()
+                                 """), {"cafe_id": menu_item.cafe_id, "owner_id": owner_profile_id}).fetchone()
 
     if not cafe_check:
         raise HTTPException(status_code=404, detail="Cafe not found")
@@ -318,7 +323,9 @@ def create_cafe_menu_item(menu_item: CafeMenuItemCreateSchema, db: Session = Dep
                              WHERE id = :id
                              """), {"id": menu_item_id}).mappings().fetchone()
 
+    category_cafes.refresh_cafe(db, menu_item.cafe_id)
     db.commit()
+    catalog_cache.invalidate(menu_item.cafe_id)
 
     return format_menu_item_response(result)
 
@@ -335,7 +342,7 @@ def get_cafe_menu_items(cafe_id: str, db: Session = Depends(get_db),
                  WHERE m.cafe_id = :cafe_id AND c.owner_id = :owner_id
                  """)
 
-    result = db.execute(query, {"cafe_id": cafe_id, "owner_id": get_owner_profile_id(current_user, db)})
+    result = db.execute(query, {"cafe_id": cafe_id, "owner_id": get_owner_profile_id(current_user)})
     rows = result.mappings().fetchall()
 
     return [format_menu_item_response(row) for row in rows]
@@ -353,7 +360,7 @@ def get_menu_item(menu_item_id: str, db: Session = Depends(get_db),
                  WHERE m.id = :menu_item_id AND c.owner_id = :owner_id
                  """)
 
-    result = db.execute(query, {"menu_item_id": menu_item_id, "owner_id": get_owner_profile_id(current_user, db)})
+    result = db.execute(query, {"menu_item_id": menu_item_id, "owner_id": get_owner_profile_id(current_user)})
     row = result.mappings().fetchone()
 
     if not row:
@@ -366,12 +373,12 @@ def get_menu_item(menu_item_id: str, db: Session = Depends(get_db),
 def update_menu_item(menu_item_id: str, menu_item: CafeMenuItemUpdateSchema,
                      db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
     check_query = text("""
-                       SELECT m.id FROM menu_item AS m
+                       SELECT m.id, m.cafe_id FROM menu_item AS m
                        JOIN cafe AS c ON m.cafe_id = c.id
                        WHERE m.id = :menu_item_id AND c.owner_id = :owner_id
                        """)
 
-    check_result = db.execute(check_query, {"menu_item_id": menu_item_id, "owner_id": get_owner_profile_id(current_user, db)}).fetchone()
+    check_result = db.execute(check_query, {"menu_item_id": menu_item_id, "owner_id": get_owner_profile_id(current_user)}).fetchone()
 
     if not check_result:
         raise HTTPException(status_code=404, detail="Menu item not found")
@@ -409,7 +416,9 @@ def update_menu_item(menu_item_id: str, menu_item: CafeMenuItemUpdateSchema,
                              WHERE id = :menu_item_id
                              """), {"menu_item_id": menu_item_id}).mappings().fetchone()
 
+    category_cafes.refresh_cafe(db, check_result.cafe_id)
     db.commit()
+    catalog_cache.invalidate(check_result.cafe_id)
 
     return format_menu_item_response(result)
 
@@ -418,34 +427,34 @@ def update_menu_item(menu_item_id: str, menu_item: CafeMenuItemUpdateSchema,
 def delete_menu_item(menu_item_id: str, db: Session = Depends(get_db),
                      current_user: dict = Depends(get_current_user)):
     check_query = text("""
-                       SELECT m.id FROM menu_item AS m
+                       SELECT m.id, m.cafe_id FROM menu_item AS m
                        JOIN cafe AS c ON m.cafe_id = c.id
                        WHERE m.id = :menu_item_id AND c.owner_id = :owner_id
                        """)
 
-    check_result = db.execute(check_query, {"menu_item_id": menu_item_id, "owner_id": get_owner_profile_id(current_user, db)}).fetchone()
+    check_result = db.execute(check_query, {"menu_item_id": menu_item_id, "owner_id": get_owner_profile_id(current_user)}).fetchone()
 
     if not check_result:
         raise HTTPException(status_code=404, detail="Menu item not found")
 
     db.execute(text("DELETE FROM menu_item WHERE id = :menu_item_id"), {"menu_item_id": menu_item_id})
+    category_cafes.refresh_cafe(db, check_result.cafe_id)
     db.commit()
+    catalog_cache.invalidate(check_result.cafe_id)
 
 
 @router.post("/inventory", response_model=CafeInventoryResponseSchema)
 def create_inventory_item(inventory: CafeInventoryCreateSchema, db: Session = Depends(get_db),
                           current_user: dict = Depends(get_current_user)):
-    owner_profile = db.execute(text("""
-        SELECT id FROM cafe_owner_profile WHERE user_id = :user_id
-    """), {"user_id": current_user["id"]}).fetchone()
+    owner_profile_id = current_user["owner_profile_id"]
     
-    if not owner_profile:
+    if not owner_profile_id:
         raise HTTPException(status_code=403, detail="Only cafe owners can create inventory items")
     
     cafe_check = db.execute(text("""
                                  SELECT id FROM cafe 
                                  WHERE id = :cafe_id AND owner_id = :owner_id
-                                 """), {"cafe_id": inventory.cafe_id, "owner_id": owner_profile[0]}).fetchone()
+                                 """), {"cafe_id": inventory.cafe_id, "owner_id": owner_profile_id}).fetchone()
 
     if not cafe_check:
         raise HTTPException(status_code=404, detail="Cafe not found")
@@ -462,7 +471,7 @@ def create_inventory_item(inventory: CafeInventoryCreateSchema, db: Session = De
                    "quantity": inventory.quantity,
                    "kg": inventory.kg,
                    "description": inventory.description,
-                   "cafe_owner_id": owner_profile[0],  
+                   "cafe_owner_id": owner_profile_id,  
                })
 
     result = db.execute(text("""
@@ -486,7 +495,7 @@ def get_cafe_inventory(cafe_id: str, db: Session = Depends(get_db),
                  WHERE i.cafe_id = :cafe_id AND c.owner_id = :owner_id
                  """)
 
-    result = db.execute(query, {"cafe_id": cafe_id, "owner_id": get_owner_profile_id(current_user, db)})
+    result = db.execute(query, {"cafe_id": cafe_id, "owner_id": get_owner_profile_id(current_user)})
     rows = result.mappings().fetchall()
 
     return rows
@@ -501,7 +510,7 @@ def update_inventory_item(inventory_id: str, inventory: CafeInventoryUpdateSchem
                            JOIN cafe AS c ON i.cafe_id = c.id
                            WHERE i.id = :inventory_id AND c.owner_id = :owner_id
                            """)
-        check_result = db.execute(check_query, {"inventory_id": inventory_id, "owner_id": get_owner_profile_id(current_user, db)}).fetchone()
+        check_result = db.execute(check_query, {"inventory_id": inventory_id, "owner_id": get_owner_profile_id(current_user)}).fetchone()
     elif current_user["role"] == "cafe_worker":
         check_query = text("""
                            SELECT i.id FROM inventory AS i
@@ -558,10 +567,52 @@ def delete_inventory_item(inventory_id: str, db: Session = Depends(get_db),
                        WHERE i.id = :inventory_id AND c.owner_id = :owner_id
                        """)
 
-    check_result = db.execute(check_query, {"inventory_id": inventory_id, "owner_id": get_owner_profile_id(current_user, db)}).fetchone()
+    check_result = db.execute(check_query, {"inventory_id": inventory_id, "owner_id": get_owner_profile_id(current_user)}).fetchone()
 
     if not check_result:
         raise HTTPException(status_code=404, detail="Inventory item not found")
 
     db.execute(text("DELETE FROM inventory WHERE id = :inventory_id"), {"inventory_id": inventory_id})
     db.commit()
+
+
+@router.get("/{cafe_id}/stats", response_model=list[CafeDailyStatsResponseSchema])
+def get_cafe_daily_stats(cafe_id: str, days: int = Query(30, ge=1, le=366),
+                         db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    cafe_check = db.execute(text("""
+        SELECT id FROM cafe WHERE id = :cafe_id AND owner_id = :owner_id
+    """), {"cafe_id": cafe_id, "owner_id": get_owner_profile_id(current_user)}).fetchone()
+
+    if not cafe_check:
+        raise HTTPException(status_code=404, detail="Cafe not found or you don't own it")
+
+    # Reads the daily rollups, so the cost depends on the number of days, not orders
+    query = text("""
+                 WITH orders AS (
+                     SELECT day, SUM(orders) AS orders,
+                            SUM(revenue) FILTER (WHERE status = ANY(:revenue_statuses)) AS revenue
+                     FROM cafe_daily_order_stats
+                     WHERE cafe_id = :cafe_id AND day >= :since
+                     GROUP BY day
+                 ), cafe_stats AS (
+                     SELECT day, new_customers, rating_sum, rating_count
+                     FROM cafe_daily_stats
+                     WHERE cafe_id = :cafe_id AND day >= :since
+                 )
+                 SELECT COALESCE(o.day, s.day) AS day,
+                        COALESCE(o.orders, 0) AS orders,
+                        COALESCE(o.revenue, 0) AS revenue,
+                        COALESCE(s.new_customers, 0) AS new_customers,
+                        COALESCE(s.rating_count, 0) AS feedbacks,
+                        s.rating_sum / NULLIF(s.rating_count, 0) AS average_rating
+                 FROM orders o
+                 FULL OUTER JOIN cafe_stats s ON s.day = o.day
+                 ORDER BY day
+                 """)
+
+    result = db.execute(query, {
+        "cafe_id": cafe_id,
+        "since": date.today() - timedelta(days=days - 1),
+        "revenue_statuses": list(rollups.REVENUE_STATUSES),
+    })
+    return result.mappings().fetchall()
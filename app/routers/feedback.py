@@ -6,6 +6,7 @@ from uuid import uuid4
 from app.database import get_db
 from app.schemas.feedback_schema import FeedbackCreateSchema, FeedbackResponse
 from app.routers.auth import get_current_user
+from app.core import rollups
 
 router = APIRouter(prefix="/feedback", tags=["Feedback"])
 
@@ -55,6 +56,7 @@ def create_feedback(
         "cafe_id": cafe_id,
         "created_at": now,
     })
+    db.execute(rollups.RECORD_FEEDBACK, {"feedback_id": feedback_id, "delta": 1})
     
     db.commit()
     
@@ -76,22 +78,23 @@ def create_feedback(
     }
 
 
+CAFE_FEEDBACKS_QUERY = text("""
+    SELECT f.id, f.student_id, f.order_id, f.comment, f.rating, f.cafe_id, f.created_at,
+           u.name as student_name
+    FROM feedback f
+    JOIN users u ON f.student_id = u.id
+    WHERE f.cafe_id = :cafe_id
+    ORDER BY f.created_at DESC
+""")
+
+
 @router.get("/cafe/{cafe_id}", response_model=List[FeedbackResponse])
 def get_cafe_feedbacks(
     cafe_id: str,
     db: Session = Depends(get_db)
 ):
     """Get all feedbacks for a specific cafe."""
-    query = text("""
-        SELECT f.id, f.student_id, f.order_id, f.comment, f.rating, f.cafe_id, f.created_at,
-               u.name as student_name
-        FROM feedback f
-        JOIN users u ON f.student_id = u.id
-        WHERE f.cafe_id = :cafe_id
-        ORDER BY f.created_at DESC
-    """)
-    
-    result = db.execute(query, {"cafe_id": cafe_id})
+    result = db.execute(CAFE_FEEDBACKS_QUERY, {"cafe_id": cafe_id})
     rows = result.mappings().fetchall()
     
     return [dict(row) for row in rows]
@@ -174,7 +177,7 @@ def delete_feedback(
     """Delete a feedback. Only the student who created it can delete it."""
     # Check if feedback exists and belongs to current user
     feedback_check = db.execute(
-        text("SELECT student_id FROM feedback WHERE id = :id"),
+        text("SELECT student_id FROM feedback WHERE id = :id FOR UPDATE"),
         {"id": feedback_id}
     ).fetchone()
     
@@ -187,6 +190,7 @@ def delete_feedback(
             detail="You can only delete your own feedback"
         )
     
+    db.execute(rollups.RECORD_FEEDBACK, {"feedback_id": feedback_id, "delta": -1})
     db.execute(
         text("DELETE FROM feedback WHERE id = :id"),
         {"id": feedback_id}
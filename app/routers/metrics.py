@@ -0,0 +1,102 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.config import settings
+
+from app.core.admission import order_admission
+from app.core.catalog_cache import catalog_cache
+from app.core.metrics import registry
+from app.core.order_scheduler import order_scheduler
+from app.core.principal import principal_cache
+from app.core.query_stats import query_metrics
+from app.core.security import password_pool
+from app.database import async_engine, engine
+from app.websockets.connection_manager import manager
+
+router = APIRouter(tags=["Metrics"])
+
+bearer = HTTPBearer(auto_error=False)
+
+POOLS = {"sync": engine.pool, "async": async_engine.sync_engine.pool}
+
+
+def _pool_samples(read):
+    return [((name,), read(pool)) for name, pool in POOLS.items()]
+
+
+registry.gauge("db_pool_checked_out", "Connections currently checked out of the pool.",
+               lambda: _pool_samples(lambda pool: pool.checkedout()), ("pool",))
+registry.gauge("db_pool_overflow", "Connections open beyond pool_size (negative while the pool is not full).",
+               lambda: _pool_samples(lambda pool: pool.overflow()), ("pool",))
+registry.gauge("db_pool_size", "Configured pool size.",
+               lambda: _pool_samples(lambda pool: pool.size()), ("pool",))
+
+registry.counter("db_statements_total", "SQL statements run while serving each route.",
+                 lambda: [((route,), entry["statements"]) for route, entry in query_metrics.snapshot().items()],
+                 ("route",))
+registry.counter("db_time_seconds_total", "Time spent in SQL while serving each route.",
+                 lambda: [((route,), entry["db_time"]) for route, entry in query_metrics.snapshot().items()],
+                 ("route",))
+registry.counter("db_n_plus_one_requests_total", "Requests that repeated one statement shape past the N+1 threshold.",
+                 lambda: [((route,), entry["n_plus_one"]) for route, entry in query_metrics.snapshot().items()],
+                 ("route",))
+
+registry.gauge("ws_connections_total", "Open WebSocket connections.",
+               lambda: [((), len(manager.clients))])
+# Order update sockets live in per-student "user_<id>" rooms; only cafe rooms get a series
+registry.gauge("ws_cafe_connections", "Open WebSocket connections per cafe.",
+               lambda: [((room,), len(connections)) for room, connections in manager.active_connections.items()
+                        if not room.startswith("user_")],
+               ("cafe",))
+registry.gauge("ws_queue_depth", "Messages waiting in WebSocket outbound queues.",
+               lambda: [((), manager.metrics()["queue_depth_total"])])
+registry.counter("ws_messages_dropped_total", "WebSocket messages dropped for slow consumers.",
+                 lambda: [((), manager.messages_dropped)])
+registry.counter("ws_slow_disconnects_total", "WebSocket clients disconnected for falling behind.",
+                 lambda: [((), manager.slow_disconnects)])
+
+registry.gauge("password_hash_queue_depth", "Password hash operations queued or running.",
+               lambda: [((), password_pool.pending)])
+registry.counter("password_hash_rejected_total", "Password hash operations rejected with 503.",
+                 lambda: [((), password_pool.rejected)])
+
+registry.gauge("order_admission_active_orders", "Pending and preparing orders per cafe, as tracked for admission.",
+               lambda: [((cafe_id,), active) for cafe_id, active in order_admission.active_orders().items()],
+               ("cafe",))
+registry.counter("order_admission_rejected_total", "New orders rejected with 429, by the limit that was hit.",
+                 lambda: [((reason,), count) for reason, count in order_admission.rejected.items()],
+                 ("limit",))
+
+registry.gauge("scheduled_orders_pending", "Scheduled pre-orders queued in this process for release.",
+               lambda: [((), order_scheduler.pending())])
+registry.counter("scheduled_orders_released_total", "Scheduled pre-orders released to the kitchen by this process.",
+                 lambda: [((), order_scheduler.released)])
+
+
+def _cache_samples(field):
+    return [(("principal",), principal_cache.stats()[field]), (("catalog",), catalog_cache.stats()[field])]
+
+
+registry.counter("cache_hits_total", "Cache hits.", lambda: _cache_samples("hits"), ("cache",))
+registry.counter("cache_misses_total", "Cache misses.", lambda: _cache_samples("misses"), ("cache",))
+
+
+def verify_metrics_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer)):
+    # Scrapers send a static bearer token; without one configured the endpoint does not exist
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(credentials.credentials.encode(),
+                                                         settings.METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token",
+                            headers={"WWW-Authenticate": "Bearer"})
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False,
+            dependencies=[Depends(verify_metrics_token)])
+async def metrics():
+    # Runs on the event loop, so the socket maps aren't mutated while being read
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,17 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from datetime import datetime, timezone, timedelta
-from app.database import get_db
+from typing import Optional
+from app.database import get_db, get_async_db
 from app.routers.auth import get_current_user
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_conditions, paginate
+from app.core import idempotency, rollups
+from app.core.admission import order_admission
+from app.core.order_scheduler import new_order_message, order_scheduler, release_lead
 from app.schemas.order_schema import (
     OrderCreateSchema, OrderUpdateSchema, OrderResponseSchema,
     OrderDetailResponseSchema, OrderItemResponseSchema
 )
 from app.models.order import StatusTypes
+from app.websockets.connection_manager import manager
 
 UZBEKISTAN_TZ = timezone(timedelta(hours=5))
-from app.websockets.connection_manager import manager
 
 router = APIRouter(
     prefix="/orders",
@@ -19,158 +25,259 @@ router = APIRouter(
 )
 
 
+ORDER_ITEMS_QUERY = text("""
+                         SELECT oi.id, oi.order_id, oi.menu_item_id, oi.quantity, oi.price, 
+                                oi.scheduled, oi.scheduled_time, oi.created_at, oi.updated_at,
+                                m.name as menu_item_name
+                         FROM order_item oi
+                         JOIN menu_item m ON oi.menu_item_id = m.id
+                         WHERE oi.order_id = ANY(:order_ids)
+                         """)
+
+ORDER_ITEMS_UTC_QUERY = text("""
+                             SELECT oi.id, oi.order_id, oi.menu_item_id, oi.quantity, oi.price, 
+                                    oi.scheduled, oi.scheduled_time AT TIME ZONE 'Asia/Tashkent' as scheduled_time, 
+                                    oi.created_at AT TIME ZONE 'UTC' as created_at, 
+                                    oi.updated_at AT TIME ZONE 'UTC' as updated_at,
+                                    m.name as menu_item_name
+                             FROM order_item oi
+                             JOIN menu_item m ON oi.menu_item_id = m.id
+                             WHERE oi.order_id = ANY(:order_ids)
+                             """)
+
+
+# Keyset-paginated listings; {filters} takes the output of order_listing_filters
+USER_ORDERS_QUERY = """
+                    SELECT o.id, o.account_id, o.cafe_id, o.note, o.status, o.total_price, o.created_at, o.updated_at
+                    FROM "order" o
+                    WHERE o.account_id = :account_id{filters}
+                    ORDER BY o.created_at DESC, o.id DESC
+                    LIMIT :limit
+                    """
+
+ORDER_HISTORY_QUERY = """
+                      SELECT o.id, o.account_id, o.cafe_id, o.note, o.status, o.total_price, 
+                             o.created_at, o.updated_at,
+                             u.name as account_name,
+                             c.name as cafe_name
+                      FROM "order" o
+                      JOIN users u ON o.account_id = u.id
+                      JOIN cafe c ON o.cafe_id = c.id
+                      WHERE o.account_id = :account_id{filters}
+                      ORDER BY o.created_at DESC, o.id DESC
+                      LIMIT :limit
+                      """
+
+CAFE_ORDERS_QUERY = """
+                    SELECT o.id, o.account_id, o.cafe_id, o.note, o.status, o.total_price, 
+                           o.created_at AT TIME ZONE 'UTC' as created_at, 
+                           o.updated_at AT TIME ZONE 'UTC' as updated_at,
+                           o.created_at as cursor_created_at,
+                           u.name as account_name,
+                           c.name as cafe_name
+                    FROM "order" o
+                    JOIN users u ON o.account_id = u.id
+                    JOIN cafe c ON o.cafe_id = c.id
+                    WHERE o.cafe_id = :cafe_id{filters}
+                    ORDER BY o.created_at DESC, o.id DESC
+                    LIMIT :limit
+                    """
+
+
+def uzbekistan_time(value: datetime) -> datetime:
+    """Client times without an offset are local (Uzbekistan) times."""
+    return value.replace(tzinfo=UZBEKISTAN_TZ) if value.tzinfo is None else value.astimezone(UZBEKISTAN_TZ)
+
+
+def attach_order_items(db: Session, orders, items_query=ORDER_ITEMS_QUERY) -> list[dict]:
+    """Fetch the items of all given orders in one query and nest them under each order."""
+    if not orders:
+        return []
+
+    items_by_order = {order["id"]: [] for order in orders}
+    rows = db.execute(items_query, {"order_ids": list(items_by_order)}).mappings()
+    for item in rows:
+        items_by_order[item["order_id"]].append(dict(item))
+
+    return [
+        {**dict(order), "items": items_by_order[order["id"]]}
+        for order in orders
+    ]
+
+
+def order_listing_filters(params: dict, order_status: Optional[StatusTypes], cursor: Optional[str],
+                          since: Optional[datetime], until: Optional[datetime]) -> str:
+    conditions = keyset_conditions(params, "o", cursor, since, until)
+    if order_status is not None:
+        conditions.append("o.status = :status")
+        params["status"] = order_status.value
+    return "".join(f" AND {condition}" for condition in conditions)
+
+
 @router.post("/", response_model=OrderDetailResponseSchema)
-async def create_order(order: OrderCreateSchema, db: Session = Depends(get_db),
-                 current_user: dict = Depends(get_current_user)):
-    cafe_check = db.execute(text("SELECT id FROM cafe WHERE id = :cafe_id"),
-                           {"cafe_id": order.cafe_id}).fetchone()
+async def create_order(order: OrderCreateSchema, db: AsyncSession = Depends(get_async_db),
+                 current_user: dict = Depends(get_current_user),
+                 idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_KEY_HEADER,
+                                                         min_length=1, max_length=255)):
+    if idempotency_key is not None:
+        replay = await idempotency.claim(db, current_user["id"], idempotency_key,
+                                         idempotency.request_fingerprint(order))
+        if replay is not None:
+            return replay
+
+    cafe_check = (await db.execute(text("SELECT id, name FROM cafe WHERE id = :cafe_id"),
+                           {"cafe_id": order.cafe_id})).fetchone()
 
     if not cafe_check:
         raise HTTPException(status_code=404, detail="Cafe not found")
 
+    # One lookup for every line item; prices and names are reused below
+    menu_item_ids = list({item.menu_item_id for item in order.items})
+    menu_items = {
+        row["id"]: row
+        for row in (await db.execute(text("""
+                                   SELECT id, name, price, available FROM menu_item
+                                   WHERE cafe_id = :cafe_id AND id = ANY(:menu_item_ids)
+                                   """),
+                              {"cafe_id": order.cafe_id, "menu_item_ids": menu_item_ids})).mappings()
+    }
+
     total_price = 0.0
     for item in order.items:
-        menu_item = db.execute(text("""
-                                    SELECT price, available FROM menu_item 
-                                    WHERE id = :menu_item_id AND cafe_id = :cafe_id
-                                    """),
-                              {"menu_item_id": item.menu_item_id, "cafe_id": order.cafe_id}).fetchone()
+        menu_item = menu_items.get(item.menu_item_id)
 
         if not menu_item:
             raise HTTPException(status_code=404, detail=f"Menu item {item.menu_item_id} not found")
 
-        if not menu_item[1]:
+        if not menu_item["available"]:
             raise HTTPException(status_code=400, detail=f"Menu item {item.menu_item_id} is not available")
 
-        total_price += menu_item[0] * item.quantity
+        total_price += menu_item["price"] * item.quantity
 
     now_uzbekistan = datetime.now(UZBEKISTAN_TZ)
 
-    order_result = db.execute(text("""
-                                   INSERT INTO "order" (account_id, cafe_id, note, status, total_price, created_at, updated_at)
-                                   VALUES (:account_id, :cafe_id, :note, :status, :total_price, :created_at, :updated_at)
-                                   RETURNING id
-                                   """), {
-                              "account_id": current_user["id"],
-                              "cafe_id": order.cafe_id,
-                              "note": order.note,
-                              "status": StatusTypes.pending.value,
-                              "total_price": total_price,
-                              "created_at": now_uzbekistan,
-                              "updated_at": now_uzbekistan,
-                          })
-
-    order_id = order_result.fetchone()[0]
-
-    order_items = []
-    for item in order.items:
-        menu_item = db.execute(text("SELECT price FROM menu_item WHERE id = :menu_item_id"),
-                              {"menu_item_id": item.menu_item_id}).fetchone()
-
-        item_result = db.execute(text("""
-                                      INSERT INTO order_item (order_id, menu_item_id, quantity, price, scheduled, scheduled_time, created_at, updated_at)
-                                      VALUES (:order_id, :menu_item_id, :quantity, :price, :scheduled, :scheduled_time, :created_at, :updated_at)
-                                      RETURNING id, order_id, menu_item_id, quantity, price, scheduled, scheduled_time, created_at, updated_at
-                                      """), {
-                                 "order_id": order_id,
-                                 "menu_item_id": item.menu_item_id,
-                                 "quantity": item.quantity,
-                                 "price": menu_item[0],
-                                 "scheduled": item.scheduled if hasattr(item, 'scheduled') else False,
-                                 "scheduled_time": item.scheduled_time if hasattr(item, 'scheduled_time') else None,
-                                 "created_at": now_uzbekistan,
-                                 "updated_at": now_uzbekistan,
-                             }).mappings().fetchone()
-
-        order_items.append(item_result)
-
-    db.commit()
-
-    order_data = db.execute(text("""
-                                 SELECT o.id, o.account_id, o.cafe_id, o.note, o.status, o.total_price, 
-                                        o.created_at, o.updated_at,
-                                        u.name as account_name,
-                                        c.name as cafe_name
-                                 FROM "order" o
-                                 JOIN users u ON o.account_id = u.id
-                                 JOIN cafe c ON o.cafe_id = c.id
-                                 WHERE o.id = :order_id
-                                 """), {"order_id": order_id}).mappings().fetchone()
-
-    items_with_names = []
-    for item in order_items:
-        item_dict = dict(item)
-        menu_name = db.execute(text("SELECT name FROM menu_item WHERE id = :id"), 
-                              {"id": item_dict["menu_item_id"]}).fetchone()
-        item_dict["menu_item_name"] = menu_name[0] if menu_name else ""
-        items_with_names.append(item_dict)
-
-    result = {
-        **dict(order_data),
-        "items": items_with_names
-    }
-
-    await manager.broadcast_to_cafe(order.cafe_id, {
-        "type": "new_order",
-        "order_id": order_id,
-        "customer_name": current_user["name"],
-        "total_price": total_price,
-        "status": StatusTypes.pending.value,
-        "items_count": len(order.items),
-        "note": order.note,
-        "created_at": str(order_data["created_at"])
-    })
+    # Pre-orders reach the kitchen shortly before the earliest pickup time
+    scheduled_time = min((uzbekistan_time(item.scheduled_time)
+                          for item in order.items if item.scheduled and item.scheduled_time is not None),
+                         default=None)
+    release_now = scheduled_time is None or scheduled_time - release_lead() <= now_uzbekistan
+
+    # Last check before writing: replays, unknown cafes and bad items never use
+    # the cafe's capacity. An order sent to the kitchen at once holds an active slot.
+    await order_admission.admit(db, order.cafe_id, reserve=release_now)
+    placed = False
+    try:
+        order_data = (await db.execute(text("""
+                                     INSERT INTO "order" (account_id, cafe_id, note, status, total_price, created_at, updated_at,
+                                                          scheduled_time, released_at)
+                                     VALUES (:account_id, :cafe_id, :note, :status, :total_price,
+                                             CAST(:created_at AS TIMESTAMPTZ), CAST(:updated_at AS TIMESTAMPTZ),
+                                             CAST(:scheduled_time AS TIMESTAMPTZ), CAST(:released_at AS TIMESTAMPTZ))
+                                     RETURNING id, account_id, cafe_id, note, status, total_price, created_at, updated_at
+                                     """), {
+                                "account_id": current_user["id"],
+                                "cafe_id": order.cafe_id,
+                                "note": order.note,
+                                "status": StatusTypes.pending.value,
+                                "total_price": total_price,
+                                "created_at": now_uzbekistan,
+                                "updated_at": now_uzbekistan,
+                                "scheduled_time": scheduled_time,
+                                "released_at": now_uzbekistan if release_now else None,
+                            })).mappings().fetchone()
+
+        order_id = order_data["id"]
+
+        # All order_item rows go in as a single multi-row INSERT
+        values = []
+        params = {"order_id": order_id, "created_at": now_uzbekistan, "updated_at": now_uzbekistan}
+        for i, item in enumerate(order.items):
+            values.append(f"(:order_id, :menu_item_id_{i}, :quantity_{i}, :price_{i}, :scheduled_{i}, "
+                          f"CAST(:scheduled_time_{i} AS TIMESTAMP), "
+                          f"CAST(:created_at AS TIMESTAMPTZ), CAST(:updated_at AS TIMESTAMPTZ))")
+            params[f"menu_item_id_{i}"] = item.menu_item_id
+            params[f"quantity_{i}"] = item.quantity
+            params[f"price_{i}"] = menu_items[item.menu_item_id]["price"]
+            params[f"scheduled_{i}"] = item.scheduled
+            # order_item.scheduled_time has no zone; it holds Uzbekistan wall-clock time
+            params[f"scheduled_time_{i}"] = (uzbekistan_time(item.scheduled_time).replace(tzinfo=None)
+                                             if item.scheduled_time is not None else None)
+
+        order_items = []
+        if values:
+            order_items = (await db.execute(text(f"""
+                                          INSERT INTO order_item (order_id, menu_item_id, quantity, price, scheduled, scheduled_time, created_at, updated_at)
+                                          VALUES {", ".join(values)}
+                                          RETURNING id, order_id, menu_item_id, quantity, price, scheduled, scheduled_time, created_at, updated_at
+                                          """), params)).mappings().fetchall()
+
+        await db.execute(rollups.RECORD_ORDER, {"order_id": order_id})
+        await db.execute(rollups.RECORD_NEW_CUSTOMER, {"order_id": order_id})
+        await db.execute(rollups.RECORD_OWNER_CUSTOMER, {"order_id": order_id})
+
+        items_with_names = [
+            {**dict(item), "menu_item_name": menu_items[item["menu_item_id"]]["name"]}
+            for item in order_items
+        ]
+
+        result = {
+            **dict(order_data),
+            "account_name": current_user["name"],
+            "cafe_name": cafe_check[1],
+            "items": items_with_names
+        }
+
+        if idempotency_key is not None:
+            await idempotency.save(db, current_user["id"], idempotency_key,
+                                   OrderDetailResponseSchema.model_validate(result))
+        await db.commit()
+        placed = True
+    finally:
+        if not placed:
+            order_admission.cancel(order.cafe_id, reserved=release_now)
+
+    if release_now:
+        order_admission.order_created(order.cafe_id, reserved=True)
+        await manager.broadcast_to_cafe(order.cafe_id, new_order_message(
+            order_id, current_user["name"], total_price, StatusTypes.pending.value,
+            len(order.items), order.note, order_data["created_at"], scheduled_time))
+    else:
+        order_scheduler.schedule(order_id, scheduled_time)
 
     return result
 
 
 @router.get("/", response_model=list[OrderResponseSchema])
-def get_user_orders(db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    query = text("""
-                 SELECT id, account_id, cafe_id, note, status, total_price, created_at, updated_at
-                 FROM "order"
-                 WHERE account_id = :account_id
-                 ORDER BY created_at DESC
-                 """)
-
-    result = db.execute(query, {"account_id": current_user["id"]})
+def get_user_orders(response: Response,
+                    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                    cursor: Optional[str] = None,
+                    order_status: Optional[StatusTypes] = Query(None, alias="status"),
+                    since: Optional[datetime] = None,
+                    until: Optional[datetime] = None,
+                    db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    params = {"account_id": current_user["id"], "limit": limit + 1}
+    filters = order_listing_filters(params, order_status, cursor, since, until)
+    query = text(USER_ORDERS_QUERY.format(filters=filters))
+
+    result = db.execute(query, params)
     rows = result.mappings().fetchall()
 
-    return rows
+    return paginate(rows, limit, response)
 
 
 @router.get("/history", response_model=list[OrderDetailResponseSchema])
-def get_history(db: Session = Depends(get_db),
+def get_history(response: Response,
+                limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                cursor: Optional[str] = None,
+                order_status: Optional[StatusTypes] = Query(None, alias="status"),
+                since: Optional[datetime] = None,
+                until: Optional[datetime] = None,
+                db: Session = Depends(get_db),
                 current_user: dict = Depends(get_current_user)):
-    orders = db.execute(text("""
-                             SELECT o.id, o.account_id, o.cafe_id, o.note, o.status, o.total_price, 
-                                    o.created_at, o.updated_at,
-                                    u.name as account_name,
-                                    c.name as cafe_name
-                             FROM "order" o
-                             JOIN users u ON o.account_id = u.id
-                             JOIN cafe c ON o.cafe_id = c.id
-                             WHERE o.account_id = :account_id
-                             ORDER BY o.created_at DESC
-                             """), {
-                                "account_id": current_user["id"]
-                            }).mappings().fetchall()
-    result = []
-    for order in orders:
-        order_items = db.execute(text("""
-                                      SELECT oi.id, oi.order_id, oi.menu_item_id, oi.quantity, oi.price, 
-                                             oi.scheduled, oi.scheduled_time, oi.created_at, oi.updated_at,
-                                             m.name as menu_item_name
-                                      FROM order_item oi
-                                      JOIN menu_item m ON oi.menu_item_id = m.id
-                                      WHERE oi.order_id = :order_id
-                                      """), {"order_id": order["id"]}).mappings().fetchall()
-
-        result.append({
-            **dict(order),
-            "items": [dict(item) for item in order_items]
-        })
-    return result
+    params = {"account_id": current_user["id"], "limit": limit + 1}
+    filters = order_listing_filters(params, order_status, cursor, since, until)
+    orders = db.execute(text(ORDER_HISTORY_QUERY.format(filters=filters)), params).mappings().fetchall()
+    return attach_order_items(db, paginate(orders, limit, response))
 
 
 @router.get("/{order_id}", response_model=OrderDetailResponseSchema)
@@ -207,91 +314,65 @@ def get_order(order_id: int, db: Session = Depends(get_db),
 
 
 @router.get("/cafe/{cafe_id}", response_model=list[OrderDetailResponseSchema])
-def get_cafe_orders(cafe_id: str, db: Session = Depends(get_db),
+def get_cafe_orders(cafe_id: str, response: Response,
+                    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                    cursor: Optional[str] = None,
+                    order_status: Optional[StatusTypes] = Query(None, alias="status"),
+                    since: Optional[datetime] = None,
+                    until: Optional[datetime] = None,
+                    db: Session = Depends(get_db),
                     current_user: dict = Depends(get_current_user)):
     if current_user["role"] == "cafe_owner":
         # Get cafe_owner_profile.id for the current user
-        owner_profile = db.execute(text("""
-            SELECT id FROM cafe_owner_profile WHERE user_id = :user_id
-        """), {"user_id": current_user["id"]}).fetchone()
+        owner_profile_id = current_user["owner_profile_id"]
         
-        if not owner_profile:
+        if not owner_profile_id:
             raise HTTPException(status_code=403, detail="Only cafe owners can access orders")
         
         cafe_check = db.execute(text("""
                                      SELECT id FROM cafe 
                                      WHERE id = :cafe_id AND owner_id = :owner_id
-                                     """), {"cafe_id": cafe_id, "owner_id": owner_profile[0]}).fetchone()
+                                     """), {"cafe_id": cafe_id, "owner_id": owner_profile_id}).fetchone()
     elif current_user["role"] == "cafe_worker":
-        cafe_check = db.execute(text("""
-                                     SELECT c.id FROM cafe c
-                                     JOIN cafe_worker cw ON c.id = cw.cafe_id
-                                     WHERE c.id = :cafe_id AND cw.user_id = :user_id
-                                     """), {"cafe_id": cafe_id, "user_id": current_user["id"]}).fetchone()
+        cafe_check = cafe_id in current_user["worker_cafe_ids"]
     else:
         raise HTTPException(status_code=403, detail="Only cafe owners and workers can access orders")
 
     if not cafe_check:
         raise HTTPException(status_code=404, detail="Cafe not found or you don't have access")
 
-    orders = db.execute(text("""
-                             SELECT o.id, o.account_id, o.cafe_id, o.note, o.status, o.total_price, 
-                                    o.created_at AT TIME ZONE 'UTC' as created_at, 
-                                    o.updated_at AT TIME ZONE 'UTC' as updated_at,
-                                    u.name as account_name,
-                                    c.name as cafe_name
-                             FROM "order" o
-                             JOIN users u ON o.account_id = u.id
-                             JOIN cafe c ON o.cafe_id = c.id
-                             WHERE o.cafe_id = :cafe_id
-                             ORDER BY o.created_at DESC
-                             """), {"cafe_id": cafe_id}).mappings().fetchall()
-
-    result = []
-    for order in orders:
-        order_items = db.execute(text("""
-                                      SELECT oi.id, oi.order_id, oi.menu_item_id, oi.quantity, oi.price, 
-                                             oi.scheduled, oi.scheduled_time AT TIME ZONE 'UTC' as scheduled_time, 
-                                             oi.created_at AT TIME ZONE 'UTC' as created_at, 
-                                             oi.updated_at AT TIME ZONE 'UTC' as updated_at,
-                                             m.name as menu_item_name
-                                      FROM order_item oi
-                                      JOIN menu_item m ON oi.menu_item_id = m.id
-                                      WHERE oi.order_id = :order_id
-                                      """), {"order_id": order["id"]}).mappings().fetchall()
-
-        result.append({
-            **dict(order),
-            "items": [dict(item) for item in order_items]
-        })
+    params = {"cafe_id": cafe_id, "limit": limit + 1}
+    filters = order_listing_filters(params, order_status, cursor, since, until)
+    orders = db.execute(text(CAFE_ORDERS_QUERY.format(filters=filters)), params).mappings().fetchall()
 
-    return result
+    orders = paginate(orders, limit, response, created_at_key="cursor_created_at")
+    return attach_order_items(db, orders, ORDER_ITEMS_UTC_QUERY)
 
 
 @router.put("/{order_id}", response_model=OrderResponseSchema)
 async def update_order_status(order_id: int, order_update: OrderUpdateSchema,
-                        db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+                        db: AsyncSession = Depends(get_async_db), current_user: dict = Depends(get_current_user)):
     if current_user["role"] == "cafe_owner":
-        owner_profile = db.execute(text("""
-            SELECT id FROM cafe_owner_profile WHERE user_id = :user_id
-        """), {"user_id": current_user["id"]}).fetchone()
+        owner_profile_id = current_user["owner_profile_id"]
         
-        if not owner_profile:
+        if not owner_profile_id:
             raise HTTPException(status_code=403, detail="Only cafe owners can update orders")
         
-        order_check = db.execute(text("""
-                                      SELECT o.id, o.account_id, o.cafe_id FROM "order" AS o
+        order_check = (await db.execute(text("""
+                                      SELECT o.id, o.account_id, o.cafe_id, o.status, o.released_at FROM "order" AS o
                                       JOIN cafe AS c ON o.cafe_id = c.id
                                       WHERE o.id = :order_id AND c.owner_id = :owner_id
+                                      FOR UPDATE OF o
                                       """),
-                                {"order_id": order_id, "owner_id": owner_profile[0]}).fetchone()
+                                {"order_id": order_id, "owner_id": owner_profile_id})).fetchone()
     elif current_user["role"] == "cafe_worker":
-        order_check = db.execute(text("""
-                                      SELECT o.id, o.account_id, o.cafe_id FROM "order" AS o
+        order_check = (await db.execute(text("""
+                                      SELECT o.id, o.account_id, o.cafe_id, o.status, o.released_at FROM "order" AS o
                                       JOIN cafe_worker AS cw ON o.cafe_id = cw.cafe_id
                                       WHERE o.id = :order_id AND cw.user_id = :user_id
+                                      FOR UPDATE OF o
                                       """),
-                                {"order_id": order_id, "user_id": current_user["id"]}).fetchone()
+                                {"order_id": order_id, "user_id": current_user["id"]})).fetchone()
     else:
         raise HTTPException(status_code=403, detail="Only cafe owners and workers can update orders")
 
@@ -310,18 +391,24 @@ async def update_order_status(order_id: int, order_update: OrderUpdateSchema,
 
     if update_fields:
         now_uzbekistan = datetime.now(UZBEKISTAN_TZ)
-        update_fields.append("updated_at = :updated_at")
+        update_fields.append("updated_at = CAST(:updated_at AS TIMESTAMPTZ)")
         params["updated_at"] = now_uzbekistan
         update_query = f'UPDATE "order" SET {", ".join(update_fields)} WHERE id = :order_id'
-        db.execute(text(update_query), params)
+        await db.execute(text(update_query), params)
+
+    if order_update.status is not None and order_update.status.value != order_check.status:
+        await db.execute(rollups.MOVE_ORDER_STATUS, {"order_id": order_id, "old_status": order_check.status})
 
-    result = db.execute(text("""
+    result = (await db.execute(text("""
                              SELECT id, account_id, cafe_id, note, status, total_price, created_at, updated_at
                              FROM "order"
                              WHERE id = :order_id
-                             """), {"order_id": order_id}).mappings().fetchone()
+                             """), {"order_id": order_id})).mappings().fetchone()
 
-    db.commit()
+    await db.commit()
+    # Admission only counts orders the kitchen has been sent
+    if order_update.status is not None and order_check.released_at is not None:
+        order_admission.order_moved(order_check.cafe_id, order_check.status, order_update.status.value)
 
     if order_update.status:
         await manager.send_to_user(order_check[1], {
@@ -338,8 +425,9 @@ async def update_order_status(order_id: int, order_update: OrderUpdateSchema,
 def cancel_order(order_id: int, db: Session = Depends(get_db),
                  current_user: dict = Depends(get_current_user)):
     order_data = db.execute(text("""
-                                 SELECT id, status FROM "order"
+                                 SELECT id, status, cafe_id, released_at FROM "order"
                                  WHERE id = :order_id AND account_id = :account_id
+                                 FOR UPDATE
                                  """),
                            {"order_id": order_id, "account_id": current_user["id"]}).fetchone()
 
@@ -355,4 +443,7 @@ def cancel_order(order_id: int, db: Session = Depends(get_db),
                     WHERE id = :order_id
                     """),
               {"order_id": order_id, "status": StatusTypes.cancelled.value})
+    db.execute(rollups.MOVE_ORDER_STATUS, {"order_id": order_id, "old_status": order_data[1]})
     db.commit()
+    if order_data[3] is not None:
+        order_admission.order_moved(order_data[2], order_data[1], StatusTypes.cancelled.value)
@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Depends, File, UploadFile, Form
+from fastapi import APIRouter, Depends, File, UploadFile, Form, Query, Request, Response
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.database import get_db
+from app.config import settings
+from app.core.catalog_cache import ALL_CAFES, PUBLIC_CATEGORIES, catalog_cache
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core import category_cafes
 from app.schemas.cafe_schema import (
     CafeResponseSchema, CafeMenuItemResponseSchema, CafeCategoryResponseSchema,
     PublicCategoryCreateSchema, PublicCategoryResponseSchema, PublicCategoryUpdateSchema
@@ -16,6 +21,11 @@ router = APIRouter(
     tags=["Public"],
 )
 
+cafe_list_adapter = TypeAdapter(List[CafeResponseSchema])
+menu_list_adapter = TypeAdapter(List[CafeMenuItemResponseSchema])
+category_list_adapter = TypeAdapter(List[CafeCategoryResponseSchema])
+public_category_list_adapter = TypeAdapter(List[PublicCategoryResponseSchema])
+
 
 def format_image_url(image_path: str | None) -> str | None:
     """Return image path as-is."""
@@ -40,18 +50,48 @@ def format_menu_item_response(row):
     return data
 
 
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def cached_json_response(request: Request, scope: str, key: str, adapter: TypeAdapter, load) -> Response:
+    """Serve a catalog snapshot, serializing it only when the cache has none.
+
+    Answers 304 without a body when the client already holds the current snapshot.
+    """
+    snapshot = catalog_cache.get_or_load(
+        scope, key, lambda: adapter.dump_json(adapter.validate_python(load()))
+    )
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": f"public, max-age={settings.CATALOG_MAX_AGE}, must-revalidate",
+    }
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+
 @router.get("/cafes", response_model=List[CafeResponseSchema])
-def get_all_cafes(db: Session = Depends(get_db)):
-    query = text("""
-                 SELECT id, name, location, image, owner_id, 
-                        COALESCE(rating, 0.0) AS rating,
-                        COALESCE(created_at, CURRENT_TIMESTAMP) AS created_at,
-                        COALESCE(updated_at, CURRENT_TIMESTAMP) AS updated_at
-                 FROM cafe
-                 """)
-    result = db.execute(query)
-    rows = result.mappings().fetchall()
-    return [format_cafe_response(row) for row in rows]
+def get_all_cafes(request: Request, db: Session = Depends(get_db)):
+    def load():
+        query = text("""
+                     SELECT id, name, location, image, owner_id, 
+                            COALESCE(rating, 0.0) AS rating,
+                            COALESCE(created_at, CURRENT_TIMESTAMP) AS created_at,
+                            COALESCE(updated_at, CURRENT_TIMESTAMP) AS updated_at
+                     FROM cafe
+                     """)
+        result = db.execute(query)
+        rows = result.mappings().fetchall()
+        return [format_cafe_response(row) for row in rows]
+
+    return cached_json_response(request, ALL_CAFES, "list", cafe_list_adapter, load)
 
 
 @router.get("/cafes/{cafe_id}", response_model=CafeResponseSchema)
@@ -69,30 +109,38 @@ def get_cafe_details(cafe_id: str, db: Session = Depends(get_db)):
     return format_cafe_response(row)
 
 
+CAFE_MENU_QUERY = text("""
+    SELECT id, cafe_id, category_id, image, name, description, price, available,
+           COALESCE(created_at, CURRENT_TIMESTAMP) AS created_at,
+           COALESCE(updated_at, CURRENT_TIMESTAMP) AS updated_at
+    FROM menu_item
+    WHERE cafe_id = :cafe_id AND available = TRUE
+""")
+
+
 @router.get("/cafes/{cafe_id}/menu", response_model=List[CafeMenuItemResponseSchema])
-def get_cafe_menu(cafe_id: str, db: Session = Depends(get_db)):
-    query = text("""
-                 SELECT id, cafe_id, category_id, image, name, description, price, available,
-                        COALESCE(created_at, CURRENT_TIMESTAMP) AS created_at,
-                        COALESCE(updated_at, CURRENT_TIMESTAMP) AS updated_at
-                 FROM menu_item
-                 WHERE cafe_id = :cafe_id AND available = TRUE
-                 """)
-    result = db.execute(query, {"cafe_id": cafe_id})
-    rows = result.mappings().fetchall()
-    return [format_menu_item_response(row) for row in rows]
+def get_cafe_menu(cafe_id: str, request: Request, db: Session = Depends(get_db)):
+    def load():
+        result = db.execute(CAFE_MENU_QUERY, {"cafe_id": cafe_id})
+        rows = result.mappings().fetchall()
+        return [format_menu_item_response(row) for row in rows]
+
+    return cached_json_response(request, cafe_id, "menu", menu_list_adapter, load)
 
 
 @router.get("/cafes/{cafe_id}/categories", response_model=List[CafeCategoryResponseSchema])
-def get_cafe_categories(cafe_id: str, db: Session = Depends(get_db)):
-    query = text("""
-                 SELECT id, cafe_id, name
-                 FROM category
-                 WHERE cafe_id = :cafe_id
-                 """)
-    result = db.execute(query, {"cafe_id": cafe_id})
-    rows = result.mappings().fetchall()
-    return rows
+def get_cafe_categories(cafe_id: str, request: Request, db: Session = Depends(get_db)):
+    def load():
+        query = text("""
+                     SELECT id, cafe_id, name
+                     FROM category
+                     WHERE cafe_id = :cafe_id
+                     """)
+        result = db.execute(query, {"cafe_id": cafe_id})
+        rows = result.mappings().fetchall()
+        return [dict(row) for row in rows]
+
+    return cached_json_response(request, cafe_id, "categories", category_list_adapter, load)
 
 
 @router.get("/categories/{category_id}/menu", response_model=List[CafeMenuItemResponseSchema])
@@ -109,39 +157,86 @@ def get_menu_items_by_category(category_id: str, db: Session = Depends(get_db)):
     return [format_menu_item_response(row) for row in rows]
 
 @router.get("/categories", response_model=List[PublicCategoryResponseSchema])
-def get_all_categories(db: Session = Depends(get_db)):
-    query = text("""
-                 SELECT id, name, image
-                 FROM public_category
-                 """)
-    result = db.execute(query)
-    rows = result.mappings().fetchall()
-    return rows
+def get_all_categories(request: Request, db: Session = Depends(get_db)):
+    def load():
+        query = text("""
+                     SELECT id, name, image
+                     FROM public_category
+                     """)
+        result = db.execute(query)
+        rows = result.mappings().fetchall()
+        return [dict(row) for row in rows]
+
+    return cached_json_response(request, PUBLIC_CATEGORIES, "list", public_category_list_adapter, load)
+
+# Menu items match on a substring (ILIKE) or on trigram word similarity, which
+# covers prefixes and small typos ("piz", "piza" -> "Pizza"). Both operators are
+# served by the GIN trigram indexes from the add_menu_item_search_indexes migration.
+# Cafes rank by their best-matching item, then by rating.
+CAFE_SEARCH_QUERY = text("""
+    SELECT c.id, c.name, c.location, c.image, c.owner_id,
+           COALESCE(c.rating, 0.0) AS rating,
+           COALESCE(c.created_at, CURRENT_TIMESTAMP) AS created_at,
+           COALESCE(c.updated_at, CURRENT_TIMESTAMP) AS updated_at,
+           MAX(GREATEST(word_similarity(:term, m.name),
+                        word_similarity(:term, COALESCE(m.description, '')))) AS score
+    FROM cafe c
+    JOIN menu_item m ON c.id = m.cafe_id
+    WHERE m.available = TRUE
+      AND (m.name ILIKE :pattern
+           OR m.description ILIKE :pattern
+           OR :term <% m.name
+           OR :term <% m.description)
+    GROUP BY c.id
+    ORDER BY score DESC, rating DESC
+    LIMIT :limit
+""")
+
+
+def search_params(term: str, limit: int) -> dict:
+    term = term.strip()
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return {"term": term, "pattern": f"%{escaped}%", "limit": limit}
+
 
 @router.get("/categories/{public_category_name}/cafes", response_model=List[CafeResponseSchema])
-def get_cafes_by_public_category(public_category_name: str, db: Session = Depends(get_db)):
+def get_cafes_by_public_category(
+    public_category_name: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
     """
-    Get all cafes that have menu items matching the public category name.
-    Searches for menu items where the name contains the category name.
+    Get cafes that have menu items matching the public category name.
+    Known public categories are read from the precomputed public_category_cafe
+    mapping; any other name falls back to a search on item names and descriptions
+    by substring, prefix or close spelling, best matches first.
     """
-    query = text("""
-                 SELECT DISTINCT c.id, c.name, c.location, c.image, c.owner_id, 
-                        COALESCE(c.rating, 0.0) AS rating,
-                        COALESCE(c.created_at, CURRENT_TIMESTAMP) AS created_at,
-                        COALESCE(c.updated_at, CURRENT_TIMESTAMP) AS updated_at
-                 FROM cafe c
-                 JOIN menu_item m ON c.id = m.cafe_id
-                 WHERE m.available = TRUE 
-                   AND (LOWER(m.name) LIKE LOWER(:category_name) 
-                        OR LOWER(m.description) LIKE LOWER(:category_name))
-                 ORDER BY c.rating DESC
-                 """)
-    result = db.execute(query, {"category_name": f"%{public_category_name}%"})
+    public_category = db.execute(text("""
+        SELECT id FROM public_category WHERE LOWER(name) = LOWER(:name) LIMIT 1
+    """), {"name": public_category_name.strip()}).fetchone()
+
+    if public_category:
+        result = db.execute(text("""
+                     SELECT c.id, c.name, c.location, c.image, c.owner_id,
+                            COALESCE(c.rating, 0.0) AS rating,
+                            COALESCE(c.created_at, CURRENT_TIMESTAMP) AS created_at,
+                            COALESCE(c.updated_at, CURRENT_TIMESTAMP) AS updated_at
+                     FROM public_category_cafe pcc
+                     JOIN cafe c ON c.id = pcc.cafe_id
+                     WHERE pcc.public_category_id = :public_category_id
+                     ORDER BY rating DESC
+                     LIMIT :limit
+                     """), {"public_category_id": public_category.id, "limit": limit})
+        rows = result.mappings().fetchall()
+        return [format_cafe_response(row) for row in rows]
+
+    result = db.execute(CAFE_SEARCH_QUERY, search_params(public_category_name, limit))
     rows = result.mappings().fetchall()
     return [format_cafe_response(row) for row in rows]
 
+
 @router.post("/categories", response_model=PublicCategoryResponseSchema)
-async def create_public_category(
+def create_public_category(
     name: str = Form(...),
     image: Optional[UploadFile] = File(None),
     db: Session = Depends(get_db)
@@ -170,7 +265,9 @@ async def create_public_category(
         """),
         {"id": category_id, "name": name, "image": image_path}
     )
+    category_cafes.refresh_public_category(db, category_id)
     db.commit()
+    catalog_cache.invalidate(PUBLIC_CATEGORIES)
     result = db.execute(
         text("""
             SELECT id, name, image
@@ -197,7 +294,10 @@ def update_public_category(
         """),
         {"id": category_id, "name": category.name, "image": category.image}
     )
+    if category.name is not None:
+        category_cafes.refresh_public_category(db, category_id)
     db.commit()
+    catalog_cache.invalidate(PUBLIC_CATEGORIES)
     result = db.execute(
         text("""
             SELECT id, name, image
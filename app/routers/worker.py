@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.database import get_db
 from app.routers.auth import get_current_user
+from app.core.principal import principal_cache
 from pydantic import BaseModel
 from typing import List
 from uuid import uuid4
@@ -40,17 +41,14 @@ def assign_worker_to_cafe(
     current_user: dict = Depends(get_current_user)
 ):
     # Get the cafe_owner_profile.id for this user
-    owner_profile = db.execute(
-        text("SELECT id FROM cafe_owner_profile WHERE user_id = :user_id"),
-        {"user_id": current_user["id"]}
-    ).fetchone()
+    owner_profile_id = current_user["owner_profile_id"]
     
-    if not owner_profile:
+    if not owner_profile_id:
         raise HTTPException(status_code=403, detail="Only cafe owners can assign workers")
     
     cafe_check = db.execute(
         text("SELECT id, name FROM cafe WHERE id = :cafe_id AND owner_id = :owner_id"),
-        {"cafe_id": worker.cafe_id, "owner_id": owner_profile[0]}
+        {"cafe_id": worker.cafe_id, "owner_id": owner_profile_id}
     ).fetchone()
 
     if not cafe_check:
@@ -86,6 +84,7 @@ def assign_worker_to_cafe(
     )
 
     db.commit()
+    principal_cache.invalidate(worker.user_id)
 
     return {
         "id": worker_id,
@@ -104,17 +103,14 @@ def get_cafe_workers(
     current_user: dict = Depends(get_current_user)
 ):
     # Get the cafe_owner_profile.id for this user
-    owner_profile = db.execute(
-        text("SELECT id FROM cafe_owner_profile WHERE user_id = :user_id"),
-        {"user_id": current_user["id"]}
-    ).fetchone()
+    owner_profile_id = current_user["owner_profile_id"]
     
-    if not owner_profile:
+    if not owner_profile_id:
         raise HTTPException(status_code=403, detail="Only cafe owners can view workers")
     
     cafe_check = db.execute(
         text("SELECT id FROM cafe WHERE id = :cafe_id AND owner_id = :owner_id"),
-        {"cafe_id": cafe_id, "owner_id": owner_profile[0]}
+        {"cafe_id": cafe_id, "owner_id": owner_profile_id}
     ).fetchone()
 
     if not cafe_check:
@@ -171,21 +167,18 @@ def remove_worker_from_cafe(
     current_user: dict = Depends(get_current_user)
 ):
     # Get the cafe_owner_profile.id for this user
-    owner_profile = db.execute(
-        text("SELECT id FROM cafe_owner_profile WHERE user_id = :user_id"),
-        {"user_id": current_user["id"]}
-    ).fetchone()
+    owner_profile_id = current_user["owner_profile_id"]
     
-    if not owner_profile:
+    if not owner_profile_id:
         raise HTTPException(status_code=403, detail="Only cafe owners can remove workers")
     
     worker_check = db.execute(
         text("""
-            SELECT cw.id FROM cafe_worker cw
+            SELECT cw.id, cw.user_id FROM cafe_worker cw
             JOIN cafe c ON cw.cafe_id = c.id
             WHERE cw.id = :worker_id AND c.owner_id = :owner_id
         """),
-        {"worker_id": worker_id, "owner_id": owner_profile[0]}
+        {"worker_id": worker_id, "owner_id": owner_profile_id}
     ).fetchone()
 
     if not worker_check:
@@ -197,4 +190,5 @@ def remove_worker_from_cafe(
     )
 
     db.commit()
+    principal_cache.invalidate(worker_check[1])
 
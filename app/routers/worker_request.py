@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.database import get_db
 from app.routers.auth import get_current_user
+from app.core.principal import principal_cache
 from pydantic import BaseModel
 from typing import List
 from uuid import uuid4
@@ -126,18 +127,15 @@ def get_cafe_requests(
 ):
     """Get all worker requests for a cafe (owner only)"""
     # Get cafe_owner_profile.id for the current user
-    owner_profile = db.execute(
-        text("SELECT id FROM cafe_owner_profile WHERE user_id = :user_id"),
-        {"user_id": current_user["id"]}
-    ).fetchone()
+    owner_profile_id = current_user["owner_profile_id"]
     
-    if not owner_profile:
+    if not owner_profile_id:
         raise HTTPException(status_code=403, detail="Only cafe owners can view requests")
     
     # Verify cafe ownership
     cafe_check = db.execute(
         text("SELECT id FROM cafe WHERE id = :cafe_id AND owner_id = :owner_id"),
-        {"cafe_id": cafe_id, "owner_id": owner_profile[0]}
+        {"cafe_id": cafe_id, "owner_id": owner_profile_id}
     ).fetchone()
 
     if not cafe_check:
@@ -177,12 +175,9 @@ def update_request_status(
         )
 
     # Get cafe_owner_profile.id for current user
-    owner_profile = db.execute(
-        text("SELECT id FROM cafe_owner_profile WHERE user_id = :user_id"),
-        {"user_id": current_user["id"]}
-    ).fetchone()
+    owner_profile_id = current_user["owner_profile_id"]
     
-    if not owner_profile:
+    if not owner_profile_id:
         raise HTTPException(
             status_code=403,
             detail="Only cafe owners can update worker requests"
@@ -205,7 +200,7 @@ def update_request_status(
         raise HTTPException(status_code=404, detail="Request not found")
 
     # Compare cafe.owner_id with cafe_owner_profile.id
-    if request_data[4] != owner_profile[0]:
+    if request_data[4] != owner_profile_id:
         raise HTTPException(
             status_code=403,
             detail="You don't have permission to update this request"
@@ -240,6 +235,9 @@ def update_request_status(
 
     db.commit()
 
+    if update.status == "approved":
+        principal_cache.invalidate(request_data[1])
+
     updated_request = db.execute(
         text("""
             SELECT wr.id, wr.user_id, wr.cafe_id, wr.status, wr.created_at,
@@ -1,4 +1,4 @@
-import datetime
+from datetime import datetime
 
 from pydantic import BaseModel
 
@@ -9,7 +9,7 @@ class CafeOwnerResponse(BaseModel):
     email: str
     total_orders: int
     total_customers: int
-    total_revenue: int
+    total_revenue: float
     cafe_name: str
     created_at: datetime
     updated_at: datetime
@@ -18,5 +18,12 @@ class CafeOwnerResponse(BaseModel):
         from_attributes = True
 
 
+class CafeOwnerSummaryResponse(BaseModel):
+    id: str
+    total_orders: int
+    total_customers: int
+    total_revenue: float
+
+
 class CafeOwnerCreate(BaseModel):
     user_id: int
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel
 from typing import Optional, List
 
@@ -160,3 +160,11 @@ class PublicCategoryUpdateSchema(BaseModel):
     name: Optional[str] = None
     image: Optional[str] = None
 
+
+class CafeDailyStatsResponseSchema(BaseModel):
+    day: date
+    orders: int
+    revenue: float
+    new_customers: int
+    feedbacks: int
+    average_rating: Optional[float]
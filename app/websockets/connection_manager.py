@@ -1,56 +1,228 @@
-from typing import Dict, List, Set
-from fastapi import WebSocket
+import asyncio
 import json
+import logging
+import time
+from itertools import count
+from typing import Dict, Optional, Set
+from fastapi import WebSocket
+from app.config import settings
+from app.core.pubsub import PubSubBackend, create_pubsub_backend
+from app.core.metrics import ws_broadcast_latency
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+
+# 1013 = "Try Again Later": the client was too slow to keep up
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+CAFE_SCOPE = "cafe"
+USER_SCOPE = "user"
+
+
+def serialize_message(message: dict) -> str:
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class ClientConnection:
+    """A socket with its own bounded outbound queue, drained by a dedicated writer task."""
+
+    def __init__(self, connection_id: str, websocket: WebSocket, cafe_id: str, user_id: str,
+                 queue_size: int):
+        self.id = connection_id
+        self.websocket = websocket
+        self.cafe_id = cafe_id
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.stale = False
+
+    def start(self):
+        self.writer = asyncio.create_task(self._write_loop())
+
+    async def _write_loop(self):
+        try:
+            while True:
+                payload = await self.queue.get()
+                await self.websocket.send_text(payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.stale = True
+
+    def enqueue(self, payload: str) -> bool:
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def drop_oldest(self):
+        try:
+            self.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+
+    def close(self):
+        self.stale = True
+        if self.writer is not None:
+            self.writer.cancel()
 
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-        self.user_connections: Dict[str, WebSocket] = {}
+    def __init__(self, queue_size: int = settings.WS_QUEUE_SIZE,
+                 slow_consumer_policy: str = settings.WS_SLOW_CONSUMER_POLICY,
+                 pubsub: Optional[PubSubBackend] = None):
+        if slow_consumer_policy not in (DROP_OLDEST, DISCONNECT):
+            raise ValueError(f"Unknown slow consumer policy: {slow_consumer_policy}")
+
+        self.queue_size = queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        # connection id -> connection, plus cafe/user indexes of the same objects;
+        # nested dicts keep add and remove O(1) and let a user hold many devices
+        self.clients: Dict[str, ClientConnection] = {}
+        self.active_connections: Dict[str, Dict[str, ClientConnection]] = {}
+        self.user_connections: Dict[str, Dict[str, ClientConnection]] = {}
+        self.connection_ids = count(1)
+        # Slow-consumer closes run in the background; keep them referenced until done
+        self.closing: Set[asyncio.Task] = set()
 
-    async def connect(self, websocket: WebSocket, cafe_id: str, user_id: str):
+        self.messages_enqueued = 0
+        self.messages_dropped = 0
+        self.slow_disconnects = 0
+
+        self.pubsub = pubsub or create_pubsub_backend(settings.WS_PUBSUB_CHANNEL)
+        self.pubsub.bind(self._dispatch)
+
+    async def start(self):
+        await self.pubsub.start()
+
+    async def stop(self):
+        await self.pubsub.stop()
+        if self.closing:
+            await asyncio.gather(*self.closing, return_exceptions=True)
+
+    async def connect(self, websocket: WebSocket, cafe_id: str, user_id: str) -> str:
+        """Accept and register a socket. Returns the connection id used to disconnect it."""
         await websocket.accept()
 
-        if cafe_id not in self.active_connections:
-            self.active_connections[cafe_id] = []
+        client = ClientConnection(str(next(self.connection_ids)), websocket, cafe_id, user_id,
+                                  self.queue_size)
+        client.start()
+
+        self.clients[client.id] = client
+        self.active_connections.setdefault(cafe_id, {})[client.id] = client
+        self.user_connections.setdefault(user_id, {})[client.id] = client
+        return client.id
+
+    def disconnect(self, connection_id: str):
+        client = self.clients.pop(connection_id, None)
+        if client is None:
+            return
+
+        client.close()
+        self._unindex(self.active_connections, client.cafe_id, client.id)
+        self._unindex(self.user_connections, client.user_id, client.id)
+
+    @staticmethod
+    def _unindex(index: Dict[str, Dict[str, ClientConnection]], key: str, connection_id: str):
+        connections = index.get(key)
+        if connections is not None:
+            connections.pop(connection_id, None)
+            if not connections:
+                del index[key]
+
+    def _deliver(self, client: ClientConnection, payload: str) -> bool:
+        """Queue a payload without awaiting the socket. Returns False if the client is gone."""
+        if client.stale:
+            return False
 
-        self.active_connections[cafe_id].append(websocket)
-        self.user_connections[user_id] = websocket
+        if client.enqueue(payload):
+            self.messages_enqueued += 1
+            return True
 
-    def disconnect(self, websocket: WebSocket, cafe_id: str, user_id: str):
-        if cafe_id in self.active_connections:
-            if websocket in self.active_connections[cafe_id]:
-                self.active_connections[cafe_id].remove(websocket)
+        self.messages_dropped += 1
+        if self.slow_consumer_policy == DROP_OLDEST:
+            client.drop_oldest()
+            client.enqueue(payload)
+            self.messages_enqueued += 1
+            return True
 
-            if not self.active_connections[cafe_id]:
-                del self.active_connections[cafe_id]
+        self.slow_disconnects += 1
+        client.close()
+        task = asyncio.create_task(self._close_socket(client.websocket))
+        self.closing.add(task)
+        task.add_done_callback(self.closing.discard)
+        return False
 
-        if user_id in self.user_connections:
-            del self.user_connections[user_id]
+    @staticmethod
+    async def _close_socket(websocket: WebSocket):
+        try:
+            await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
 
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
-        await websocket.send_json(message)
+    async def send_personal_message(self, message: dict, connection_id: str):
+        client = self.clients.get(connection_id)
+        if client is not None:
+            self._deliver(client, serialize_message(message))
 
     async def broadcast_to_cafe(self, cafe_id: str, message: dict):
-        if cafe_id in self.active_connections:
-            disconnected = []
-            for connection in self.active_connections[cafe_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    disconnected.append(connection)
-
-            for conn in disconnected:
-                if conn in self.active_connections[cafe_id]:
-                    self.active_connections[cafe_id].remove(conn)
+        await self._publish(CAFE_SCOPE, cafe_id, message)
 
     async def send_to_user(self, user_id: str, message: dict):
-        if user_id in self.user_connections:
-            try:
-                await self.user_connections[user_id].send_json(message)
-            except Exception:
-                del self.user_connections[user_id]
+        await self._publish(USER_SCOPE, user_id, message)
 
+    async def _publish(self, scope: str, target: str, message: dict):
+        envelope = serialize_message({
+            "scope": scope,
+            "target": target,
+            "payload": serialize_message(message),
+            # Wall clock, so latency is meaningful when another worker delivers it
+            "published_at": time.time(),
+        })
+        try:
+            await self.pubsub.publish(envelope)
+        except Exception:
+            # Notifications are best effort; the write that triggered them already committed
+            logger.exception("Failed to publish WebSocket message to %s %s", scope, target)
 
-manager = ConnectionManager()
+    def _dispatch(self, envelope: str):
+        """Deliver a published envelope to the sockets connected to this process."""
+        data = json.loads(envelope)
+        if data["scope"] == CAFE_SCOPE:
+            self._broadcast_local(data["target"], data["payload"])
+        elif data["scope"] == USER_SCOPE:
+            self._send_to_user_local(data["target"], data["payload"])
+        if "published_at" in data:
+            ws_broadcast_latency.observe(max(time.time() - data["published_at"], 0.0))
+
+    def _deliver_all(self, connections: Optional[Dict[str, ClientConnection]], payload: str):
+        if not connections:
+            return
+
+        disconnected = [client.id for client in connections.values()
+                        if not self._deliver(client, payload)]
+        for connection_id in disconnected:
+            self.disconnect(connection_id)
+
+    def _broadcast_local(self, cafe_id: str, payload: str):
+        self._deliver_all(self.active_connections.get(cafe_id), payload)
 
+    def _send_to_user_local(self, user_id: str, payload: str):
+        self._deliver_all(self.user_connections.get(user_id), payload)
+
+    def metrics(self) -> dict:
+        depths = [client.queue.qsize() for client in self.clients.values()]
+        return {
+            "connections": len(self.clients),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "messages_enqueued": self.messages_enqueued,
+            "messages_dropped": self.messages_dropped,
+            "slow_disconnects": self.slow_disconnects,
+        }
+
+
+manager = ConnectionManager()
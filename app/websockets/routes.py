@@ -1,15 +1,16 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from app.database import get_db
+from app.database import AsyncSessionLocal
 from app.websockets.connection_manager import manager
+from app.core.principal import PRINCIPAL_QUERY, Principal, principal_cache
 from jose import jwt, JWTError
 from app.config import settings
 
 router = APIRouter()
 
 
-async def get_current_user_ws(token: str, db: Session):
+async def get_current_user_ws(token: str, db: AsyncSession):
     try:
         payload = jwt.decode(
             token,
@@ -21,87 +22,103 @@ async def get_current_user_ws(token: str, db: Session):
         if user_id is None:
             return None
 
-        result = db.execute(
-            text("SELECT id, name, email, role FROM users WHERE id = :id"),
-            {"id": user_id}
-        ).mappings().fetchone()
+        principal = principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+
+        version = principal_cache.version(user_id)
+        result = (await db.execute(PRINCIPAL_QUERY, {"id": user_id})).mappings().fetchone()
 
         if result is None:
             return None
 
-        return result
+        principal = Principal.from_row(result)
+        principal_cache.set(principal, version)
+        return principal
 
     except JWTError:
         return None
 
 
+async def authorize_cafe_socket(token: str, cafe_id: str):
+    """Resolve the user and check cafe access with a session that is closed before returning.
+
+    Sockets live for hours, so they must not keep a pooled connection checked out.
+    """
+    async with AsyncSessionLocal() as db:
+        current_user = await get_current_user_ws(token, db)
+
+        if not current_user:
+            return None
+
+        user_role = current_user["role"]
+
+        if user_role not in ["cafe_owner", "cafe_worker", "admin"]:
+            return None
+
+        if user_role == "cafe_owner":
+            cafe_check = (await db.execute(
+                text("SELECT id FROM cafe WHERE id = :cafe_id AND owner_id = :owner_id"),
+                {"cafe_id": cafe_id, "owner_id": current_user["owner_profile_id"]}
+            )).fetchone()
+
+            if not cafe_check:
+                return None
+
+        elif user_role == "cafe_worker":
+            if cafe_id not in current_user["worker_cafe_ids"]:
+                return None
+
+        return current_user
+
+
+async def authorize_user_socket(token: str):
+    async with AsyncSessionLocal() as db:
+        return await get_current_user_ws(token, db)
+
+
 @router.websocket("/ws/cafe/{cafe_id}")
 async def websocket_cafe_endpoint(
     websocket: WebSocket,
     cafe_id: str,
-    token: str = Query(...),
-    db: Session = Depends(get_db)
+    token: str = Query(...)
 ):
-    current_user = await get_current_user_ws(token, db)
+    current_user = await authorize_cafe_socket(token, cafe_id)
 
     if not current_user:
         await websocket.close(code=1008)
         return
 
-    user_role = current_user["role"]
     user_id = current_user["id"]
 
-    if user_role not in ["cafe_owner", "cafe_worker", "admin"]:
-        await websocket.close(code=1008)
-        return
-
-    if user_role == "cafe_owner":
-        cafe_check = db.execute(
-            text("SELECT id FROM cafe WHERE id = :cafe_id AND owner_id = :owner_id"),
-            {"cafe_id": cafe_id, "owner_id": user_id}
-        ).fetchone()
-
-        if not cafe_check:
-            await websocket.close(code=1008)
-            return
-
-    elif user_role == "cafe_worker":
-        worker_check = db.execute(
-            text("SELECT id FROM cafe_worker WHERE cafe_id = :cafe_id AND user_id = :user_id"),
-            {"cafe_id": cafe_id, "user_id": user_id}
-        ).fetchone()
-
-        if not worker_check:
-            await websocket.close(code=1008)
-            return
-
-    await manager.connect(websocket, cafe_id, user_id)
+    connection_id = await manager.connect(websocket, cafe_id, user_id)
 
     try:
         await manager.send_personal_message({
             "type": "connection",
             "message": f"Connected to cafe {cafe_id}",
             "user": current_user["name"]
-        }, websocket)
+        }, connection_id)
 
         while True:
             data = await websocket.receive_text()
             await manager.send_personal_message({
                 "type": "echo",
                 "message": data
-            }, websocket)
+            }, connection_id)
 
     except WebSocketDisconnect:
-        manager.disconnect(websocket, cafe_id, user_id)
+        pass
+    finally:
+        manager.disconnect(connection_id)
 
 
 @router.websocket("/ws/orders")
 async def websocket_orders_endpoint(
     websocket: WebSocket,
-    token: str = Query(...),
-    db: Session = Depends(get_db)
+    token: str = Query(...)
 ):
-    current_user = await get_current_user_ws(token, db)
+    current_user = await authorize_user_socket(token)
 
     if not current_user:
         await websocket.close(code=1008)
@@ -109,22 +126,23 @@ async def websocket_orders_endpoint(
 
     user_id = current_user["id"]
 
-    await manager.connect(websocket, f"user_{user_id}", user_id)
+    connection_id = await manager.connect(websocket, f"user_{user_id}", user_id)
 
     try:
         await manager.send_personal_message({
             "type": "connection",
             "message": "Connected to order updates",
             "user": current_user["name"]
-        }, websocket)
+        }, connection_id)
 
         while True:
             data = await websocket.receive_text()
             await manager.send_personal_message({
                 "type": "echo",
                 "message": data
-            }, websocket)
+            }, connection_id)
 
     except WebSocketDisconnect:
-        manager.disconnect(websocket, f"user_{user_id}", user_id)
-
+        pass
+    finally:
+        manager.disconnect(connection_id)
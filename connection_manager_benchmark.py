@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+from app.websockets.connection_manager import ConnectionManager
+from app.core.pubsub import InMemoryPubSub
+
+CYCLES = 10_000
+CAFES = 50
+
+
+class BenchmarkWebSocket:
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload: str):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def run_benchmark():
+    manager = ConnectionManager(pubsub=InMemoryPubSub())
+    websocket = BenchmarkWebSocket()
+
+    # Keep a resident population so removals happen inside large per-cafe sets
+    resident = [await manager.connect(websocket, f"cafe_{i % CAFES}", f"resident_{i}")
+                for i in range(CYCLES)]
+
+    start = time.perf_counter()
+    for i in range(CYCLES):
+        connection_id = await manager.connect(websocket, f"cafe_{i % CAFES}", f"user_{i % 100}")
+        manager.disconnect(connection_id)
+    elapsed = time.perf_counter() - start
+
+    for connection_id in resident:
+        manager.disconnect(connection_id)
+    await asyncio.sleep(0)
+
+    print(f"{CYCLES} connect/disconnect cycles with {len(resident)} resident sockets: "
+          f"{elapsed * 1000:.1f} ms ({elapsed / CYCLES * 1e6:.1f} µs per cycle)")
+    assert not manager.clients and not manager.active_connections and not manager.user_connections
+
+
+if __name__ == "__main__":
+    print("ConnectionManager Benchmark")
+    print("=" * 50)
+    asyncio.run(run_benchmark())
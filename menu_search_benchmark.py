@@ -0,0 +1,95 @@
+"""Compare the old LIKE scan with the trigram search on a large menu.
+
+Seeds MENU_ITEMS rows into the database from DATABASE_URL, so point it at a
+scratch database that has been migrated with `alembic upgrade head`. The
+seeded cafes (and their items, via ON DELETE CASCADE) are removed afterwards.
+"""
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.database import engine
+from app.routers.public import CAFE_SEARCH_QUERY, search_params
+
+MENU_ITEMS = 1_000_000
+CAFES = 1_000
+RUNS = 5
+TERMS = ["pizza", "piz", "piza", "chicken wrap", "latte"]
+
+LIKE_QUERY = text("""
+    SELECT DISTINCT c.id, c.name, c.location, c.image, c.owner_id,
+           COALESCE(c.rating, 0.0) AS rating
+    FROM cafe c
+    JOIN menu_item m ON c.id = m.cafe_id
+    WHERE m.available = TRUE
+      AND (LOWER(m.name) LIKE LOWER(:category_name)
+           OR LOWER(m.description) LIKE LOWER(:category_name))
+    ORDER BY rating DESC
+""")
+
+WORDS = ["pizza", "burger", "salad", "soup", "latte", "espresso", "wrap", "chicken",
+         "beef", "noodles", "rice", "pasta", "tea", "juice", "cake", "sandwich"]
+
+
+def seed(conn):
+    owner = conn.execute(text("SELECT id FROM cafe_owner_profile LIMIT 1")).scalar()
+    if owner is None:
+        raise SystemExit("Register at least one cafe owner before running the benchmark")
+
+    conn.execute(text("""
+        INSERT INTO cafe (id, name, location, image, owner_id, rating, created_at, updated_at)
+        SELECT 'bench-' || g, 'Bench cafe ' || g, 'Benchmark', 'x', :owner,
+               round((random() * 5)::numeric, 1), now(), now()
+        FROM generate_series(1, :cafes) AS g
+    """), {"owner": owner, "cafes": CAFES})
+
+    # Two random words per item name and three per description
+    conn.execute(text("""
+        INSERT INTO menu_item (id, cafe_id, category_id, image, name, description, price,
+                               available, created_at, updated_at)
+        SELECT 'bench-item-' || g, 'bench-' || (1 + g % :cafes), NULL, 'x',
+               initcap((:words)[1 + (random() * 15)::int] || ' ' || (:words)[1 + (random() * 15)::int]),
+               (:words)[1 + (random() * 15)::int] || ' with ' || (:words)[1 + (random() * 15)::int]
+                   || ' and ' || (:words)[1 + (random() * 15)::int],
+               1 + random() * 20, random() < 0.9, now(), now()
+        FROM generate_series(1, :items) AS g
+    """), {"cafes": CAFES, "items": MENU_ITEMS, "words": WORDS})
+    conn.execute(text("ANALYZE menu_item"))
+
+
+def cleanup(conn):
+    conn.execute(text("DELETE FROM cafe WHERE id LIKE 'bench-%'"))
+
+
+def measure(conn, query, params) -> float:
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        conn.execute(query, params).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def run_benchmark():
+    with engine.connect() as conn:
+        print(f"Seeding {MENU_ITEMS:,} menu items across {CAFES} cafes...")
+        start = time.perf_counter()
+        seed(conn)
+        conn.commit()
+        print(f"✅ Seeded in {time.perf_counter() - start:.1f} s")
+
+        try:
+            for term in TERMS:
+                like_ms = measure(conn, LIKE_QUERY, {"category_name": f"%{term}%"})
+                search_ms = measure(conn, CAFE_SEARCH_QUERY, search_params(term, 50))
+                print(f"{term!r:>16}: LIKE {like_ms:8.1f} ms   trigram {search_ms:8.1f} ms")
+        finally:
+            cleanup(conn)
+            conn.commit()
+
+
+if __name__ == "__main__":
+    print("Menu Search Benchmark")
+    print("=" * 50)
+    run_benchmark()
@@ -0,0 +1,37 @@
+import asyncio
+import os
+import time
+
+from app.core.security import PasswordPool, hash_password, verify_password
+
+LOGINS = 64
+
+
+async def measure(workers: int, hashed: str) -> float:
+    pool = PasswordPool(workers, queue_limit=LOGINS, retry_after=1)
+    try:
+        # Warm the worker processes so spawn cost isn't counted as login time
+        await asyncio.gather(*(pool.run(verify_password, "warmup", hashed) for _ in range(workers)))
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(pool.run(verify_password, "password123", hashed)
+                                         for _ in range(LOGINS)))
+        elapsed = time.perf_counter() - start
+        assert all(results)
+        return LOGINS / elapsed
+    finally:
+        pool.shutdown()
+
+
+async def run_benchmark():
+    hashed = hash_password("password123")
+    sizes = sorted({1, 2, 4, os.cpu_count() or 1})
+    for workers in sizes:
+        throughput = await measure(workers, hashed)
+        print(f"{workers:>3} workers: {throughput:7.1f} logins/s")
+
+
+if __name__ == "__main__":
+    print("Password Pool Benchmark")
+    print("=" * 50)
+    asyncio.run(run_benchmark())
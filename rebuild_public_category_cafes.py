@@ -0,0 +1,20 @@
+"""
+Rebuild the public_category_cafe mapping from scratch.
+
+Routes keep the mapping up to date incrementally; run this after bulk
+imports or direct database edits to menu items or public categories.
+"""
+
+from app.core.category_cafes import rebuild
+from app.database import SessionLocal
+
+
+if __name__ == "__main__":
+    print("🔄 Rebuilding public category → cafe mapping...")
+    db = SessionLocal()
+    try:
+        rows = rebuild(db)
+        db.commit()
+        print(f"✅ {rows} mappings written")
+    finally:
+        db.close()
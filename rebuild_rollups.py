@@ -0,0 +1,20 @@
+"""
+Rebuild the daily per-cafe statistics rollups from scratch.
+
+Routes keep the rollups up to date as orders and feedback are written; run
+this after bulk imports, direct database edits or to verify drift.
+"""
+
+from app.core.rollups import rebuild
+from app.database import SessionLocal
+
+
+if __name__ == "__main__":
+    print("🔄 Rebuilding daily cafe statistics...")
+    db = SessionLocal()
+    try:
+        rebuild(db)
+        db.commit()
+        print("✅ Rollups rebuilt")
+    finally:
+        db.close()
@@ -0,0 +1,87 @@
+"""Summarize the slow-query log written by app/core/slow_query_log.py.
+
+Reads settings.SLOW_QUERY_LOG_PATH (or the file given with --file) together
+with its rotated backups and prints the statements that cost the most.
+
+    python slow_query_report.py --top 10 --by total
+"""
+import argparse
+import json
+from pathlib import Path
+
+from app.config import settings
+
+SORT_KEYS = {
+    "total": lambda entry: entry["total_ms"],
+    "count": lambda entry: entry["count"],
+    "max": lambda entry: entry["max_ms"],
+}
+
+
+def log_files(path: Path):
+    # Oldest backup first, so the report reads in chronological order
+    backups = sorted(path.parent.glob(f"{path.name}.*"),
+                     key=lambda p: int(p.suffix[1:]) if p.suffix[1:].isdigit() else 0,
+                     reverse=True)
+    return [p for p in backups + [path] if p.is_file()]
+
+
+def summarize(paths):
+    statements = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                entry = statements.setdefault(record["statement"], {
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "routes": {},
+                    "plans": 0,
+                })
+                entry["count"] += 1
+                entry["total_ms"] += record["duration_ms"]
+                entry["max_ms"] = max(entry["max_ms"], record["duration_ms"])
+                route = record.get("route") or "(no request)"
+                entry["routes"][route] = entry["routes"].get(route, 0) + 1
+                entry["plans"] += int("plan" in record)
+    return statements
+
+
+def print_report(statements, top: int, by: str):
+    ranked = sorted(statements.items(), key=lambda item: SORT_KEYS[by](item[1]), reverse=True)
+    for rank, (statement, entry) in enumerate(ranked[:top], start=1):
+        print(f"#{rank}  count {entry['count']}   total {entry['total_ms']:.1f} ms   "
+              f"avg {entry['total_ms'] / entry['count']:.1f} ms   max {entry['max_ms']:.1f} ms   "
+              f"plans {entry['plans']}")
+        routes = sorted(entry["routes"].items(), key=lambda item: item[1], reverse=True)
+        print("    routes: " + ", ".join(f"{route} ({count})" for route, count in routes))
+        print(f"    {statement[:500]}")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the slow-query log")
+    parser.add_argument("--file", default=settings.SLOW_QUERY_LOG_PATH,
+                        help="Log file (rotated backups next to it are included)")
+    parser.add_argument("--top", type=int, default=10, help="Number of statements to show")
+    parser.add_argument("--by", choices=sorted(SORT_KEYS), default="total",
+                        help="Rank statements by total time, number of hits or worst duration")
+    args = parser.parse_args()
+
+    paths = log_files(Path(args.file))
+    if not paths:
+        raise SystemExit(f"No slow-query log at {args.file}")
+
+    statements = summarize(paths)
+    print(f"Slow Query Report ({sum(e['count'] for e in statements.values())} entries, "
+          f"{len(statements)} statements, ranked by {args.by})")
+    print("=" * 50)
+    print_report(statements, args.top, args.by)
+
+
+if __name__ == "__main__":
+    main()
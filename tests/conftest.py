@@ -0,0 +1,104 @@
+"""Shared fixtures.
+
+API tests run against PostgreSQL: set TEST_DATABASE_URL to a scratch
+database (its tables are dropped and recreated) or they are skipped.
+Tests that don't need a database always run.
+"""
+import os
+import uuid
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # app.config reads DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+
+@pytest.fixture(scope="session")
+def app():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from app import models  # noqa: F401 - registers every table on Base.metadata
+    from app.database import Base, engine
+    Base.metadata.drop_all(engine)
+
+    # Importing the app creates the tables
+    from app.main import app
+    return app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def statements(app):
+    """SQL statements run on either engine while the test body executes."""
+    from sqlalchemy import event
+    from app.database import async_engine, engine
+
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", record)
+    yield seen
+    for target in engines:
+        event.remove(target, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def make_user(client):
+    """Register and log in a user with the given role; returns auth headers."""
+
+    def make(role: str = "student") -> dict:
+        email = f"{uuid.uuid4().hex[:12]}@example.com"
+        response = client.post("/auth/register", json={
+            "name": f"{role} {email[:6]}", "email": email, "password": "secret123", "role": role,
+        })
+        assert response.status_code == 200, response.text
+        response = client.post("/auth/login", json={"email": email, "password": "secret123"})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return make
+
+
+@pytest.fixture
+def make_cafe(client, make_user):
+    """Create a cafe with ``items`` available menu items; returns (owner headers, cafe, items)."""
+
+    def make(items: int = 3):
+        owner = make_user("cafe_owner")
+        cafe = client.post("/cafes/", json={"name": "Test cafe", "location": "Block A"}, headers=owner)
+        assert cafe.status_code == 200, cafe.text
+        cafe = cafe.json()
+        menu = []
+        for i in range(items):
+            item = client.post("/cafes/menu", json={
+                "cafe_id": cafe["id"], "category_id": None, "name": f"Dish {i}", "description": "",
+                "price": 2.5 + i, "image": "dish.png", "available": True,
+            }, headers=owner)
+            assert item.status_code == 200, item.text
+            menu.append(item.json())
+        return owner, cafe, menu
+
+    return make
+
+
+def place_order(client, headers: dict, cafe_id: str, items: list, quantity: int = 1):
+    response = client.post("/orders/", json={
+        "cafe_id": cafe_id,
+        "items": [{"menu_item_id": item["id"], "quantity": quantity} for item in items],
+    }, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
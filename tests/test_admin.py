@@ -0,0 +1,58 @@
+from tests.conftest import place_order
+
+
+def test_cafes_statements_do_not_grow_with_cafes(client, make_user, make_cafe, statements):
+    admin = make_user("admin")
+    make_cafe(items=0)
+    # Warm the principal cache
+    assert client.get("/admin/cafes", headers=admin).status_code == 200
+
+    statements.clear()
+    response = client.get("/admin/cafes", headers=admin)
+    before = len(statements)
+    cafes = len(response.json())
+
+    make_cafe(items=0)
+    make_cafe(items=0)
+    statements.clear()
+    response = client.get("/admin/cafes", headers=admin)
+
+    assert response.status_code == 200
+    assert len(response.json()) == cafes + 2
+    assert len(statements) == before
+
+
+def test_users_page_statistics(client, make_user, make_cafe, statements):
+    admin = make_user("admin")
+    owner, cafe, menu = make_cafe(items=1)
+    student = make_user()
+    ready = place_order(client, student, cafe["id"], menu, quantity=3)
+    place_order(client, student, cafe["id"], menu)
+    assert client.put(f"/orders/{ready['id']}", json={"status": "ready"}, headers=owner).status_code == 200
+
+    statements.clear()
+    # The newest student is the one just created
+    response = client.get("/admin/users", params={"role": "student", "limit": 1}, headers=admin)
+
+    assert response.status_code == 200, response.text
+    [user] = response.json()
+    assert user["statistics"] == {"total_orders": 2, "total_spent": ready["total_price"], "total_feedbacks": 0}
+    # Sorted by a user column, the statistics are grouped for the page's users only
+    [page] = [statement for statement in statements if "GROUP BY" in statement]
+    assert page.count("IN (SELECT users.id") == 3
+
+
+def test_users_sorted_by_statistic(client, make_user, make_cafe):
+    admin = make_user("admin")
+    _, cafe, menu = make_cafe(items=1)
+    busiest = make_user()
+    for _ in range(30):
+        place_order(client, busiest, cafe["id"], menu)
+    me = client.get("/auth/me", headers=busiest).json()
+
+    response = client.get("/admin/users", params={"role": "student", "sort": "total_orders", "limit": 1},
+                          headers=admin)
+
+    assert response.status_code == 200, response.text
+    assert response.json()[0]["id"] == me["id"]
+    assert response.json()[0]["statistics"]["total_orders"] == 30
@@ -0,0 +1,98 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.core.admission import CafeLoad, OrderAdmission, order_admission
+from tests.conftest import place_order
+
+
+def test_unknown_cafe_gets_no_counter(client, make_user):
+    student = make_user()
+    cafe_id = str(uuid.uuid4())
+
+    response = client.post("/orders/", json={"cafe_id": cafe_id, "items": []}, headers=student)
+
+    assert response.status_code == 404
+    assert cafe_id not in order_admission.active_orders()
+
+
+def test_replays_do_not_use_capacity(client, make_user, make_cafe, monkeypatch):
+    monkeypatch.setattr(settings, "ORDER_ADMISSION_MAX_PER_MINUTE", 1)
+    _, cafe, menu = make_cafe(items=1)
+    student = make_user()
+    headers = {**student, "Idempotency-Key": uuid.uuid4().hex}
+    payload = {"cafe_id": cafe["id"], "items": [{"menu_item_id": menu[0]["id"], "quantity": 1}]}
+
+    first = client.post("/orders/", json=payload, headers=headers)
+    assert first.status_code == 200, first.text
+
+    replay = client.post("/orders/", json=payload, headers=headers)
+    assert replay.status_code == 200, replay.text
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json()["id"] == first.json()["id"]
+
+    # The only token went to the first order
+    response = client.post("/orders/", json=payload, headers=student)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_known_cafe_is_counted(client, make_user, make_cafe):
+    _, cafe, menu = make_cafe(items=1)
+    place_order(client, make_user(), cafe["id"], menu)
+
+    assert order_admission.active_orders()[cafe["id"]] >= 1
+
+
+def test_bad_items_do_not_use_capacity(client, make_user, make_cafe, monkeypatch):
+    monkeypatch.setattr(settings, "ORDER_ADMISSION_MAX_PER_MINUTE", 1)
+    _, cafe, menu = make_cafe(items=1)
+    student = make_user()
+
+    for _ in range(3):
+        response = client.post("/orders/", json={
+            "cafe_id": cafe["id"], "items": [{"menu_item_id": str(uuid.uuid4()), "quantity": 1}],
+        }, headers=student)
+        assert response.status_code == 404
+
+    place_order(client, student, cafe["id"], menu)
+
+
+def fresh_admission(cafe_id: str) -> OrderAdmission:
+    # A just-synced cafe, so admit() needs no database
+    admission = OrderAdmission()
+    now = time.monotonic()
+    admission.cafes[cafe_id] = CafeLoad(active=0, synced_at=now, reserved=0, tokens=100, refilled_at=now)
+    return admission
+
+
+def test_concurrent_admits_reserve_active_slots(monkeypatch):
+    monkeypatch.setattr(settings, "ORDER_ADMISSION_MAX_ACTIVE", 1)
+    admission = fresh_admission("cafe")
+
+    asyncio.run(admission.admit(None, "cafe", reserve=True))
+    # The first order has not committed yet, but holds the only slot
+    with pytest.raises(HTTPException) as rejected:
+        asyncio.run(admission.admit(None, "cafe", reserve=True))
+    assert rejected.value.status_code == 429
+
+    admission.cancel("cafe", reserved=True)
+    asyncio.run(admission.admit(None, "cafe", reserve=True))
+    admission.order_created("cafe", reserved=True)
+
+    assert admission.active_orders() == {"cafe": 1}
+    assert admission.cafes["cafe"].reserved == 0
+
+
+def test_cancel_refunds_the_rate_token(monkeypatch):
+    monkeypatch.setattr(settings, "ORDER_ADMISSION_MAX_PER_MINUTE", 1)
+    admission = fresh_admission("cafe")
+    admission.cafes["cafe"].tokens = 1
+
+    asyncio.run(admission.admit(None, "cafe", reserve=False))
+    admission.cancel("cafe", reserved=False)
+    asyncio.run(admission.admit(None, "cafe", reserve=False))
@@ -0,0 +1,33 @@
+from app.core.catalog_cache import CatalogCache
+
+
+def test_least_recently_used_snapshot_is_evicted():
+    cache = CatalogCache(maxsize=2)
+    cache.get_or_load("cafe-a", "menu", lambda: b"[1]")
+    cache.get_or_load("cafe-b", "menu", lambda: b"[2]")
+    # Touch cafe-a so cafe-b is the oldest
+    cache.get_or_load("cafe-a", "menu", lambda: b"unused")
+    cache.get_or_load("cafe-c", "menu", lambda: b"[3]")
+
+    assert set(cache.snapshots) == {("cafe-a", "menu"), ("cafe-c", "menu")}
+    assert "cafe-b" not in cache.scope_keys
+    assert cache.get_or_load("cafe-b", "menu", lambda: b"[4]").body == b"[4]"
+
+
+def test_unknown_cafes_do_not_grow_the_cache():
+    cache = CatalogCache(maxsize=10)
+    for i in range(100):
+        cache.get_or_load(f"missing-{i}", "menu", lambda: b"[]")
+
+    assert len(cache.snapshots) == 10
+    assert len(cache.scope_keys) == 10
+
+
+def test_invalidation_after_eviction():
+    cache = CatalogCache(maxsize=1)
+    cache.get_or_load("cafe-a", "menu", lambda: b"[1]")
+    cache.get_or_load("cafe-a", "categories", lambda: b"[2]")
+    cache.invalidate("cafe-a")
+
+    assert not cache.snapshots
+    assert not cache.scope_keys
@@ -0,0 +1,40 @@
+import asyncio
+
+from app.core.pubsub import InMemoryPubSub
+from app.websockets.connection_manager import DISCONNECT, SLOW_CONSUMER_CLOSE_CODE, ConnectionManager
+
+
+class StalledSocket:
+    """Accepts but never finishes a send, so its queue fills up."""
+
+    def __init__(self):
+        self.close_codes = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload):
+        await asyncio.Event().wait()
+
+    async def close(self, code):
+        await asyncio.sleep(0.01)
+        self.close_codes.append(code)
+
+
+def test_stop_waits_for_slow_consumer_closes():
+    async def scenario():
+        manager = ConnectionManager(queue_size=1, slow_consumer_policy=DISCONNECT, pubsub=InMemoryPubSub())
+        await manager.start()
+        socket = StalledSocket()
+        await manager.connect(socket, "cafe", "user")
+
+        for i in range(3):
+            manager._broadcast_local("cafe", str(i))
+        assert manager.slow_disconnects == 1
+        assert len(manager.closing) == 1
+
+        await manager.stop()
+        assert socket.close_codes == [SLOW_CONSUMER_CLOSE_CODE]
+        assert not manager.closing
+
+    asyncio.run(scenario())
@@ -0,0 +1,145 @@
+"""The hot queries must be served by the indexes from 9f77b34c3744 on a realistic dataset."""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+from app.core.pagination import DEFAULT_PAGE_SIZE, encode_cursor
+from app.models.order import StatusTypes
+from app.routers.auth import user_by_email
+from app.routers.feedback import CAFE_FEEDBACKS_QUERY
+from app.routers.order import (CAFE_ORDERS_QUERY, ORDER_HISTORY_QUERY, ORDER_ITEMS_QUERY, USER_ORDERS_QUERY,
+                               order_listing_filters)
+from app.routers.public import CAFE_MENU_QUERY
+
+USERS = 2_000
+CAFES = 100
+ORDERS = 30_000
+MENU_ITEMS_PER_CAFE = 40
+
+
+@pytest.fixture(scope="module")
+def seeded(app):
+    from app.database import engine
+
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO users (id, name, email, password_hash, role, created_at, updated_at)
+            SELECT 'seed-user-' || g, 'Seed user ' || g, 'seed-' || g || '@example.com', 'x',
+                   CASE WHEN g <= :cafes THEN 'cafe_owner' ELSE 'student' END, now(), now()
+            FROM generate_series(1, :users) AS g
+        """), {"users": USERS, "cafes": CAFES})
+        conn.execute(text("""
+            INSERT INTO cafe_owner_profile (id, user_id)
+            SELECT 'seed-owner-' || g, 'seed-user-' || g
+            FROM generate_series(1, :cafes) AS g
+        """), {"cafes": CAFES})
+        conn.execute(text("""
+            INSERT INTO cafe (id, name, location, image, owner_id, rating, created_at, updated_at)
+            SELECT 'seed-cafe-' || g, 'Seed cafe ' || g, 'Campus', 'x', 'seed-owner-' || g, 4.0, now(), now()
+            FROM generate_series(1, :cafes) AS g
+        """), {"cafes": CAFES})
+        conn.execute(text("""
+            INSERT INTO menu_item (id, cafe_id, image, name, description, price, available, created_at, updated_at)
+            SELECT 'seed-item-' || g, 'seed-cafe-' || (1 + g % :cafes), 'x', 'Dish ' || g, '', 5,
+                   g % 10 <> 0, now(), now()
+            FROM generate_series(1, :items) AS g
+        """), {"cafes": CAFES, "items": CAFES * MENU_ITEMS_PER_CAFE})
+        conn.execute(text("""
+            INSERT INTO "order" (account_id, cafe_id, status, total_price, created_at, updated_at)
+            SELECT 'seed-user-' || (1 + :cafes + g % (:users - :cafes)), 'seed-cafe-' || (1 + g % :cafes),
+                   'completed', 10, now() - g * interval '1 minute', now()
+            FROM generate_series(1, :orders) AS g
+        """), {"cafes": CAFES, "users": USERS, "orders": ORDERS})
+        conn.execute(text("""
+            INSERT INTO order_item (order_id, menu_item_id, quantity, price, scheduled, created_at, updated_at)
+            SELECT o.id, 'seed-item-' || (1 + (o.id * n) % (:cafes * :items_per_cafe)), 1, 5, false, now(), now()
+            FROM "order" o CROSS JOIN generate_series(1, 2) AS n
+            WHERE o.account_id LIKE 'seed-user-%'
+        """), {"cafes": CAFES, "items_per_cafe": MENU_ITEMS_PER_CAFE})
+        conn.execute(text("""
+            INSERT INTO feedback (id, student_id, order_id, comment, rating, cafe_id, created_at)
+            SELECT 'seed-feedback-' || o.id, o.account_id, o.id, 'ok', 4, o.cafe_id, o.created_at
+            FROM "order" o
+            WHERE o.account_id LIKE 'seed-user-%' AND o.id % 3 = 0
+        """))
+        order_ids = conn.execute(text("""
+            SELECT id FROM "order" WHERE account_id = 'seed-user-500' ORDER BY id LIMIT 50
+        """)).scalars().all()
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+
+    yield {"order_ids": order_ids}
+
+    with engine.begin() as conn:
+        conn.execute(text("""DELETE FROM "order" WHERE account_id LIKE 'seed-user-%'"""))
+        conn.execute(text("DELETE FROM cafe WHERE id LIKE 'seed-cafe-%'"))
+        conn.execute(text("DELETE FROM cafe_owner_profile WHERE id LIKE 'seed-owner-%'"))
+        conn.execute(text("DELETE FROM users WHERE id LIKE 'seed-user-%'"))
+
+
+def scans(plan: dict):
+    """Yield (node type, relation, index) for every scan node in an EXPLAIN (FORMAT JSON) plan."""
+    if "Relation Name" in plan or "Index Name" in plan:
+        yield plan["Node Type"], plan.get("Relation Name"), plan.get("Index Name")
+    for child in plan.get("Plans", ()):
+        yield from scans(child)
+
+
+def explain(statement, params=None) -> list:
+    from app.database import engine
+
+    if isinstance(statement, TextClause):
+        sql = statement.text
+    else:
+        sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params or {}).scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return list(scans(plan[0]["Plan"]))
+
+
+def order_listing(template: str, params: dict, **filters):
+    """The listing statement exactly as the endpoint builds it for the given query parameters."""
+    params = {**params, "limit": DEFAULT_PAGE_SIZE + 1}
+    filters = {"order_status": None, "cursor": None, "since": None, "until": None, **filters}
+    return text(template.format(filters=order_listing_filters(params, **filters))), params
+
+
+# A page further down the listing, as requested with the X-Next-Cursor of the previous one
+CURSOR = encode_cursor(datetime.now() - timedelta(days=3), 10_000)
+
+HOT_QUERIES = [
+    pytest.param(*order_listing(USER_ORDERS_QUERY, {"account_id": "seed-user-500"}),
+                 "order", "ix_order_account_id_created_at", id="student order list"),
+    pytest.param(*order_listing(USER_ORDERS_QUERY, {"account_id": "seed-user-500"},
+                                cursor=CURSOR, order_status=StatusTypes.completed),
+                 "order", "ix_order_account_id_created_at", id="student order list next page"),
+    pytest.param(*order_listing(ORDER_HISTORY_QUERY, {"account_id": "seed-user-500"}),
+                 "order", "ix_order_account_id_created_at", id="student order history"),
+    pytest.param(*order_listing(CAFE_ORDERS_QUERY, {"cafe_id": "seed-cafe-7"}),
+                 "order", "ix_order_cafe_id_created_at", id="cafe order listing"),
+    pytest.param(*order_listing(CAFE_ORDERS_QUERY, {"cafe_id": "seed-cafe-7"}, cursor=CURSOR),
+                 "order", "ix_order_cafe_id_created_at", id="cafe order listing next page"),
+    pytest.param(CAFE_MENU_QUERY, {"cafe_id": "seed-cafe-7"}, "menu_item",
+                 "ix_menu_item_cafe_id_available", id="cafe menu"),
+    pytest.param(user_by_email("seed-42@example.com"), None, "users", "ix_users_email", id="login"),
+    pytest.param(CAFE_FEEDBACKS_QUERY, {"cafe_id": "seed-cafe-7"}, "feedback",
+                 "ix_feedback_cafe_id_created_at", id="cafe feedback"),
+]
+
+
+@pytest.mark.parametrize("statement, params, relation, index", HOT_QUERIES)
+def test_hot_query_uses_index(seeded, statement, params, relation, index):
+    plan = explain(statement, params)
+    assert index in {scan_index for _, _, scan_index in plan}, plan
+    # Joined lookup tables (users, cafe) may be hashed whole at this size; the filtered table may not
+    assert ("Seq Scan", relation, None) not in plan, plan
+
+
+def test_order_items_lookup_uses_index(seeded):
+    plan = explain(ORDER_ITEMS_QUERY, {"order_ids": seeded["order_ids"]})
+    assert "ix_order_item_order_id" in {index for _, _, index in plan}, plan
+    assert ("Seq Scan", "order_item", None) not in plan, plan
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app.core.admission import order_admission
+from app.core.order_scheduler import order_scheduler
+from app.database import engine
+
+
+def place_scheduled_order(client, headers, cafe_id, menu_item):
+    pickup = datetime.now(timezone.utc) + timedelta(hours=2)
+    response = client.post("/orders/", json={
+        "cafe_id": cafe_id,
+        "items": [{"menu_item_id": menu_item["id"], "quantity": 1,
+                   "scheduled": True, "scheduled_time": pickup.isoformat()}],
+    }, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def released_at(order_id):
+    with engine.connect() as conn:
+        return conn.execute(text('SELECT released_at FROM "order" WHERE id = :id'), {"id": order_id}).scalar()
+
+
+def test_release_counts_active_orders(client, make_user, make_cafe):
+    _, cafe, menu = make_cafe(items=1)
+    order = place_scheduled_order(client, make_user(), cafe["id"], menu[0])
+    assert released_at(order["id"]) is None
+    active = order_admission.active_orders()[cafe["id"]]
+
+    client.portal.call(order_scheduler.release, [order["id"]])
+
+    assert released_at(order["id"]) is not None
+    assert order_admission.active_orders()[cafe["id"]] == active + 1
+
+
+def test_release_skips_orders_already_moved_on(client, make_user, make_cafe):
+    _, cafe, menu = make_cafe(items=1)
+    order = place_scheduled_order(client, make_user(), cafe["id"], menu[0])
+    active = order_admission.active_orders()[cafe["id"]]
+    with engine.begin() as conn:
+        conn.execute(text("""UPDATE "order" SET status = 'ready' WHERE id = :id"""), {"id": order["id"]})
+
+    client.portal.call(order_scheduler.release, [order["id"]])
+
+    assert released_at(order["id"]) is not None
+    assert order_admission.active_orders()[cafe["id"]] == active
+
+
+def test_naive_and_aware_times_mean_the_same_pickup(client, make_user, make_cafe):
+    _, cafe, menu = make_cafe(items=1)
+    student = make_user()
+    uzbekistan = timezone(timedelta(hours=5))
+    pickup = (datetime.now(uzbekistan) + timedelta(hours=3)).replace(microsecond=0)
+
+    orders = []
+    for sent in (pickup.replace(tzinfo=None), pickup.astimezone(timezone.utc)):
+        response = client.post("/orders/", json={
+            "cafe_id": cafe["id"],
+            "items": [{"menu_item_id": menu[0]["id"], "quantity": 1,
+                       "scheduled": True, "scheduled_time": sent.isoformat()}],
+        }, headers=student)
+        assert response.status_code == 200, response.text
+        orders.append(response.json())
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT o.scheduled_time, oi.scheduled_time AS item_time
+            FROM "order" o JOIN order_item oi ON oi.order_id = o.id
+            WHERE o.id = ANY(:ids)
+        """), {"ids": [order["id"] for order in orders]}).fetchall()
+
+    assert [row.scheduled_time for row in rows] == [pickup, pickup]
+    # Items keep the pickup as Uzbekistan wall-clock time
+    assert [row.item_time for row in rows] == [pickup.replace(tzinfo=None)] * 2
+    assert [order["items"][0]["scheduled_time"] for order in orders] == [pickup.replace(tzinfo=None).isoformat()] * 2
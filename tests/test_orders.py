@@ -0,0 +1,21 @@
+from tests.conftest import place_order
+
+
+def test_order_statements_do_not_grow_with_items(client, make_user, make_cafe, statements):
+    _, cafe, menu = make_cafe(items=20)
+    student = make_user()
+    # Warm the principal cache and the cafe's admission counters
+    place_order(client, student, cafe["id"], menu[:1])
+
+    statements.clear()
+    place_order(client, student, cafe["id"], menu[:1])
+    single_item = len(statements)
+
+    statements.clear()
+    order = place_order(client, student, cafe["id"], menu, quantity=2)
+    twenty_items = len(statements)
+
+    assert twenty_items == single_item
+    assert len(order["items"]) == 20
+    assert sorted(item["menu_item_name"] for item in order["items"]) == sorted(item["name"] for item in menu)
+    assert order["total_price"] == sum(item["price"] * 2 for item in menu)
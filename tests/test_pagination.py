@@ -0,0 +1,86 @@
+import base64
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from tests.conftest import place_order
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 12, 3, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    base64.urlsafe_b64encode(b"plain text").decode(),
+    base64.urlsafe_b64encode(b'{"created_at": "2025-01-01"}').decode(),
+    base64.urlsafe_b64encode(b'["yesterday", 1]').decode(),
+    base64.urlsafe_b64encode(b'["2025-01-01T00:00:00", "abc"]').decode(),
+])
+def test_decode_cursor_rejects_malformed_cursors(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def fetch_all_pages(client, url: str, headers: dict, limit: int):
+    pages = []
+    cursor = None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get(url, params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        pages.append([order["id"] for order in response.json()])
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("url", ["/orders/", "/orders/history"])
+def test_pages_cover_every_order_once(client, make_user, make_cafe, url):
+    _, cafe, menu = make_cafe(items=1)
+    student = make_user()
+    placed = [place_order(client, student, cafe["id"], menu)["id"] for _ in range(5)]
+
+    pages = fetch_all_pages(client, url, student, limit=2)
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [order_id for page in pages for order_id in page] == sorted(placed, reverse=True)
+
+
+def test_exact_page_size_has_no_next_cursor(client, make_user, make_cafe):
+    _, cafe, menu = make_cafe(items=1)
+    student = make_user()
+    for _ in range(2):
+        place_order(client, student, cafe["id"], menu)
+
+    response = client.get("/orders/", params={"limit": 2}, headers=student)
+
+    assert len(response.json()) == 2
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_orders_with_equal_created_at_are_split_by_id(app, client, make_user, make_cafe):
+    from app.database import engine
+
+    owner, cafe, menu = make_cafe(items=1)
+    student = make_user()
+    placed = [place_order(client, student, cafe["id"], menu)["id"] for _ in range(5)]
+    with engine.begin() as conn:
+        conn.execute(text('UPDATE "order" SET created_at = :ts WHERE id = ANY(:ids)'),
+                     {"ts": datetime(2025, 12, 3, 12, 0), "ids": placed})
+
+    expected = sorted(placed, reverse=True)
+    for url, headers in [("/orders/history", student), (f"/orders/cafe/{cafe['id']}", owner)]:
+        pages = fetch_all_pages(client, url, headers, limit=2)
+        assert [order_id for page in pages for order_id in page] == expected
+
+
+def test_bad_cursor_is_a_client_error(client, make_user):
+    response = client.get("/orders/history", params={"cursor": "%%%"}, headers=make_user())
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
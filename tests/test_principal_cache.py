@@ -0,0 +1,93 @@
+import json
+
+from app.core.principal import Principal, PrincipalCache
+from app.core.pubsub import InMemoryPubSub
+
+
+def principal(user_id: str = "user-1") -> Principal:
+    return Principal(id=user_id, name="Ann", email="ann@example.com", role="student",
+                     owner_profile_id=None, worker_cafe_ids=frozenset())
+
+
+class RecordingPubSub(InMemoryPubSub):
+    """Stands in for the channel between workers: records what was published."""
+
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish_sync(self, envelope: str):
+        self.published.append(envelope)
+        super().publish_sync(envelope)
+
+
+def test_invalidation_reaches_other_workers():
+    channel = RecordingPubSub()
+    here, elsewhere = PrincipalCache(10, 60, channel), PrincipalCache(10, 60, InMemoryPubSub())
+    here.set(principal(), here.version("user-1"))
+    elsewhere.set(principal(), elsewhere.version("user-1"))
+
+    here.invalidate("user-1")
+    # The other worker receives the message through its own subscription
+    for envelope in channel.published:
+        elsewhere.pubsub.handler(envelope)
+
+    assert channel.published == [json.dumps("user-1")]
+    assert here.get("user-1") is None
+    assert elsewhere.get("user-1") is None
+
+
+def test_entries_expire_and_evict_least_recently_used():
+    cache = PrincipalCache(2, 60, InMemoryPubSub())
+    for user_id in ("a", "b"):
+        cache.set(principal(user_id), cache.version(user_id))
+    cache.get("a")
+    cache.set(principal("c"), cache.version("c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    expired = PrincipalCache(2, -1, InMemoryPubSub())
+    expired.set(principal(), expired.version("user-1"))
+    assert expired.get("user-1") is None
+
+
+def test_invalidation_during_load_is_not_overwritten():
+    cache = PrincipalCache(10, 60, InMemoryPubSub())
+    # A request misses and starts loading the user...
+    version = cache.version("user-1")
+    stale = principal()
+    # ...while their worker assignment is removed on another request
+    cache.invalidate("user-1")
+    cache.set(stale, version)
+
+    assert cache.get("user-1") is None
+
+    cache.set(principal(), cache.version("user-1"))
+    assert cache.get("user-1") is not None
+
+
+def test_cached_requests_run_no_user_queries(client, make_user, statements):
+    student = make_user()
+    assert client.get("/orders/", headers=student).status_code == 200
+
+    statements.clear()
+    for _ in range(3):
+        assert client.get("/orders/", headers=student).status_code == 200
+
+    assert statements
+    assert not [statement for statement in statements if "FROM users" in statement]
+
+
+def test_worker_assignment_is_visible_immediately(client, make_user, make_cafe):
+    owner, cafe, _ = make_cafe(items=0)
+    worker = make_user("cafe_worker")
+    me = client.get("/auth/me", headers=worker)
+    assert me.status_code == 200, me.text
+    assert client.get(f"/orders/cafe/{cafe['id']}", headers=worker).status_code == 404
+
+    response = client.post("/workers/", json={"user_id": me.json()["id"], "cafe_id": cafe["id"]},
+                           headers=owner)
+    assert response.status_code == 200, response.text
+
+    assert client.get(f"/orders/cafe/{cafe['id']}", headers=worker).status_code == 200
@@ -0,0 +1,30 @@
+import uuid
+
+
+def category_cafe_ids(client, name):
+    response = client.get(f"/public/categories/{name}/cafes", params={"limit": 100})
+    assert response.status_code == 200, response.text
+    return {cafe["id"] for cafe in response.json()}
+
+
+def create_category(client, name):
+    response = client.post("/public/categories", data={"name": name})
+    assert response.status_code == 200, response.text
+
+
+def test_category_wildcards_match_literally(client, make_cafe):
+    tag = uuid.uuid4().hex[:8]
+    owner, cafe, _ = make_cafe(items=0)
+    item = client.post("/cafes/menu", json={
+        "cafe_id": cafe["id"], "category_id": None, "name": f"Plov {tag}", "description": "",
+        "price": 3.0, "image": "dish.png", "available": True,
+    }, headers=owner)
+    assert item.status_code == 200, item.text
+
+    create_category(client, f"Plov {tag}")
+    create_category(client, f"Pl_v {tag}")
+    create_category(client, f"P%v {tag}")
+
+    assert cafe["id"] in category_cafe_ids(client, f"Plov {tag}")
+    assert cafe["id"] not in category_cafe_ids(client, f"Pl_v {tag}")
+    assert cafe["id"] not in category_cafe_ids(client, f"P%v {tag}")
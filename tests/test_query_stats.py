@@ -0,0 +1,62 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.config import settings
+from app.core.query_stats import QueryStatsMiddleware, instrument, query_metrics
+
+
+@pytest.fixture(scope="module")
+def looping_app():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    instrument(engine)
+
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.get("/loop/{times}")
+    def loop(times: int):
+        with engine.connect() as conn:
+            for i in range(times):
+                conn.execute(text("SELECT :i"), {"i": i})
+        return {"ran": times}
+
+    @app.get("/batched")
+    def batched():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        return {}
+
+    with TestClient(app) as client:
+        yield client
+
+
+def n_plus_one(route: str) -> int:
+    return query_metrics.snapshot().get(route, {}).get("n_plus_one", 0)
+
+
+def test_repeated_statement_is_reported(looping_app, caplog):
+    before = n_plus_one("GET /loop/{times}")
+    with caplog.at_level(logging.WARNING, logger="app.core.query_stats"):
+        response = looping_app.get(f"/loop/{settings.N_PLUS_ONE_THRESHOLD}")
+    assert response.status_code == 200
+
+    assert n_plus_one("GET /loop/{times}") == before + 1
+    assert any("Possible N+1 on GET /loop/{times}" in record.getMessage() for record in caplog.records)
+
+
+def test_distinct_statements_stay_quiet(looping_app, caplog):
+    before = n_plus_one("GET /loop/{times}")
+    with caplog.at_level(logging.WARNING, logger="app.core.query_stats"):
+        looping_app.get(f"/loop/{settings.N_PLUS_ONE_THRESHOLD - 1}")
+        looping_app.get("/batched")
+
+    assert n_plus_one("GET /loop/{times}") == before
+    assert n_plus_one("GET /batched") == 0
+    assert query_metrics.snapshot()["GET /batched"]["statements"] >= 2
+    assert not [record for record in caplog.records if "Possible N+1" in record.getMessage()]
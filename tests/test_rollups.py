@@ -0,0 +1,130 @@
+import threading
+
+from sqlalchemy import text
+
+from app.core import rollups
+from app.database import engine
+from tests.conftest import place_order
+
+NEW_CUSTOMERS = text("SELECT COALESCE(SUM(new_customers), 0) FROM cafe_daily_stats WHERE cafe_id = :cafe_id")
+ACCOUNT_ID = text("""SELECT account_id FROM "order" WHERE id = :id""")
+INSERT_ORDER = text("""
+    INSERT INTO "order" (account_id, cafe_id, status, total_price, created_at)
+    VALUES (:account_id, :cafe_id, 'pending', 1, now())
+    RETURNING id
+""")
+
+
+def new_customers(cafe_id):
+    with engine.connect() as conn:
+        return conn.execute(NEW_CUSTOMERS, {"cafe_id": cafe_id}).scalar()
+
+
+def test_repeat_customer_counts_once(client, make_user, make_cafe):
+    _, cafe, menu = make_cafe(items=1)
+    student = make_user()
+
+    place_order(client, student, cafe["id"], menu)
+    place_order(client, student, cafe["id"], menu)
+    place_order(client, make_user(), cafe["id"], menu)
+
+    assert new_customers(cafe["id"]) == 2
+
+
+def test_concurrent_first_orders_count_once(client, make_user, make_cafe):
+    _, cafe, menu = make_cafe(items=1)
+    first = place_order(client, make_user(), cafe["id"], menu)
+    with engine.connect() as conn:
+        account_id = conn.execute(ACCOUNT_ID, {"id": first["id"]}).scalar()
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM cafe_customer WHERE cafe_id = :cafe_id"), {"cafe_id": cafe["id"]})
+        conn.execute(text("DELETE FROM cafe_daily_stats WHERE cafe_id = :cafe_id"), {"cafe_id": cafe["id"]})
+    params = {"account_id": account_id, "cafe_id": cafe["id"]}
+
+    # Both transactions see no earlier order from the other before either commits
+    first_conn, second_conn = engine.connect(), engine.connect()
+    try:
+        first_id = first_conn.execute(INSERT_ORDER, params).scalar()
+        second_id = second_conn.execute(INSERT_ORDER, params).scalar()
+        first_conn.execute(rollups.RECORD_NEW_CUSTOMER, {"order_id": first_id})
+
+        # Blocks on the cafe_customer key until the first transaction commits
+        second = threading.Thread(target=second_conn.execute,
+                                  args=(rollups.RECORD_NEW_CUSTOMER, {"order_id": second_id}))
+        second.start()
+        second.join(timeout=0.5)
+        first_conn.commit()
+        second.join(timeout=10)
+        assert not second.is_alive()
+        second_conn.commit()
+    finally:
+        first_conn.close()
+        second_conn.close()
+
+    assert new_customers(cafe["id"]) == 1
+
+
+def test_owner_summary_sums_rollups(client, make_user, make_cafe, statements):
+    owner, cafe, menu = make_cafe(items=1)
+    student = make_user()
+    completed = place_order(client, student, cafe["id"], menu, quantity=2)
+    place_order(client, student, cafe["id"], menu)
+    place_order(client, make_user(), cafe["id"], menu)
+    response = client.put(f"/orders/{completed['id']}", json={"status": "completed"}, headers=owner)
+    assert response.status_code == 200, response.text
+
+    statements.clear()
+    summary = client.get("/cafes/owner/summary", headers=owner)
+
+    assert summary.status_code == 200, summary.text
+    assert summary.json()["total_orders"] == 3
+    assert summary.json()["total_customers"] == 2
+    assert summary.json()["total_revenue"] == completed["total_price"]
+    assert not [statement for statement in statements if "cafe_owner_profile" in statement
+                and statement.lstrip().upper().startswith("UPDATE")]
+
+
+def test_orders_do_not_update_the_owner_profile(client, make_user, make_cafe, statements):
+    _, cafe, menu = make_cafe(items=1)
+    student = make_user()
+    statements.clear()
+    place_order(client, student, cafe["id"], menu)
+
+    assert not [statement for statement in statements if "UPDATE cafe_owner_profile" in statement]
+
+
+def test_status_moves_lock_rollup_rows_in_status_order(client, make_user, make_cafe):
+    owner, cafe, menu = make_cafe(items=1)
+    student = make_user()
+    place_order(client, student, cafe["id"], menu)
+    second = place_order(client, student, cafe["id"], menu)
+    assert client.put(f"/orders/{second['id']}", json={"status": "ready"}, headers=owner).status_code == 200
+
+    lock_row = text("""
+        SELECT orders FROM cafe_daily_order_stats
+        WHERE cafe_id = :cafe_id AND status = :status
+        FOR UPDATE NOWAIT
+    """)
+    holder, mover, probe = engine.connect(), engine.connect(), engine.connect()
+    try:
+        # Another transaction holds the 'pending' row...
+        holder.execute(lock_row, {"cafe_id": cafe["id"], "status": "pending"})
+        # ...while a ready -> pending move runs; it must wait there before touching 'ready'
+        mover.execute(text("""UPDATE "order" SET status = 'pending' WHERE id = :id"""), {"id": second["id"]})
+        move = threading.Thread(target=mover.execute,
+                                args=(rollups.MOVE_ORDER_STATUS, {"order_id": second["id"], "old_status": "ready"}))
+        move.start()
+        move.join(timeout=0.5)
+        assert move.is_alive()
+
+        probe.execute(lock_row, {"cafe_id": cafe["id"], "status": "ready"})
+        probe.rollback()
+
+        holder.rollback()
+        move.join(timeout=10)
+        assert not move.is_alive()
+        mover.rollback()
+    finally:
+        holder.close()
+        mover.close()
+        probe.close()
@@ -0,0 +1,24 @@
+import asyncio
+import os
+import signal
+
+from app.core.security import PasswordPool
+
+
+def test_pool_recovers_from_a_killed_worker():
+    pool = PasswordPool(workers=1, queue_limit=10, retry_after=1)
+
+    async def scenario():
+        assert await pool.run(abs, -1) == 1
+        broken = pool.executor
+        for process in list(broken._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)
+            process.join()
+
+        assert await pool.run(abs, -2) == 2
+        assert pool.executor is not broken
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
@@ -0,0 +1,36 @@
+import pytest
+
+from app.core.slow_query_log import is_explainable, normalize
+
+
+@pytest.mark.parametrize("statement", [
+    "SELECT id, updated_at FROM cafe WHERE id = %(id)s",
+    "  with recent AS (SELECT * FROM \"order\") SELECT count(*) FROM recent",
+    "SELECT o.id FROM \"order\" o ORDER BY o.created_at DESC LIMIT 20",
+])
+def test_read_only_statements_are_explainable(statement):
+    assert is_explainable(statement)
+
+
+@pytest.mark.parametrize("statement", [
+    "INSERT INTO cafe (id) VALUES (%(id)s)",
+    "WITH moved AS (UPDATE \"order\" SET status = 'ready' RETURNING id) SELECT * FROM moved",
+    "WITH gone AS (DELETE FROM idempotency_key RETURNING key) SELECT count(*) FROM gone",
+    "SELECT * INTO cafe_copy FROM cafe",
+    "SELECT pg_notify('canteen_ws', 'hello')",
+    "SELECT nextval('order_id_seq')",
+    "SELECT setval('order_id_seq', 1)",
+    "SELECT pg_advisory_lock(1)",
+    "SELECT PG_TRY_ADVISORY_LOCK (1)",
+    "SELECT set_config('statement_timeout', '0', false)",
+    "SELECT id FROM \"order\" WHERE status = 'pending' FOR UPDATE SKIP LOCKED",
+    "SELECT id FROM cafe FOR KEY SHARE",
+    "UPDATE cafe SET name = 'x'",
+])
+def test_writes_locks_and_side_effects_are_not_explainable(statement):
+    assert not is_explainable(statement)
+
+
+def test_normalize_groups_literals():
+    assert normalize("SELECT *  FROM t\n WHERE a = 'x' AND b = 42 AND c = $1") == \
+        "SELECT * FROM t WHERE a = ? AND b = ? AND c = $1"
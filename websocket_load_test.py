@@ -0,0 +1,80 @@
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+import websockets
+
+BASE_URL = "http://localhost:8000"
+WS_URL = "ws://localhost:8000"
+TOKEN = "YOUR_JWT_TOKEN_HERE"
+SOCKETS = 200
+REST_REQUESTS = 200
+# Requests in flight at once; above the pool's 30 connections so starvation shows up
+REST_CONCURRENCY = 40
+
+
+async def hold_socket(opened: asyncio.Event, release: asyncio.Event, failures: list):
+    try:
+        async with websockets.connect(f"{WS_URL}/ws/orders?token={TOKEN}") as websocket:
+            await websocket.recv()  # connection message
+            opened.set()
+            await release.wait()
+    except Exception as e:
+        failures.append(e)
+        opened.set()
+
+
+async def run_load_test():
+    release = asyncio.Event()
+    failures = []
+    opened = [asyncio.Event() for _ in range(SOCKETS)]
+
+    print(f"Opening {SOCKETS} WebSocket connections...")
+    holders = [asyncio.create_task(hold_socket(event, release, failures)) for event in opened]
+    await asyncio.gather(*(event.wait() for event in opened))
+    print(f"✅ {SOCKETS - len(failures)} sockets open, {len(failures)} failed")
+
+    # /public/cafes is served from the catalog cache; the order list checks out
+    # a pooled connection on every request, which is what open sockets must not starve
+    print(f"Sending {REST_REQUESTS} REST requests, {REST_CONCURRENCY} at a time, while sockets stay open...")
+    latencies = []
+    errors = 0
+    remaining = iter(range(REST_REQUESTS))
+
+    async def send_requests(client: httpx.AsyncClient):
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await client.get("/orders/", params={"limit": 20})
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+            except httpx.HTTPError:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=REST_CONCURRENCY)
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=10, limits=limits,
+                                 headers={"Authorization": f"Bearer {TOKEN}"}) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(send_requests(client) for _ in range(REST_CONCURRENCY)))
+        elapsed = time.perf_counter() - started
+
+    release.set()
+    await asyncio.gather(*holders)
+
+    if latencies:
+        latencies.sort()
+        print(f"REST p50: {statistics.median(latencies):.1f} ms")
+        print(f"REST p99: {latencies[int(len(latencies) * 0.99) - 1]:.1f} ms")
+        print(f"REST throughput: {len(latencies) / elapsed:.0f} requests/s")
+    print(f"REST errors: {errors}")
+
+    return 0 if not errors and not failures else 1
+
+
+if __name__ == "__main__":
+    print("WebSocket Load Test")
+    print("=" * 50)
+    sys.exit(asyncio.run(run_load_test()))